@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# fake_cnblogs.py
+#
+# 本地 MetaWeblog 替身服务（基于 xmlrpc.server），用于在不访问博客园的情况下测量同步性能。
+#
+# 实现 blogger.getUsersBlogs、metaWeblog.getRecentPosts（与线上一致，最多返回 300 篇）、
+# metaWeblog.newPost / editPost / getPost 与 blogger.deletePost；
+# 支持可配置的延迟、限流错误（“操作过于频繁，请稍后再试”）与当日发布额度错误（“当日博文发布数量”）。
+#
+# 另提供 bench.stats / bench.reset / bench.duplicate 供基准脚本读取调用次数与制造重复文章。
+# system.multicall 按一次往返计数与计延迟，其中的各个调用另计在 batched 中。
+#
+# 用法：
+#   python benchmarks/fake_cnblogs.py --port 8765 --latency 0.05 --daily-limit 100
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+import xmlrpc.client
+from collections import Counter
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
+BLOG_ID = "42"
+# getRecentPosts 的 API 极限
+RECENT_POSTS_LIMIT = 300
+THROTTLE_FAULT = "操作过于频繁，请稍后再试"
+DAILY_LIMIT_FAULT = "今日发布博文数量已超出当日博文发布数量上限"
+PUBLISH_METHODS = {"metaWeblog.newPost", "metaWeblog.editPost"}
+
+
+class FakeCnblogs:
+    """替身服务的状态：文章、调用计数与故障注入配置（可被多个请求线程共享）"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        throttle_every: int = 0,
+        throttle_rate: float = 0.0,
+        daily_limit: int = 0,
+        seed: int = 0,
+    ):
+        # 每次调用附加的延迟（秒）及随机抖动上限
+        self.latency = latency
+        self.jitter = jitter
+        # 每第 N 次发布调用返回限流错误；0 表示关闭
+        self.throttle_every = throttle_every
+        # 发布调用的速率上限（次/秒，令牌桶，突发 1 秒）；超出时返回限流错误；0 表示不限
+        self.throttle_rate = throttle_rate
+        # 当日 newPost 上限；0 表示不限
+        self.daily_limit = daily_limit
+        self.posts: dict[str, dict] = {}
+        # 按往返计数；multicall 中的调用另计在 batched
+        self.calls: Counter = Counter()
+        self.batched: Counter = Counter()
+        self.faults: Counter = Counter()
+        self.created_today = 0
+        self._next_id = 10000
+        self._publish_calls = 0
+        self._tokens = throttle_rate
+        self._refilled_at = time.monotonic()
+        self._random = random.Random(seed)
+        self._batch = threading.local()
+        self._lock = threading.Lock()
+
+    # --- 内部工具 ---
+    def _enter(self, method: str) -> None:
+        in_batch = getattr(self._batch, "active", False)
+        with self._lock:
+            (self.batched if in_batch else self.calls)[method] += 1
+            delay = 0 if in_batch else self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            throttled = method in PUBLISH_METHODS and self._throttled()
+            if throttled:
+                self.faults["throttle"] += 1
+        if delay > 0:
+            time.sleep(delay)
+        if throttled:
+            raise xmlrpc.client.Fault(500, THROTTLE_FAULT)
+
+    def _throttled(self) -> bool:
+        """调用方已持有锁"""
+        self._publish_calls += 1
+        if self.throttle_every and self._publish_calls % self.throttle_every == 0:
+            return True
+        if self.throttle_rate > 0:
+            now = time.monotonic()
+            self._tokens = min(self.throttle_rate, self._tokens + (now - self._refilled_at) * self.throttle_rate)
+            self._refilled_at = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+        return False
+
+    def _new_id(self) -> str:
+        """调用方已持有锁"""
+        self._next_id += 1
+        return str(self._next_id)
+
+    @staticmethod
+    def _now() -> xmlrpc.client.DateTime:
+        return xmlrpc.client.DateTime(time.localtime())
+
+    # --- MetaWeblog API ---
+    def get_users_blogs(self, app_key, username, password):
+        self._enter("blogger.getUsersBlogs")
+        return [{"blogid": BLOG_ID, "url": "http://127.0.0.1/", "blogName": "fake"}]
+
+    def get_recent_posts(self, blog_id, username, password, number_of_posts):
+        self._enter("metaWeblog.getRecentPosts")
+        limit = max(0, min(int(number_of_posts), RECENT_POSTS_LIMIT))
+        with self._lock:
+            post_ids = list(self.posts)[-limit:] if limit else []
+            return [dict(self.posts[post_id], postid=post_id) for post_id in reversed(post_ids)]
+
+    def new_post(self, blog_id, username, password, post, publish):
+        self._enter("metaWeblog.newPost")
+        with self._lock:
+            if self.daily_limit and self.created_today >= self.daily_limit:
+                self.faults["daily_limit"] += 1
+                raise xmlrpc.client.Fault(500, DAILY_LIMIT_FAULT)
+            self.created_today += 1
+            post_id = self._new_id()
+            self.posts[post_id] = {
+                "title": post.get("title", ""),
+                "description": post.get("description", ""),
+                "categories": post.get("categories") or [],
+                "dateCreated": self._now(),
+            }
+        return post_id
+
+    def edit_post(self, post_id, username, password, post, publish):
+        self._enter("metaWeblog.editPost")
+        with self._lock:
+            existing = self.posts.get(str(post_id))
+            if existing is None:
+                raise xmlrpc.client.Fault(500, f"文章不存在: {post_id}")
+            existing.update(title=post.get("title", existing["title"]), description=post.get("description", ""))
+        return True
+
+    def get_post(self, post_id, username, password):
+        self._enter("metaWeblog.getPost")
+        with self._lock:
+            existing = self.posts.get(str(post_id))
+            if existing is None:
+                raise xmlrpc.client.Fault(500, f"文章不存在: {post_id}")
+            return dict(existing, postid=str(post_id))
+
+    def delete_post(self, app_key, post_id, username, password, publish):
+        self._enter("blogger.deletePost")
+        with self._lock:
+            if self.posts.pop(str(post_id), None) is None:
+                raise xmlrpc.client.Fault(500, f"文章不存在: {post_id}")
+        return True
+
+    def multicall(self, dispatch, calls):
+        """system.multicall：整体计一次往返与一次延迟"""
+        self._enter("system.multicall")
+        self._batch.active = True
+        try:
+            return dispatch(calls)
+        finally:
+            self._batch.active = False
+
+    # --- 基准控制接口 ---
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "batched": dict(self.batched),
+                "faults": dict(self.faults),
+                "posts": len(self.posts),
+                "created_today": self.created_today,
+            }
+
+    def reset(self, counters_only: bool = True) -> bool:
+        """清零调用计数；counters_only=False 时同时清空文章与当日额度（相当于换了一天的新博客）"""
+        with self._lock:
+            self.calls.clear()
+            self.batched.clear()
+            self.faults.clear()
+            self._publish_calls = 0
+            if not counters_only:
+                self.posts.clear()
+                self.created_today = 0
+        return True
+
+    def duplicate(self, count: int) -> int:
+        """把最近的 count 篇文章各复制一份（新 post_id），模拟重复发布"""
+        with self._lock:
+            sources = list(self.posts)[-int(count):] if count else []
+            for post_id in sources:
+                self.posts[self._new_id()] = dict(self.posts[post_id], dateCreated=self._now())
+            return len(sources)
+
+    def configure(self, **options) -> dict:
+        """运行中调整延迟与故障注入（latency / jitter / throttle_every / throttle_rate / daily_limit）"""
+        with self._lock:
+            for name in ("latency", "jitter", "throttle_every", "throttle_rate", "daily_limit"):
+                if name in options:
+                    setattr(self, name, type(getattr(self, name))(options[name]))
+            self._tokens = self.throttle_rate
+            self._refilled_at = time.monotonic()
+            return {name: getattr(self, name) for name in ("latency", "jitter", "throttle_every", "throttle_rate", "daily_limit")}
+
+
+class _RequestHandler(SimpleXMLRPCRequestHandler):
+    # 与线上一致地支持 keep-alive，便于测量连接复用
+    protocol_version = "HTTP/1.1"
+    rpc_paths = ("/", "/RPC2", "/api/metaweblog/new")
+
+
+class _ThreadingXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def create_server(fake: FakeCnblogs, host: str = "127.0.0.1", port: int = 0) -> SimpleXMLRPCServer:
+    """创建绑定到 fake 的 XML-RPC 服务（port=0 时由系统分配端口）"""
+    server = _ThreadingXMLRPCServer((host, port), requestHandler=_RequestHandler, logRequests=False, allow_none=True)
+    server.register_introspection_functions()
+    server.register_multicall_functions()
+    for name, func in [
+        ("blogger.getUsersBlogs", fake.get_users_blogs),
+        ("metaWeblog.getRecentPosts", fake.get_recent_posts),
+        ("metaWeblog.newPost", fake.new_post),
+        ("metaWeblog.editPost", fake.edit_post),
+        ("metaWeblog.getPost", fake.get_post),
+        ("blogger.deletePost", fake.delete_post),
+        ("bench.stats", fake.stats),
+        ("bench.reset", fake.reset),
+        ("bench.duplicate", fake.duplicate),
+        ("bench.configure", lambda options: fake.configure(**options)),
+        ("system.multicall", lambda calls: fake.multicall(server.system_multicall, calls)),
+    ]:
+        server.register_function(func, name)
+    return server
+
+
+def start_server(fake: FakeCnblogs, host: str = "127.0.0.1", port: int = 0) -> tuple[SimpleXMLRPCServer, str]:
+    """在后台线程启动服务，返回 (server, RPC 地址)"""
+    server = create_server(fake, host, port)
+    threading.Thread(target=server.serve_forever, name="fake-cnblogs", daemon=True).start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}/"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="本地 MetaWeblog 替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="每次调用附加的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="随机附加延迟上限（秒）")
+    parser.add_argument("--throttle-every", type=int, default=0, help="每第 N 次发布调用返回限流错误")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="发布调用速率上限（次/秒）")
+    parser.add_argument("--daily-limit", type=int, default=0, help="当日 newPost 上限")
+    args = parser.parse_args()
+
+    fake = FakeCnblogs(
+        latency=args.latency,
+        jitter=args.jitter,
+        throttle_every=args.throttle_every,
+        throttle_rate=args.throttle_rate,
+        daily_limit=args.daily_limit,
+    )
+    server = create_server(fake, args.host, args.port)
+    print(f"[info] fake cnblogs listening on http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
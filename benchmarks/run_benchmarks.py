@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# run_benchmarks.py
+#
+# 同步性能基准：启动本地 MetaWeblog 替身服务（fake_cnblogs.py），在 100 / 1k / 10k 篇的合成仓库上
+# 依次执行 sync_to_cnblogs.py 与 deduplicate_cnblogs.py，输出每个阶段的耗时、吞吐（篇/秒）与 RPC 调用次数。
+#
+# 阶段：
+#   initial   首次全量发布（全部 newPost）
+#   noop      无变更全量重跑（发布清单命中，应无 editPost）
+#   update    修改 10% 的文件后增量同步（--files-from）
+#   dedup     服务端制造重复文章后执行 deduplicate_cnblogs.py --full
+#
+# 用法：
+#   python benchmarks/run_benchmarks.py                       # 100、1000、10000 篇
+#   python benchmarks/run_benchmarks.py --sizes 100,1000 --latency 0.02 --output bench.json
+#   python benchmarks/run_benchmarks.py --baseline bench.json # 与上次结果对比，耗时退化超过容差时返回 1
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fake_cnblogs import FakeCnblogs, start_server
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+SYNC_SCRIPT = REPO_ROOT / "src" / "assemble_publish" / "sync_to_cnblogs.py"
+DEDUP_SCRIPT = REPO_ROOT / "tools" / "deduplicate_cnblogs.py"
+
+DEFAULT_SIZES = [100, 1000, 10000]
+# 每个目录放多少篇文章
+FILES_PER_DIR = 100
+# update 阶段修改的文件比例
+UPDATE_RATIO = 0.1
+# dedup 阶段制造的重复文章数上限（需落在 getRecentPosts 的 300 篇窗口内）
+MAX_DUPLICATES = 100
+# 与 --baseline 对比时允许的耗时退化比例
+DEFAULT_TOLERANCE = 0.25
+# 与 sync_to_cnblogs 一致：部分完成（例如当日额度用尽）
+EXIT_PARTIAL = 3
+
+WORDS = (
+    "同步 发布 博客 缓存 索引 增量 并发 限速 快照 清单 渲染 指纹 连接 复用 延迟 吞吐 "
+    "markdown metaweblog xmlrpc keepalive sqlite scandir journal quota backlog"
+).split()
+
+
+def synth_markdown(rng: random.Random, index: int, total: int) -> str:
+    """生成一篇约 2KB 的合成文章，包含标题、列表、代码块与指向其它文章的站内链接"""
+    lines = [f"# 合成文章 {index:05d}", ""]
+    for paragraph in range(6):
+        lines.append(" ".join(rng.choice(WORDS) for _ in range(40)))
+        lines.append("")
+        if paragraph == 2:
+            lines += ["```python", f"print({index})", "```", ""]
+    for _ in range(3):
+        target = rng.randrange(total)
+        lines.append(f"- 参见 [note-{target:05d}](../topic-{target // FILES_PER_DIR:03d}/note-{target:05d}.md)")
+    return "\n".join(lines) + "\n"
+
+
+def build_repo(root: Path, size: int, seed: int = 0) -> list[Path]:
+    """在 root 下生成 size 篇 Markdown（每目录 FILES_PER_DIR 篇），返回文件列表"""
+    rng = random.Random(seed)
+    files = []
+    for index in range(size):
+        directory = root / f"topic-{index // FILES_PER_DIR:03d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"note-{index:05d}.md"
+        path.write_text(synth_markdown(rng, index, size), encoding="utf-8")
+        files.append(path)
+    (root / ".gitignore").write_text("drafts/\n", encoding="utf-8")
+    return files
+
+
+def write_files_list(path: Path, files: list[Path]) -> None:
+    """写入 NUL 分隔的文件列表（与 run_sync.py 传给同步脚本的格式一致）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        for item in files:
+            f.write(os.fsencode(str(item)))
+            f.write(b"\0")
+
+
+class StepResult:
+    """单个阶段的测量结果"""
+
+    def __init__(self, size: int, step: str, wall: float, exit_code: int, stats: dict, log_path: Path):
+        self.size = size
+        self.step = step
+        self.wall = wall
+        self.exit_code = exit_code
+        self.calls: dict[str, int] = stats.get("calls", {})
+        self.faults: dict[str, int] = stats.get("faults", {})
+        self.log_path = log_path
+
+    @property
+    def writes(self) -> int:
+        return sum(
+            self.calls.get(method, 0)
+            for method in ("metaWeblog.newPost", "metaWeblog.editPost", "blogger.deletePost")
+        )
+
+    @property
+    def posts_per_second(self) -> float:
+        return self.writes / self.wall if self.wall > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "size": self.size,
+            "step": self.step,
+            "wall_seconds": round(self.wall, 3),
+            "exit_code": self.exit_code,
+            "writes": self.writes,
+            "posts_per_second": round(self.posts_per_second, 2),
+            "rpc_total": sum(self.calls.values()),
+            "rpc_calls": self.calls,
+            "faults": self.faults,
+        }
+
+
+def run_step(fake: FakeCnblogs, size: int, step: str, cmd: list[str], cwd: Path, env: dict, log_dir: Path) -> StepResult:
+    fake.reset()
+    log_path = log_dir / f"{size}-{step}.log"
+    started = time.monotonic()
+    with log_path.open("wb") as log:
+        exit_code = subprocess.run(cmd, cwd=str(cwd), env=env, stdout=log, stderr=subprocess.STDOUT).returncode
+    wall = time.monotonic() - started
+    result = StepResult(size, step, wall, exit_code, fake.stats(), log_path)
+    status = "ok" if exit_code in {0, EXIT_PARTIAL} else f"exit {exit_code}"
+    print(
+        f"  - {step:<8} {wall:8.2f}s  写入 {result.writes:>6}  {result.posts_per_second:8.1f} 篇/秒  "
+        f"RPC {sum(result.calls.values()):>6}  {status}"
+    )
+    if exit_code not in {0, EXIT_PARTIAL}:
+        print(f"    日志：{log_path}")
+    return result
+
+
+def bench_size(fake: FakeCnblogs, rpc_url: str, size: int, work_root: Path, args) -> list[StepResult]:
+    repo = work_root / f"repo-{size}"
+    log_dir = work_root / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    fake.reset(counters_only=False)
+
+    print(f"\n📦 {size} 篇：生成合成仓库 {repo}")
+    files = build_repo(repo, size, args.seed)
+
+    env = os.environ.copy()
+    env.update(
+        {
+            "CNBLOGS_RPC_URL": rpc_url,
+            "CNBLOGS_USERNAME": "bench",
+            "CNBLOGS_TOKEN": "bench",
+            "CNBLOGS_PUBLISH_RATE": str(args.publish_rate),
+            "CNBLOGS_PUBLISH_WORKERS": str(args.workers),
+            "PYTHONUNBUFFERED": "1",
+        }
+    )
+    python = sys.executable
+    results = [
+        run_step(fake, size, "initial", [python, str(SYNC_SCRIPT)], repo, env, log_dir),
+        run_step(fake, size, "noop", [python, str(SYNC_SCRIPT)], repo, env, log_dir),
+    ]
+
+    rng = random.Random(args.seed + 1)
+    changed = rng.sample(files, max(1, int(size * UPDATE_RATIO)))
+    for path in changed:
+        with path.open("a", encoding="utf-8") as f:
+            f.write(f"\n更新于 {time.time():.0f}\n")
+    files_list = repo / ".cnblogs_sync" / "changed_files.lst"
+    write_files_list(files_list, [path.relative_to(repo) for path in changed])
+    results.append(
+        run_step(fake, size, "update", [python, str(SYNC_SCRIPT), "--files-from", str(files_list)], repo, env, log_dir)
+    )
+
+    fake.duplicate(min(MAX_DUPLICATES, max(1, size // 10)))
+    results.append(run_step(fake, size, "dedup", [python, str(DEDUP_SCRIPT), "--full"], repo, env, log_dir))
+    return results
+
+
+def compare_baseline(results: list[StepResult], baseline_path: Path, tolerance: float) -> list[str]:
+    """与上次结果对比，返回耗时退化超过容差的阶段说明"""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = {(item["size"], item["step"]): item for item in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result.size, result.step))
+        if not before or before["wall_seconds"] <= 0:
+            continue
+        ratio = result.wall / before["wall_seconds"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{result.size}/{result.step}: {before['wall_seconds']:.2f}s -> {result.wall:.2f}s（+{(ratio - 1) * 100:.0f}%）"
+            )
+        rpc_before = before.get("rpc_total", 0)
+        rpc_now = sum(result.calls.values())
+        if rpc_now > rpc_before:
+            regressions.append(f"{result.size}/{result.step}: RPC 调用 {rpc_before} -> {rpc_now}")
+    return regressions
+
+
+def parse_sizes(raw: str) -> list[int]:
+    sizes = []
+    for item in raw.split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        multiplier = 1000 if item.endswith("k") else 1
+        sizes.append(int(float(item.rstrip("k")) * multiplier))
+    return sizes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="同步性能基准（本地 MetaWeblog 替身服务）")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="合成仓库规模，逗号分隔，如 100,1k,10k")
+    parser.add_argument("--latency", type=float, default=0.0, help="替身服务每次调用的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="替身服务随机附加延迟上限（秒）")
+    parser.add_argument("--throttle-every", type=int, default=0, help="每第 N 次发布调用返回限流错误")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="替身服务的发布速率上限（次/秒）")
+    parser.add_argument("--daily-limit", type=int, default=0, help="替身服务的当日 newPost 上限")
+    parser.add_argument("--publish-rate", type=float, default=0.0, help="同步脚本的发布限速（CNBLOGS_PUBLISH_RATE，0 为不限）")
+    parser.add_argument("--workers", type=int, default=4, help="同步脚本的发布线程数（CNBLOGS_PUBLISH_WORKERS）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="合成仓库与日志目录（默认临时目录，结束后删除）")
+    parser.add_argument("--keep", action="store_true", help="保留合成仓库与日志")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    parser.add_argument("--baseline", help="与之前的 JSON 结果对比")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="允许的耗时退化比例")
+    args = parser.parse_args()
+
+    fake = FakeCnblogs(
+        latency=args.latency,
+        jitter=args.jitter,
+        throttle_every=args.throttle_every,
+        throttle_rate=args.throttle_rate,
+        daily_limit=args.daily_limit,
+        seed=args.seed,
+    )
+    server, rpc_url = start_server(fake)
+    print(f"[info] fake cnblogs at {rpc_url}")
+
+    work_root = Path(args.workdir or tempfile.mkdtemp(prefix="cnblogs-bench-")).resolve()
+    work_root.mkdir(parents=True, exist_ok=True)
+    results: list[StepResult] = []
+    try:
+        for size in parse_sizes(args.sizes):
+            results += bench_size(fake, rpc_url, size, work_root, args)
+    finally:
+        server.shutdown()
+        if args.keep or args.workdir:
+            print(f"\n[info] 合成仓库与日志保留在 {work_root}")
+        else:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    print("\n规模     阶段      耗时(s)   写入   篇/秒     RPC  明细")
+    for result in results:
+        detail = ", ".join(f"{method.split('.')[-1]}={count}" for method, count in sorted(result.calls.items()))
+        if result.faults:
+            detail += " | 故障 " + ", ".join(f"{name}={count}" for name, count in sorted(result.faults.items()))
+        print(
+            f"{result.size:<8} {result.step:<8} {result.wall:8.2f} {result.writes:>6} {result.posts_per_second:7.1f} "
+            f"{sum(result.calls.values()):>6}  {detail}"
+        )
+
+    if args.output:
+        payload = {
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {
+                "latency": args.latency,
+                "jitter": args.jitter,
+                "throttle_every": args.throttle_every,
+                "throttle_rate": args.throttle_rate,
+                "daily_limit": args.daily_limit,
+                "publish_rate": args.publish_rate,
+                "workers": args.workers,
+            },
+            "results": [result.to_dict() for result in results],
+        }
+        Path(args.output).write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n[info] 结果已写入 {args.output}")
+
+    failed = [r for r in results if r.exit_code not in {0, EXIT_PARTIAL}]
+    if args.baseline:
+        regressions = compare_baseline(results, Path(args.baseline), args.tolerance)
+        if regressions:
+            print(f"\n⚠️ 相对基线退化（容差 {args.tolerance * 100:.0f}%）：")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\n✅ 未发现相对基线的退化（容差 {args.tolerance * 100:.0f}%）")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
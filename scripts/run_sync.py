@@ -1,11 +1,19 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import contextlib
+import hashlib
+import importlib
+import importlib.metadata
+import json
 import os
+import platform
+import re
 import shutil
 import subprocess
 import sys
 import tempfile
+import time
 from pathlib import Path
 from urllib.parse import quote, urlparse, urlunparse
 
@@ -16,7 +24,22 @@ DEFAULT_SYNC_REPO_BRANCH = "main"
 DEFAULT_SYNC_REPO_DEPTH = 50
 DEFAULT_WORKDIR = Path(tempfile.gettempdir()) / "assemble-main-repo"
 DEFAULT_VENV_DIR = Path(".venv")
+# 部分克隆（--filter=blob:none）+ 稀疏检出：只下载、只检出同步需要的文件
+PARTIAL_CLONE = os.getenv("SYNC_PARTIAL_CLONE", "true").strip().lower() not in {"0", "false", "no", "off"}
+# 稀疏检出规则（非 cone 模式，gitignore 语法）；.gitignore 供扫描时剪枝使用
+SPARSE_PATTERNS = ["*.md", ".gitignore"]
+# 额外需要检出的文件（逗号分隔，例如发布时引用的图片目录 "assets/"）
+SPARSE_EXTRA_ENV = "SYNC_SPARSE_EXTRA"
 INSTALL_DEPS = True
+# 依赖印记：requirements 哈希 + 解释器版本 + 已安装版本，未变化时跳过 pip
+DEPS_STAMP_FILE = ".assemble_publish_deps.json"
+# 工作区内的同步状态目录（与同步脚本的 .cnblogs_sync 一致）
+SYNC_STATE_DIRNAME = ".cnblogs_sync"
+LAST_SYNCED_COMMIT_FILE = "last_synced_commit"
+CHANGED_FILES_LIST = "changed_files.lst"
+QUOTA_LEDGER_FILE = ".cnblogs_quota_ledger.json"
+# 同步脚本部分失败（含当日额度用尽）时的退出码
+SYNC_EXIT_PARTIAL = 3
 RUN_STEPS = [
     "准备与校验配置",
     "拉取/更新主仓库",
@@ -123,16 +146,316 @@ def short_commit(commit: str | None) -> str:
         return "unknown"
     return commit[:8]
 
-def get_head_commit(cwd: Path, env: dict[str, str]) -> str | None:
+def get_head_commit(cwd: Path, env: dict[str, str], short: bool = True) -> str | None:
+    cmd = ["git", "rev-parse", "--short", "HEAD"] if short else ["git", "rev-parse", "HEAD"]
     try:
-        return run(
-            ["git", "rev-parse", "--short", "HEAD"],
+        return run(cmd, cwd=cwd, env=env, capture=True).stdout.strip()
+    except subprocess.CalledProcessError:
+        return None
+
+
+def load_last_synced_commit(workdir: Path) -> str | None:
+    path = workdir / SYNC_STATE_DIRNAME / LAST_SYNCED_COMMIT_FILE
+    try:
+        commit = path.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return commit or None
+
+
+def save_last_synced_commit(workdir: Path, commit: str) -> None:
+    path = workdir / SYNC_STATE_DIRNAME / LAST_SYNCED_COMMIT_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(commit + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def collect_changed_markdown(cwd: Path, env: dict[str, str], base: str | None, head: str) -> list[str] | None:
+    """返回 base..head 之间新增/修改/重命名后的 .md 路径；历史缺失时返回 None（需全量扫描）"""
+    if not base:
+        return None
+    try:
+        # 浅克隆窗口（--depth）之外的提交不在本地，无法比较
+        run(["git", "cat-file", "-e", f"{base}^{{commit}}"], cwd=cwd, env=env, capture=True)
+        # --no-renames：重命名按“删除 + 新增”输出，无需读取 blob 计算相似度
+        output = run(
+            ["git", "diff", "--name-status", "--no-renames", "-z", base, head],
             cwd=cwd,
             env=env,
             capture=True,
-        ).stdout.strip()
+        ).stdout
+    except subprocess.CalledProcessError:
+        return None
+
+    changed: list[str] = []
+    fields = output.split("\0")
+    i = 0
+    while i < len(fields):
+        status = fields[i]
+        if not status:
+            i += 1
+            continue
+        # 重命名/复制记录带两个路径（旧、新），其余记录一个路径
+        path_count = 2 if status[0] in {"R", "C"} else 1
+        paths = fields[i + 1 : i + 1 + path_count]
+        i += 1 + path_count
+        if status[0] == "D" or not paths:
+            continue
+        path = paths[-1]
+        if path.endswith(".md"):
+            changed.append(path)
+    return changed
+
+
+def dir_size(path: Path) -> int:
+    """目录总字节数（用于估算每次拉取新增的对象大小）"""
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def sparse_patterns() -> list[str]:
+    extra = [p.strip() for p in os.getenv(SPARSE_EXTRA_ENV, "").split(",") if p.strip()]
+    return [*SPARSE_PATTERNS, *extra]
+
+
+def apply_sparse_checkout(cwd: Path, env: dict[str, str]) -> bool:
+    """设置稀疏检出规则（非 cone 模式）；git 版本过旧等失败时返回 False，保持完整检出"""
+    try:
+        run(["git", "sparse-checkout", "set", "--no-cone", *sparse_patterns()], cwd=cwd, env=env, capture=True)
+        return True
+    except subprocess.CalledProcessError as exc:
+        print(f"  - 稀疏检出不可用，使用完整检出：{(exc.stderr or '').strip()}")
+        return False
+
+
+def enable_partial_clone(cwd: Path, env: dict[str, str]) -> None:
+    """把已有的完整克隆转换为部分克隆：后续 fetch 不再下载 blob，按需从 origin 补取"""
+    run(["git", "config", "remote.origin.promisor", "true"], cwd=cwd, env=env)
+    run(["git", "config", "remote.origin.partialclonefilter", "blob:none"], cwd=cwd, env=env)
+
+
+def run_maintenance(cwd: Path, env: dict[str, str]) -> None:
+    """工作区维护：按 git 自身的阈值打包松散对象、清理过期对象（无事可做时几乎零开销）"""
+    try:
+        run(["git", "maintenance", "run", "--auto", "--quiet"], cwd=cwd, env=env, capture=True)
     except subprocess.CalledProcessError:
+        try:
+            run(["git", "gc", "--auto", "--quiet"], cwd=cwd, env=env, capture=True)
+        except subprocess.CalledProcessError as exc:
+            print(f"  - 工作区维护失败（忽略）：{(exc.stderr or '').strip()}")
+
+
+def has_pending_backlog(workdir: Path) -> bool:
+    """上次同步是否留有积压（额度用尽/失败未完成的文件）"""
+    path = workdir / SYNC_STATE_DIRNAME / QUOTA_LEDGER_FILE
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return bool(data.get("backlog"))
+
+
+def write_files_list(path: Path, files: list[str]) -> None:
+    """写入 NUL 分隔的文件列表，供同步脚本 --files-from 流式读取"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        for item in files:
+            f.write(os.fsencode(item))
+            f.write(b"\0")
+
+
+def load_engines():
+    """在当前解释器中加载进程内编排 API（assemble_publish.engine）；依赖缺失时返回 None"""
+    src_dir = str(REPO_ROOT / "src")
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+    importlib.invalidate_caches()
+    try:
+        from assemble_publish import engine
+        # 同步模块在 SyncEngine.run 中才导入：提前加载一次，确认其依赖在当前解释器中可用
+        importlib.import_module("assemble_publish.sync_to_cnblogs")
+    except ImportError as exc:
+        print(f"  - 当前解释器无法加载同步模块（{exc}），改用子进程执行")
+        return None
+    return engine
+
+
+# 本次运行的指标（assemble_publish.metrics.RunMetrics）；无法加载时为 None
+RUN_METRICS = None
+
+
+def load_stdlib_module(name: str):
+    """加载仅依赖标准库的 assemble_publish 子模块（metrics / profiling），安装依赖前即可使用；失败时返回 None"""
+    src_dir = str(REPO_ROOT / "src")
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+    try:
+        return importlib.import_module(f"assemble_publish.{name}")
+    except ImportError:
+        return None
+
+
+def write_run_metrics(metrics, run_metrics, workdir_path: Path) -> None:
+    metrics_dir = metrics.get_metrics_dir(workdir_path)
+    try:
+        run_metrics.write(metrics_dir)
+    except OSError as exc:
+        print(f"[warn] 写入运行指标失败：{metrics_dir}（{exc}）")
+        return
+    print(f"📊 运行指标已写入 {metrics_dir}（总耗时 {run_metrics.duration:.1f}s）")
+
+
+# 同一进程内多次调用 main（常驻模式）时复用的引擎上下文：保留博客 ID、远端文章快照与 RPC 连接
+ENGINE_CONTEXT = None
+
+
+def get_engine_context(engine, workdir_path: Path):
+    """复用上一次的引擎上下文；工作区或凭据变化时改建"""
+    global ENGINE_CONTEXT
+    context = engine.EngineContext(workdir_path)
+    if ENGINE_CONTEXT is not None and ENGINE_CONTEXT.key == context.key:
+        return ENGINE_CONTEXT
+    if ENGINE_CONTEXT is not None:
+        print("  - 工作区或凭据已变化，重建进程内上下文")
+    ENGINE_CONTEXT = context
+    return context
+
+
+def reset_engine_context() -> None:
+    global ENGINE_CONTEXT
+    ENGINE_CONTEXT = None
+
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def normalize_dist_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_requirements(req_file: Path) -> list[tuple[str, str | None]] | None:
+    """解析 requirements.txt，返回 [(包名, 精确版本或 None)]；含无法本地校验的写法时返回 None"""
+    requirements: list[tuple[str, str | None]] = []
+    for raw_line in req_file.read_text(encoding="utf-8-sig").splitlines():
+        line = raw_line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        # 选项（-r/-e/--index-url）、环境标记、URL 依赖交给 pip 处理
+        if line.startswith("-") or ";" in line or "@" in line:
+            return None
+        match = re.fullmatch(r"([A-Za-z0-9][A-Za-z0-9._-]*)(\[[^\]]*\])?\s*(==\s*([^,\s]+))?", line)
+        if not match:
+            # 范围约束（>=、~= 等）无法不借助 packaging 精确判断
+            return None
+        requirements.append((normalize_dist_name(match.group(1)), match.group(4)))
+    return requirements
+
+
+def installed_distributions(site_dirs: list[str] | None = None) -> dict[str, str]:
+    """通过 importlib.metadata 读取已安装的发行包版本（site_dirs 为空时读取当前解释器）"""
+    dists = importlib.metadata.distributions(path=site_dirs) if site_dirs else importlib.metadata.distributions()
+    installed: dict[str, str] = {}
+    for dist in dists:
+        name = dist.metadata["Name"]
+        if name:
+            installed.setdefault(normalize_dist_name(name), dist.version)
+    return installed
+
+
+def venv_site_dirs(venv_dir: Path) -> list[str]:
+    if os.name == "nt":
+        return [str(venv_dir / "Lib" / "site-packages")]
+    return [str(p) for p in (venv_dir / "lib").glob("python*/site-packages")]
+
+
+def deps_stamp_path(python_exec: Path, venv_dir: Path) -> Path:
+    """依赖印记位置：venv 内；当前解释器本身是 venv 时放在其前缀下，否则放在仓库根目录"""
+    if python_exec != Path(sys.executable):
+        return venv_dir.expanduser().absolute() / DEPS_STAMP_FILE
+    if sys.prefix != sys.base_prefix:
+        return Path(sys.prefix) / DEPS_STAMP_FILE
+    return REPO_ROOT / DEPS_STAMP_FILE
+
+
+def interpreter_tag() -> str:
+    return f"{platform.python_implementation()}-{platform.python_version()}"
+
+
+def check_deps(req_file: Path, stamp_path: Path, site_dirs: list[str] | None) -> dict[str, str] | None:
+    """校验依赖是否无需重新安装；满足时返回 {包名: 版本}，否则返回 None
+
+    印记中的 requirements 哈希与解释器版本一致、且已安装版本未变化时直接通过；
+    印记缺失或过期时，requirements 均为无版本/精确版本且已全部安装也视为通过。
+    """
+    req_hash = file_sha256(req_file)
+    try:
+        installed = installed_distributions(site_dirs)
+    except OSError:
+        return None
+    try:
+        stamp = json.loads(stamp_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        stamp = None
+    if (
+        isinstance(stamp, dict)
+        and stamp.get("requirements_sha256") == req_hash
+        and stamp.get("interpreter") == interpreter_tag()
+        and isinstance(stamp.get("packages"), dict)
+        and all(installed.get(name) == version for name, version in stamp["packages"].items())
+    ):
+        return dict(stamp["packages"])
+
+    requirements = parse_requirements(req_file)
+    if requirements is None:
         return None
+    packages: dict[str, str] = {}
+    for name, pinned in requirements:
+        version = installed.get(name)
+        if version is None or (pinned is not None and version != pinned):
+            return None
+        packages[name] = version
+    return packages
+
+
+def write_deps_stamp(req_file: Path, stamp_path: Path, site_dirs: list[str] | None) -> None:
+    """pip 安装成功后写入依赖印记
+
+    requirements 无法本地解析（范围约束、-r 等）时记录整个环境的已安装版本，任一包变化即令印记失效。
+    """
+    requirements = parse_requirements(req_file)
+    installed = installed_distributions(site_dirs)
+    if requirements is None:
+        packages = dict(installed)
+    else:
+        packages = {name: installed[name] for name, _ in requirements if name in installed}
+    payload = {
+        "requirements_sha256": file_sha256(req_file),
+        "interpreter": interpreter_tag(),
+        "packages": packages,
+    }
+    try:
+        stamp_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = stamp_path.with_name(stamp_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, stamp_path)
+    except OSError as exc:
+        print(f"  - 写入依赖印记失败：{stamp_path}（{exc}）")
 
 
 def is_pep668_error(exc: subprocess.CalledProcessError) -> bool:
@@ -177,10 +500,14 @@ def log_plan() -> None:
 
 
 def log_step_start(step_index: int) -> None:
+    if RUN_METRICS is not None:
+        RUN_METRICS.step_started(step_index, RUN_STEPS[step_index - 1])
     print(f"\n[{step_index}/{len(RUN_STEPS)}] {RUN_STEPS[step_index - 1]}")
 
 
 def log_step_ok(step_index: int, detail: str | None = None) -> None:
+    if RUN_METRICS is not None:
+        RUN_METRICS.step_finished(step_index, "ok")
     title = RUN_STEPS[step_index - 1]
     if detail:
         print(f"✅ {title}：{detail}")
@@ -189,12 +516,44 @@ def log_step_ok(step_index: int, detail: str | None = None) -> None:
 
 
 def log_step_fail(step_index: int, error: str) -> None:
+    if RUN_METRICS is not None and step_index:
+        RUN_METRICS.step_finished(step_index, "failed")
     title = RUN_STEPS[step_index - 1] if step_index else "未知步骤"
     print(f"❌ {title} 失败：{error}")
 
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
+    """执行完整流程并写出运行指标（run_sync.prom / run_sync.json）"""
+    global RUN_METRICS
+    if argv is None:
+        argv = sys.argv[1:]
+    workdir_path = Path(DEFAULT_WORKDIR).expanduser().absolute()
+    metrics = load_stdlib_module("metrics")
+    profiling = load_stdlib_module("profiling")
+    profile_mode = None
+    if profiling is not None:
+        argv, profile_mode = profiling.parse_profile_args(list(argv))
+        if profile_mode:
+            # 子进程执行的同步/去重同样开启剖析；进程内执行时由本进程的剖析器统一覆盖
+            os.environ[profiling.PROFILE_ENV] = profile_mode
+    RUN_METRICS = metrics.RunMetrics("run_sync") if metrics else None
+    exit_code = 1
+    profile_context = (
+        profiling.profile_run("run_sync", profile_mode, profiling.get_profile_dir(workdir_path))
+        if profiling is not None else contextlib.nullcontext()
+    )
+    with profile_context:
+        try:
+            exit_code = run_pipeline(argv)
+            return exit_code
+        finally:
+            if RUN_METRICS is not None:
+                RUN_METRICS.finish(exit_code)
+                write_run_metrics(metrics, RUN_METRICS, workdir_path)
+
+
+def run_pipeline(argv: list[str]) -> int:
     load_env_defaults()
     log_plan()
 
@@ -258,6 +617,7 @@ def main() -> int:
         # Step 2: clone/update
         step_index = 2
         log_step_start(step_index)
+        last_synced_commit = load_last_synced_commit(workdir_path)
         if (workdir_path / ".git").is_dir():
             print(f"  - 已存在工作区，执行更新：{workdir_path}")
             try:
@@ -266,14 +626,22 @@ def main() -> int:
             except subprocess.CalledProcessError:
                 run(["git", "remote", "add", "origin", remote_url], cwd=workdir_path, env=env)
 
+            fetch_filter: list[str] = []
+            sparse = False
+            if PARTIAL_CLONE:
+                enable_partial_clone(workdir_path, env)
+                fetch_filter = ["--filter=blob:none"]
+                sparse = apply_sparse_checkout(workdir_path, env)
+            objects_before = dir_size(workdir_path / ".git" / "objects")
+            fetch_started = time.monotonic()
             if sync_repo_depth != 0:
                 run(
-                    ["git", "fetch", "--prune", "--depth", str(sync_repo_depth), "origin", sync_repo_branch],
+                    ["git", "fetch", "--prune", *fetch_filter, "--depth", str(sync_repo_depth), "origin", sync_repo_branch],
                     cwd=workdir_path,
                     env=env,
                 )
             else:
-                run(["git", "fetch", "--prune", "origin", sync_repo_branch], cwd=workdir_path, env=env)
+                run(["git", "fetch", "--prune", *fetch_filter, "origin", sync_repo_branch], cwd=workdir_path, env=env)
                 try:
                     shallow = run(
                         ["git", "rev-parse", "--is-shallow-repository"],
@@ -288,22 +656,44 @@ def main() -> int:
 
             run(["git", "checkout", "-B", sync_repo_branch, f"origin/{sync_repo_branch}"], cwd=workdir_path, env=env)
             run(["git", "reset", "--hard", f"origin/{sync_repo_branch}"], cwd=workdir_path, env=env)
+            # 检出时按需补取的 blob 也计入本次拉取
+            fetch_seconds = time.monotonic() - fetch_started
+            fetched_bytes = dir_size(workdir_path / ".git" / "objects") - objects_before
+            run_maintenance(workdir_path, env)
             head_commit = short_commit(get_head_commit(workdir_path, env))
-            update_detail = f"方式=更新 HEAD={head_commit}"
+            update_detail = (
+                f"方式=更新{'（部分克隆+稀疏检出）' if sparse else ''} HEAD={head_commit} "
+                f"新增对象={format_bytes(max(0, fetched_bytes))} 耗时={fetch_seconds:.1f}s"
+            )
             log_step_ok(step_index, update_detail)
             set_status(step_index, "成功", update_detail)
         else:
             print(f"  - 工作区不存在，执行克隆：{workdir_path}")
+            # 重新克隆后本地状态（快照、索引）都是新的，不再沿用进程内上下文
+            reset_engine_context()
             if workdir_path.exists():
                 shutil.rmtree(workdir_path)
 
+            fetch_started = time.monotonic()
             clone_args = ["git", "clone", "--branch", sync_repo_branch]
             if sync_repo_depth != 0:
                 clone_args += ["--depth", str(sync_repo_depth)]
+            sparse = False
+            if PARTIAL_CLONE:
+                # 先不检出，设置好稀疏规则后再检出，只下载需要的 blob
+                clone_args += ["--filter=blob:none", "--no-checkout"]
             clone_args += [remote_url, str(workdir_path)]
             run(clone_args, env=env)
+            if PARTIAL_CLONE:
+                sparse = apply_sparse_checkout(workdir_path, env)
+                run(["git", "checkout", sync_repo_branch], cwd=workdir_path, env=env)
+            fetch_seconds = time.monotonic() - fetch_started
+            fetched_bytes = dir_size(workdir_path / ".git" / "objects")
             head_commit = short_commit(get_head_commit(workdir_path, env))
-            clone_detail = f"方式=克隆 HEAD={head_commit}"
+            clone_detail = (
+                f"方式=克隆{'（部分克隆+稀疏检出）' if sparse else ''} HEAD={head_commit} "
+                f"对象={format_bytes(fetched_bytes)} 耗时={fetch_seconds:.1f}s"
+            )
             log_step_ok(step_index, clone_detail)
             set_status(step_index, "成功", clone_detail)
 
@@ -318,28 +708,48 @@ def main() -> int:
             req_file = next((p for p in req_file_candidates if p.is_file()), None)
             if not req_file:
                 raise FileNotFoundError("requirements.txt not found")
-            try:
-                run(
-                    [str(python_exec), "-m", "pip", "install", "--disable-pip-version-check", "-r", str(req_file)],
-                    env=env,
-                    capture=True,
-                )
-                detail = "依赖已安装（venv）" if python_exec != Path(sys.executable) else "依赖已安装"
+            venv_python = venv_python_path(venv_dir.expanduser().absolute())
+            deps_started = time.monotonic()
+            if check_deps(req_file, deps_stamp_path(python_exec, venv_dir), None) is not None:
+                detail = f"依赖未变化，跳过安装（校验 {(time.monotonic() - deps_started) * 1000:.0f}ms）"
+                log_step_ok(step_index, detail)
+                set_status(step_index, "跳过", detail)
+            elif venv_python.is_file() and check_deps(
+                req_file, deps_stamp_path(venv_python, venv_dir), venv_site_dirs(venv_dir.expanduser().absolute())
+            ) is not None:
+                python_exec = venv_python
+                detail = f"依赖未变化，跳过安装（venv: {venv_dir}，校验 {(time.monotonic() - deps_started) * 1000:.0f}ms）"
                 log_step_ok(step_index, detail)
-                set_status(step_index, "成功", detail)
-            except subprocess.CalledProcessError as exc:
-                if is_pep668_error(exc):
-                    python_exec = ensure_venv(venv_dir)
+                set_status(step_index, "跳过", detail)
+            else:
+                try:
                     run(
                         [str(python_exec), "-m", "pip", "install", "--disable-pip-version-check", "-r", str(req_file)],
                         env=env,
                         capture=True,
                     )
-                    detail = f"依赖已安装（venv: {venv_dir}）"
+                    write_deps_stamp(req_file, deps_stamp_path(python_exec, venv_dir), None)
+                    detail = "依赖已安装（venv）" if python_exec != Path(sys.executable) else "依赖已安装"
                     log_step_ok(step_index, detail)
                     set_status(step_index, "成功", detail)
-                else:
-                    raise
+                except subprocess.CalledProcessError as exc:
+                    if is_pep668_error(exc):
+                        python_exec = ensure_venv(venv_dir)
+                        run(
+                            [str(python_exec), "-m", "pip", "install", "--disable-pip-version-check", "-r", str(req_file)],
+                            env=env,
+                            capture=True,
+                        )
+                        write_deps_stamp(
+                            req_file,
+                            deps_stamp_path(python_exec, venv_dir),
+                            venv_site_dirs(venv_dir.expanduser().absolute()),
+                        )
+                        detail = f"依赖已安装（venv: {venv_dir}）"
+                        log_step_ok(step_index, detail)
+                        set_status(step_index, "成功", detail)
+                    else:
+                        raise
         else:
             log_step_ok(step_index, "跳过安装依赖")
             set_status(step_index, "跳过", "跳过安装依赖")
@@ -348,48 +758,117 @@ def main() -> int:
         step_index = 4
         log_step_start(step_index)
         args = []
-        for arg in sys.argv[1:]:
+        force_full = False
+        for arg in argv:
             if arg == "--init":
                 print("  - 忽略 --init（内部自动初始化）")
                 continue
+            if arg == "--full":
+                force_full = True
+                continue
             args.append(arg)
 
-        sync_script_candidates = [
-            REPO_ROOT / "src" / "assemble_publish" / "sync_to_cnblogs.py",
-            REPO_ROOT / "sync_to_cnblogs.py",
-            SCRIPT_DIR / "sync_to_cnblogs.py",
-            SCRIPT_DIR / "cnblogs_sync" / "sync_to_cnblogs.py",
-        ]
-        sync_script = next((p for p in sync_script_candidates if p.is_file()), None)
-        if not sync_script:
-            raise FileNotFoundError("未找到同步脚本：sync_to_cnblogs.py")
-        run([str(python_exec), str(sync_script), *args], cwd=workdir_path, env=env)
-        args_display = " ".join(args) if args else "(无)"
-        sync_detail = f"参数={args_display}"
-        log_step_ok(step_index, sync_detail)
-        set_status(step_index, "成功", sync_detail)
-
-        # Step 5: post-sync dedup
+        head_full = get_head_commit(workdir_path, env, short=False)
+        changed_files = None
+        if not args and not force_full and head_full:
+            changed_files = collect_changed_markdown(workdir_path, env, last_synced_commit, head_full)
+            if changed_files is None:
+                reason = "无已同步提交记录" if not last_synced_commit else "历史缺失（超出浅克隆窗口？）"
+                print(f"  - {reason}，回退为全量扫描")
+            else:
+                print(
+                    f"  - 增量模式：{short_commit(last_synced_commit)}..{short_commit(head_full)} "
+                    f"变更 {len(changed_files)} 个 Markdown 文件"
+                )
+                if RUN_METRICS is not None:
+                    RUN_METRICS.set_gauge("changed_files", len(changed_files))
+
+        # 依赖装在当前解释器时，同步与去重在本进程内执行（共享 RPC 连接、博客 ID 与远端文章快照）；
+        # 依赖装在独立 venv 时回退为子进程
+        engine = load_engines() if python_exec == Path(sys.executable) else None
+        engine_context = get_engine_context(engine, workdir_path) if engine else None
+        sync_script = None
+        if engine is None:
+            sync_script_candidates = [
+                REPO_ROOT / "src" / "assemble_publish" / "sync_to_cnblogs.py",
+                REPO_ROOT / "sync_to_cnblogs.py",
+                SCRIPT_DIR / "sync_to_cnblogs.py",
+                SCRIPT_DIR / "cnblogs_sync" / "sync_to_cnblogs.py",
+            ]
+            sync_script = next((p for p in sync_script_candidates if p.is_file()), None)
+            if not sync_script:
+                raise FileNotFoundError("未找到同步脚本：sync_to_cnblogs.py")
+        sync_complete = True
+        if changed_files is not None and not changed_files and not has_pending_backlog(workdir_path):
+            sync_detail = "无变更，跳过同步"
+            log_step_ok(step_index, sync_detail)
+            set_status(step_index, "跳过", sync_detail)
+        else:
+            if changed_files is not None:
+                files_list = workdir_path / SYNC_STATE_DIRNAME / CHANGED_FILES_LIST
+                write_files_list(files_list, changed_files)
+                sync_args = ["--files-from", str(files_list)]
+                mode_label = f"增量（{len(changed_files)} 个文件）"
+            elif args:
+                sync_args = args
+                mode_label = f"手动：{' '.join(args)}"
+            else:
+                sync_args = []
+                mode_label = "全量"
+            if engine is not None:
+                sync_engine = engine.SyncEngine(engine_context)
+                returncode = sync_engine.run(sync_args)
+                if returncode not in {0, SYNC_EXIT_PARTIAL}:
+                    raise RuntimeError(f"同步失败（退出码 {returncode}）")
+                mode_label += f"，进程内 {sync_engine.elapsed:.1f}s"
+            else:
+                sync_cmd = [str(python_exec), str(sync_script), *sync_args]
+                returncode = subprocess.run(sync_cmd, cwd=str(workdir_path), env=env).returncode
+                if returncode not in {0, SYNC_EXIT_PARTIAL}:
+                    raise subprocess.CalledProcessError(returncode, sync_cmd)
+            sync_detail = f"模式={mode_label}"
+            if returncode == SYNC_EXIT_PARTIAL:
+                # 未全部完成：不推进已同步提交，下次仍从旧提交计算增量
+                sync_complete = False
+                sync_detail += "，部分失败"
+                log_step_ok(step_index, sync_detail)
+                set_status(step_index, "部分失败", sync_detail)
+            else:
+                log_step_ok(step_index, sync_detail)
+                set_status(step_index, "成功", sync_detail)
+        if sync_complete and not args and head_full:
+            save_last_synced_commit(workdir_path, head_full)
+
+        # Step 5: post-sync dedup（--full 时同样忽略远端文章快照，做完整去重）
         step_index = 5
         log_step_start(step_index)
-        dedup_script = REPO_ROOT / "tools" / "deduplicate_cnblogs.py"
-        if not dedup_script.is_file():
-            raise FileNotFoundError("????????tools/deduplicate_cnblogs.py")
-
-        run([str(python_exec), str(dedup_script)], cwd=workdir_path, env=env)
-        log_step_ok(step_index, "????")
-        set_status(step_index, "??", "????")
+        if engine is not None:
+            dedup_result = engine.DedupEngine(engine_context).run(full=force_full)
+            dedup_detail = f"{dedup_result.summary()}（进程内 {dedup_result.elapsed:.1f}s）"
+        else:
+            dedup_script = REPO_ROOT / "tools" / "deduplicate_cnblogs.py"
+            if not dedup_script.is_file():
+                raise FileNotFoundError("未找到去重脚本：tools/deduplicate_cnblogs.py")
+            dedup_cmd = [str(python_exec), str(dedup_script)]
+            if force_full:
+                dedup_cmd.append("--full")
+            run(dedup_cmd, cwd=workdir_path, env=env)
+            dedup_detail = "去重完成"
+        log_step_ok(step_index, dedup_detail)
+        set_status(step_index, "成功", dedup_detail)
 
         print("\n✅ 全部步骤执行完成")
         print_summary()
         return 0
     except subprocess.CalledProcessError as exc:
+        reset_engine_context()
         detail = getattr(exc, "stderr", "") or str(exc)
         log_step_fail(step_index, detail.strip())
         set_status(step_index, "失败", "命令执行失败")
         print_summary()
         return 1
     except Exception as exc:
+        reset_engine_context()
         log_step_fail(step_index, str(exc))
         set_status(step_index, "失败")
         print_summary()
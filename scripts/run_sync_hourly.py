@@ -1,14 +1,61 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import hashlib
+import hmac
+import json
+import os
 import subprocess
 import sys
+import threading
 import time
+import tracemalloc
+from collections import deque
 from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
+import run_sync
+from run_sync import (
+    DEFAULT_SYNC_REPO_BRANCH,
+    REPO_ROOT,
+    build_repo_url,
+    format_bytes,
+    load_env_defaults,
+    sanitize_url,
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 
 SCRIPT_DIR = Path(__file__).resolve().parent
+# 轮询远端分支的间隔（秒）；0 表示不轮询，仅在 00:00/12:00 定点同步
+DEFAULT_POLL_INTERVAL = 300
+# 同步失败后，同一提交最早多久后重试（秒）
+DEFAULT_RETRY_INTERVAL = 1800
+# webhook 监听：端口为 0 时不启动；连续推送在防抖窗口内合并为一次同步
+DEFAULT_WEBHOOK_HOST = "127.0.0.1"
+DEFAULT_WEBHOOK_DEBOUNCE = 10
+WEBHOOK_MAX_BODY = 1024 * 1024
+# 常驻模式保留的内存采样数
+MEMORY_SAMPLES = 48
+
+
+def env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def env_seconds(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        return default
 
 
 def next_run_time(now: datetime | None = None) -> datetime:
@@ -43,18 +90,395 @@ def run_once(args: list[str]) -> int:
         return 1
 
 
-def main() -> int:
-    args = sys.argv[1:]
-    print("[info] run immediately")
-    run_once(args)
+def run_in_process(args: list[str]) -> int:
+    """常驻模式：在本进程内执行 run_sync.main，RPC 连接池、博客 ID、标题索引、渲染缓存与目录缓存跨运行保留"""
+    try:
+        return run_sync.main(list(args))
+    except Exception as exc:
+        run_sync.reset_engine_context()
+        print(f"[error] in-process sync failed: {exc}")
+        return 1
+
+
+def current_rss() -> int | None:
+    """当前常驻内存（字节）；无法获取时返回 None"""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def peak_rss() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryMonitor:
+    """常驻模式下每次运行后采样内存，便于观察泄漏；SYNC_DAEMON_TRACEMALLOC=1 时额外输出增长最多的分配位置"""
+
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        self.samples: deque[dict] = deque(maxlen=MEMORY_SAMPLES)
+        self.baseline: int | None = None
+        self._snapshot = None
+        if trace:
+            tracemalloc.start()
+
+    def sample(self, run_number: int) -> dict:
+        rss = current_rss()
+        item = {
+            "run": run_number,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "rss_bytes": rss,
+            "peak_rss_bytes": peak_rss(),
+        }
+        if self.trace:
+            item["traced_bytes"], item["traced_peak_bytes"] = tracemalloc.get_traced_memory()
+        self.samples.append(item)
+
+        parts = []
+        if rss is not None:
+            # 第一次运行会加载模块与建立连接，以其结束时的内存为基线
+            if self.baseline is None:
+                self.baseline = rss
+            delta = rss - self.baseline
+            parts.append(f"rss={format_bytes(rss)} ({'+' if delta >= 0 else '-'}{format_bytes(abs(delta))} since run #1)")
+        if item["peak_rss_bytes"] is not None:
+            parts.append(f"peak={format_bytes(item['peak_rss_bytes'])}")
+        if self.trace:
+            parts.append(f"traced={format_bytes(item['traced_bytes'])}")
+        print(f"[info] memory after run #{run_number}: {', '.join(parts) or 'unavailable'}")
+        if self.trace:
+            self._log_growth()
+        return item
+
+    def _log_growth(self, limit: int = 3) -> None:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        if self._snapshot is not None:
+            for stat in snapshot.compare_to(self._snapshot, "lineno")[:limit]:
+                if stat.size_diff > 0:
+                    print(f"[info]   +{format_bytes(stat.size_diff)} {stat.traceback}")
+        self._snapshot = snapshot
+
+    def status(self) -> dict:
+        return {"baseline_rss_bytes": self.baseline, "samples": list(self.samples)}
+
+
+def daemon_fingerprint() -> dict[str, tuple[int, int]]:
+    """常驻进程依赖的代码与配置（.env、requirements.txt、脚本与同步模块）的 (mtime, 大小)"""
+    paths = [
+        REPO_ROOT / ".env",
+        SCRIPT_DIR / ".env",
+        REPO_ROOT / "requirements.txt",
+        SCRIPT_DIR / "run_sync.py",
+        SCRIPT_DIR / "run_sync_hourly.py",
+        *sorted((REPO_ROOT / "src" / "assemble_publish").glob("*.py")),
+    ]
+    fingerprint = {}
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        fingerprint[str(path)] = (st.st_mtime_ns, st.st_size)
+    return fingerprint
+
+
+def remote_tip() -> str | None:
+    """用 git ls-remote 查询远端分支最新提交（只传输一行引用，不下载任何对象）"""
+    repo_url = os.getenv("SYNC_REPO_URL")
+    token = os.getenv("SYNC_REPO_TOKEN")
+    if not repo_url:
+        return None
+    remote_url = build_repo_url(repo_url, token) if token else repo_url
+    env = os.environ.copy()
+    env.setdefault("GIT_TERMINAL_PROMPT", "0")
+    try:
+        output = subprocess.run(
+            ["git", "ls-remote", remote_url, f"refs/heads/{DEFAULT_SYNC_REPO_BRANCH}"],
+            env=env,
+            check=True,
+            text=True,
+            capture_output=True,
+            timeout=60,
+        ).stdout
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as exc:
+        detail = getattr(exc, "stderr", "") or str(exc)
+        print(f"[warn] ls-remote {sanitize_url(repo_url)} failed: {detail.strip()}")
+        return None
+    for line in output.splitlines():
+        sha, _, ref = line.partition("\t")
+        if ref.strip() == f"refs/heads/{DEFAULT_SYNC_REPO_BRANCH}":
+            return sha.strip()
+    return None
+
+
+class SyncRunner:
+    """串行执行同步：轮询、定点对账与 webhook 触发共用同一把锁，保证不会并发运行
+
+    记录最近一次尝试的远端提交；同一提交同步失败后，至少间隔 retry_interval 秒再重试。
+    """
+
+    def __init__(self, args: list[str], retry_interval: int, daemon: bool = False, memory: MemoryMonitor | None = None):
+        self.args = args
+        self.retry_interval = retry_interval
+        self.daemon = daemon
+        self.memory = memory
+        self._fingerprint = daemon_fingerprint() if daemon else None
+        self.last_attempted: str | None = None
+        self.retry_at: float | None = None
+        self.runs = 0
+        self.running = False
+        self.last_trigger: str | None = None
+        self.last_started: float | None = None
+        self.last_duration: float | None = None
+        self.last_ok: bool | None = None
+        self._lock = threading.Lock()
+
+    def needs_run(self, tip: str) -> bool:
+        if tip != self.last_attempted:
+            return True
+        return self.retry_at is not None and time.monotonic() >= self.retry_at
+
+    def restart_if_changed(self) -> None:
+        """常驻模式下代码或配置变化时重新启动进程，丢弃所有进程内状态"""
+        if not self.daemon or daemon_fingerprint() == self._fingerprint:
+            return
+        print("[info] code or configuration changed, restarting daemon")
+        sys.stdout.flush()
+        os.execv(sys.executable, [sys.executable, *sys.argv])
 
+    def run(self, trigger: str, tip: str | None = None, extra_args: list[str] | None = None) -> bool:
+        with self._lock:
+            self.restart_if_changed()
+            self.running = True
+            self.last_trigger = trigger
+            self.last_started = time.time()
+            started = time.monotonic()
+            execute = run_in_process if self.daemon else run_once
+            try:
+                ok = execute([*self.args, *(extra_args or [])]) == 0
+            finally:
+                self.running = False
+            self.runs += 1
+            if self.memory is not None:
+                self.memory.sample(self.runs)
+            self.last_duration = time.monotonic() - started
+            self.last_ok = ok
+            if tip:
+                self.last_attempted = tip
+            self.retry_at = None if ok else time.monotonic() + self.retry_interval
+            return ok
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "last_trigger": self.last_trigger,
+            "last_started": datetime.fromtimestamp(self.last_started).isoformat(timespec="seconds")
+            if self.last_started else None,
+            "last_duration_seconds": round(self.last_duration, 3) if self.last_duration is not None else None,
+            "last_ok": self.last_ok,
+            "last_attempted_tip": self.last_attempted,
+            "daemon": self.daemon,
+            **({"memory": self.memory.status()} if self.memory is not None else {}),
+        }
+
+
+class WebhookTrigger:
+    """合并 webhook 事件：最后一次推送后静默 debounce 秒才触发同步；运行期间到达的事件合并为下一次运行"""
+
+    def __init__(self, runner: SyncRunner, debounce: float):
+        self.runner = runner
+        self.debounce = debounce
+        self.pending = 0
+        self.received = 0
+        self.coalesced_runs = 0
+        self.last_event: float | None = None
+        self._cond = threading.Condition()
+
+    def notify(self) -> int:
+        with self._cond:
+            self.pending += 1
+            self.received += 1
+            self.last_event = time.monotonic()
+            self._cond.notify()
+            return self.pending
+
+    def worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self.pending:
+                    self._cond.wait()
+                # 防抖：等到最后一个事件之后静默 debounce 秒
+                while True:
+                    remaining = self.last_event + self.debounce - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self.pending
+                self.pending = 0
+            self.coalesced_runs += 1
+            print(f"[info] webhook trigger: {batch} event(s) coalesced into one sync")
+            self.runner.run("webhook", remote_tip())
+
+    def status(self) -> dict:
+        with self._cond:
+            waiting = (
+                max(0.0, self.last_event + self.debounce - time.monotonic())
+                if self.pending and self.last_event is not None else None
+            )
+            return {
+                "queue_depth": self.pending,
+                "events_received": self.received,
+                "webhook_runs": self.coalesced_runs,
+                "debounce_seconds": self.debounce,
+                "next_run_in_seconds": round(waiting, 3) if waiting is not None else None,
+                **self.runner.status(),
+            }
+
+
+def verify_webhook(headers, body: bytes, secret: str) -> bool:
+    """校验 GitHub 风格的 X-Hub-Signature-256，或与密钥一致的 X-Webhook-Token / X-Gitlab-Token"""
+    if not secret:
+        return True
+    signature = headers.get("X-Hub-Signature-256", "")
+    if signature.startswith("sha256="):
+        expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature[len("sha256="):], expected)
+    token = headers.get("X-Webhook-Token") or headers.get("X-Gitlab-Token") or ""
+    return bool(token) and hmac.compare_digest(token, secret)
+
+
+def webhook_ref(body: bytes) -> str | None:
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return None
+    return payload.get("ref") if isinstance(payload, dict) else None
+
+
+def make_webhook_handler(trigger: WebhookTrigger, secret: str):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, payload: dict) -> None:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.split("?", 1)[0] in {"/", "/status"}:
+                self._reply(200, trigger.status())
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            # 读取正文前校验长度：非数字或负数返回 400，超过上限返回 413（未读的正文不再复用连接）
+            raw_length = (self.headers.get("Content-Length") or "0").strip()
+            if not raw_length.isdigit():
+                self.close_connection = True
+                self._reply(400, {"error": "invalid Content-Length"})
+                return
+            length = int(raw_length)
+            if length > WEBHOOK_MAX_BODY:
+                self.close_connection = True
+                self._reply(413, {"error": "payload too large"})
+                return
+            body = self.rfile.read(length) if length else b""
+            if not verify_webhook(self.headers, body, secret):
+                self._reply(401, {"error": "invalid signature"})
+                return
+            ref = webhook_ref(body)
+            if ref and ref != f"refs/heads/{DEFAULT_SYNC_REPO_BRANCH}":
+                self._reply(202, {"ignored": ref})
+                return
+            self._reply(202, {"queued": True, "queue_depth": trigger.notify()})
+
+        def log_message(self, format, *args):
+            return
+
+    return WebhookHandler
+
+
+def start_webhook_listener(runner: SyncRunner, port: int) -> WebhookTrigger:
+    host = os.getenv("SYNC_WEBHOOK_HOST", DEFAULT_WEBHOOK_HOST).strip() or DEFAULT_WEBHOOK_HOST
+    debounce = env_seconds("SYNC_WEBHOOK_DEBOUNCE", DEFAULT_WEBHOOK_DEBOUNCE)
+    secret = os.getenv("SYNC_WEBHOOK_SECRET", "").strip()
+    trigger = WebhookTrigger(runner, debounce)
+    server = ThreadingHTTPServer((host, port), make_webhook_handler(trigger, secret))
+    threading.Thread(target=server.serve_forever, name="webhook-http", daemon=True).start()
+    threading.Thread(target=trigger.worker, name="webhook-worker", daemon=True).start()
+    print(f"[info] webhook listener on http://{host}:{port}/ (debounce {debounce}s, status at /status)")
+    return trigger
+
+
+def run_scheduled(runner: SyncRunner) -> int:
+    """仅定点同步（每日 00:00/12:00）"""
     while True:
         sleep_sec, next_run = sleep_to_next_run()
         next_label = next_run.strftime("%Y-%m-%d %H:%M:%S")
         print(f"[info] next run at {next_label} (in {sleep_sec}s)")
         time.sleep(sleep_sec)
         print("[info] scheduled trigger")
-        run_once(args)
+        runner.run("schedule")
+
+
+def run_polling(runner: SyncRunner, poll_interval: int) -> int:
+    """轮询远端分支：提交变化时立即同步；每日 00:00/12:00 做一次全量对账（--full）"""
+    next_reconcile = next_run_time()
+    print(
+        f"[info] polling every {poll_interval}s, "
+        f"full reconciliation at {next_reconcile.strftime('%Y-%m-%d %H:%M:%S')}"
+    )
+    while True:
+        until_reconcile = (next_reconcile - datetime.now()).total_seconds()
+        time.sleep(max(1, min(poll_interval, until_reconcile)))
+
+        if datetime.now() >= next_reconcile:
+            print("[info] scheduled full reconciliation")
+            runner.run("reconcile", remote_tip(), ["--full"])
+            next_reconcile = next_run_time()
+            print(f"[info] next full reconciliation at {next_reconcile.strftime('%Y-%m-%d %H:%M:%S')}")
+            continue
+
+        tip = remote_tip()
+        if tip is None or not runner.needs_run(tip):
+            continue
+        if tip == runner.last_attempted:
+            print(f"[info] retry sync of {tip[:8]}")
+        else:
+            print(f"[info] remote {DEFAULT_SYNC_REPO_BRANCH} moved to {tip[:8]}, trigger sync")
+        runner.run("poll", tip)
+
+
+def main() -> int:
+    load_env_defaults()
+    args = sys.argv[1:]
+    poll_interval = env_seconds("SYNC_POLL_INTERVAL", DEFAULT_POLL_INTERVAL)
+    daemon = env_flag("SYNC_DAEMON")
+    memory = MemoryMonitor(trace=env_flag("SYNC_DAEMON_TRACEMALLOC")) if daemon else None
+    runner = SyncRunner(args, env_seconds("SYNC_RETRY_INTERVAL", DEFAULT_RETRY_INTERVAL), daemon, memory)
+    if daemon:
+        print("[info] daemon mode: sync runs in-process and keeps connections and caches warm between runs")
+
+    webhook_port = env_seconds("SYNC_WEBHOOK_PORT", 0)
+    if webhook_port:
+        start_webhook_listener(runner, webhook_port)
+
+    print("[info] run immediately")
+    runner.run("startup", remote_tip() if poll_interval > 0 else None)
+
+    if poll_interval > 0:
+        return run_polling(runner, poll_interval)
+    return run_scheduled(runner)
 
 
 if __name__ == "__main__":
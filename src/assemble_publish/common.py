@@ -1,11 +1,27 @@
 # common.py
 # 公共模块：日志、配置、API 辅助函数
 
+import gzip
+import http.client
+import io
 import json
 import logging
 import os
+import re
+import socket
+import sqlite3
+import ssl
 import sys
+import threading
+import time
+import xmlrpc.client
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Callable
+from urllib.parse import urlparse
+
+from . import metrics, profiling
 
 # --- 日志配置 ---
 LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
@@ -51,43 +67,150 @@ def env_int(name: str, default: int) -> int:
         return default
 
 
+def env_float(name: str, default: float) -> float:
+    """读取浮点类型环境变量"""
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    raw = raw.strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        return default
+
+
 def env_str(name: str, default: str = "") -> str:
     """读取字符串类型环境变量"""
     return os.getenv(name, default).strip()
 
 
-# --- 同步记录文件操作 ---
+# --- 同步记录（SQLite 标题索引） ---
+# 旧版整文件 JSON 记录，首次打开索引时自动导入
+LEGACY_SYNC_RECORD_NAME = ".cnblogs_sync_record.json"
+
+
 def get_sync_record_path(repo_root: Path | None = None) -> Path:
-    """获取同步记录文件路径"""
+    """获取同步记录（标题索引）文件路径"""
     if repo_root is None:
         repo_root = Path.cwd().resolve()
-    return (repo_root / ".cnblogs_sync" / ".cnblogs_sync_record.json").resolve()
+    return (repo_root / ".cnblogs_sync" / ".cnblogs_title_index.sqlite3").resolve()
 
 
-def load_sync_record(record_file: Path) -> dict[str, str] | None:
-    """加载同步记录（不存在则返回 None）"""
-    if not record_file.exists():
-        return None
-    try:
-        return json.loads(record_file.read_text(encoding="utf-8"))
-    except Exception as e:
-        logger.warning(f"加载发布记录文件失败: {record_file} ({e})")
-        return None
+def normalize_title(title) -> str:
+    """标准化标题，用于匹配（去除首尾空格）"""
+    return title.strip() if title else ""
 
 
-def save_sync_record(record_file: Path, record: dict[str, str]) -> bool:
-    """保存同步记录"""
-    try:
-        record_file.parent.mkdir(parents=True, exist_ok=True)
-        record_file.write_text(
-            json.dumps(record, ensure_ascii=False, indent=2),
-            encoding="utf-8",
+# 博客园返回的 dateCreated 为北京时间（UTC+8）且不带时区；本地记录的创建时间与之保持一致
+SERVER_TZ = timezone(timedelta(hours=8))
+SERVER_DATE_FORMAT = "%Y%m%dT%H:%M:%S"
+
+
+def server_time_str(timestamp: float | None = None) -> str:
+    """把 Unix 时间戳（默认当前时间）格式化为服务端 dateCreated 的格式"""
+    moment = datetime.now(SERVER_TZ) if timestamp is None else datetime.fromtimestamp(timestamp, SERVER_TZ)
+    return moment.strftime(SERVER_DATE_FORMAT)
+
+
+class TitleIndex:
+    """持久化的 标准化标题 -> (post_id, 创建时间) 索引
+
+    不受 getRecentPosts 300 篇上限影响：由最近文章列表播种，并随每次 newPost 更新；
+    按主键 O(1) 查询，单条 upsert，不再整文件重写。可被多个线程共享。
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(path) if path is not None else ":memory:",
+            check_same_thread=False,
+            isolation_level=None,
         )
-        logger.info(f"已更新发布记录文件: {record_file}")
-        return True
-    except Exception as e:
-        logger.warning(f"写入发布记录文件失败: {record_file} ({e})")
-        return False
+        with self._lock:
+            if path is not None:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS posts ("
+                " title_norm TEXT PRIMARY KEY,"
+                " title TEXT NOT NULL,"
+                " post_id TEXT NOT NULL,"
+                " date_created TEXT,"
+                " updated_at INTEGER NOT NULL)"
+            )
+        if path is not None:
+            self._import_legacy_record(path.with_name(LEGACY_SYNC_RECORD_NAME))
+
+    def _import_legacy_record(self, legacy_file: Path) -> None:
+        if not legacy_file.exists():
+            return
+        try:
+            record = json.loads(legacy_file.read_text(encoding="utf-8"))
+            self.upsert_many((title, post_id, None) for title, post_id in record.items())
+            legacy_file.rename(legacy_file.with_name(legacy_file.name + ".migrated"))
+            logger.info(f"已将旧版发布记录导入标题索引: {legacy_file}（{len(record)} 条）")
+        except Exception as e:
+            logger.warning(f"导入旧版发布记录失败: {legacy_file} ({e})")
+
+    def get(self, title: str) -> str | None:
+        """按标题查询 post_id"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT post_id FROM posts WHERE title_norm = ?", (normalize_title(title),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, title: str, post_id, date_created=None) -> None:
+        self.upsert_many([(title, post_id, date_created)])
+
+    def upsert_many(self, rows) -> int:
+        """批量写入 (标题, post_id, 创建时间)，单个事务完成"""
+        now = int(time.time())
+        values = [
+            (normalize_title(title), normalize_title(title), str(post_id), str(date) if date is not None else None, now)
+            for title, post_id, date in rows
+            if normalize_title(title) and post_id
+        ]
+        if not values:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO posts (title_norm, title, post_id, date_created, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(title_norm) DO UPDATE SET"
+                    " title = excluded.title, post_id = excluded.post_id,"
+                    " date_created = COALESCE(excluded.date_created, posts.date_created),"
+                    " updated_at = excluded.updated_at",
+                    values,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(values)
+
+    def remove(self, title: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM posts WHERE title_norm = ?", (normalize_title(title),))
+
+    def as_dict(self) -> dict[str, str]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT title, post_id FROM posts").fetchall())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
 
 
 # --- 博客园 API 辅助函数 ---
@@ -108,6 +231,16 @@ def get_blog_id(server, username: str, password: str) -> str | None:
         return None
 
 
+# 文章不存在错误的特征文本
+MISSING_POST_FAULT_MARKERS = ("不存在", "not exist", "not found")
+
+
+def is_missing_post_fault(fault) -> bool:
+    """Fault 是否表示文章不存在（已被删除）"""
+    msg = str(fault).lower()
+    return any(marker in msg for marker in MISSING_POST_FAULT_MARKERS)
+
+
 def fetch_recent_posts_map(
     server, blog_id: str, username: str, password: str, limit: int = 300
 ) -> dict[str, str]:
@@ -125,3 +258,461 @@ def fetch_recent_posts_map(
         if title and post_id:
             mapping[title] = post_id
     return mapping
+
+
+# --- XML-RPC 共享客户端（长连接池 + DNS 缓存） ---
+RPC_TIMEOUT_SECONDS = 120
+RPC_POOL_MAX_IDLE = 8
+DNS_CACHE_TTL_SECONDS = 300
+_METHOD_NAME_PATTERN = re.compile(rb"<methodName>\s*([^<\s]+)\s*</methodName>")
+# gzip 请求压缩：auto（每个主机探测一次服务端是否支持）/ on（直接压缩）/ off
+RPC_GZIP_MODE = env_str("CNBLOGS_RPC_GZIP", "auto").lower()
+# 请求体超过该字节数才压缩（小请求压缩收益抵不过开销）
+RPC_GZIP_MIN_BYTES = env_int("CNBLOGS_RPC_GZIP_MIN_BYTES", 2048)
+# 压缩请求被拒绝时的 HTTP 状态码：服务端未处理请求，可以不压缩重发
+GZIP_REJECTED_STATUSES = {400, 411, 415, 501}
+RESPONSE_READ_CHUNK = 64 * 1024
+
+_dns_cache: dict[tuple[str, int], tuple[float, list]] = {}
+_dns_lock = threading.Lock()
+
+
+def resolve_cached(host: str, port: int) -> list:
+    """解析主机地址（带 TTL 缓存），返回 getaddrinfo 结果"""
+    key = (host, port)
+    now = time.monotonic()
+    with _dns_lock:
+        cached = _dns_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+    infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    with _dns_lock:
+        _dns_cache[key] = (now + DNS_CACHE_TTL_SECONDS, infos)
+    return infos
+
+
+def _forget_dns(host: str, port: int) -> None:
+    with _dns_lock:
+        _dns_cache.pop((host, port), None)
+
+
+def _create_connection_cached(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+    """socket.create_connection 的替代：使用缓存的 DNS 结果，全部失败时清除缓存"""
+    host, port = address
+    last_error: OSError | None = None
+    for family, socktype, proto, _, sockaddr in resolve_cached(host, port):
+        sock = None
+        try:
+            sock = socket.socket(family, socktype, proto)
+            if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            last_error = e
+            if sock is not None:
+                sock.close()
+    _forget_dns(host, port)
+    raise last_error or OSError(f"无法连接 {host}:{port}")
+
+
+class _CachedDNSHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _create_connection_cached
+
+
+class _CachedDNSHTTPSConnection(http.client.HTTPSConnection):
+    # 证书校验与 SNI 仍使用原始主机名，仅 TCP 连接走缓存地址
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _create_connection_cached
+
+
+class KeepAliveTransport(xmlrpc.client.Transport):
+    """线程安全的长连接 XML-RPC Transport
+
+    - 按主机维护空闲连接池，请求结束后归还连接（HTTP/1.1 keep-alive）
+    - 复用的连接已被服务端关闭时自动重试一次
+    - 较大的请求体以 gzip 发送（每个主机首次需要时探测服务端是否支持并记住结果），接受 gzip 响应
+    - 记录请求数、新建/复用连接数与压缩节省的字节数，便于确认握手与传输开销是否被消除
+    """
+
+    def __init__(
+        self,
+        use_https: bool = False,
+        timeout: float = RPC_TIMEOUT_SECONDS,
+        max_idle: int = RPC_POOL_MAX_IDLE,
+        gzip_mode: str = RPC_GZIP_MODE,
+        gzip_min_bytes: int = RPC_GZIP_MIN_BYTES,
+    ):
+        super().__init__()
+        self.use_https = use_https
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.gzip_mode = gzip_mode
+        self.gzip_min_bytes = gzip_min_bytes
+        self._ssl_context = ssl.create_default_context() if use_https else None
+        self._idle: dict[str, list[http.client.HTTPConnection]] = {}
+        # 主机 -> 服务端是否接受 gzip 请求（探测结果）
+        self._gzip_support: dict[str, bool] = {}
+        self._probe_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "retries": 0,
+            "errors": 0,
+            "request_bytes_saved": 0,
+            "response_bytes_saved": 0,
+        }
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += amount
+        metrics.current().inc(f"transport_{key}", amount)
+
+    def _acquire(self, host: str) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(host)
+            reused = bool(idle)
+            self.stats["connections_reused" if reused else "connections_opened"] += 1
+            conn = idle.pop() if reused else None
+        metrics.current().inc("transport_connections_reused" if reused else "transport_connections_opened")
+        if conn is not None:
+            return conn, True
+        if self.use_https:
+            conn = _CachedDNSHTTPSConnection(host, timeout=self.timeout, context=self._ssl_context)
+        else:
+            conn = _CachedDNSHTTPConnection(host, timeout=self.timeout)
+        return conn, False
+
+    def _release(self, host: str, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+        if resp.will_close:
+            conn.close()
+            return
+        with self._lock:
+            idle = self._idle.setdefault(host, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _send(self, conn, handler, request_body, extra_headers, compressed=False) -> http.client.HTTPResponse:
+        headers = self._headers + extra_headers
+        if compressed:
+            headers.append(("Content-Encoding", "gzip"))
+        if self.accept_gzip_encoding and xmlrpc.client.gzip:
+            conn.putrequest("POST", handler, skip_accept_encoding=True)
+            headers.append(("Accept-Encoding", "gzip"))
+        else:
+            conn.putrequest("POST", handler)
+        headers.append(("Content-Type", "text/xml"))
+        headers.append(("User-Agent", self.user_agent))
+        self.send_headers(conn, headers)
+        self.send_content(conn, request_body)
+        return conn.getresponse()
+
+    def request(self, host, handler, request_body, verbose=False):
+        """发送请求并按方法记录耗时、请求字节数与结果（见 metrics）
+
+        gzip 能力探测在计时之外进行，其往返单独记为 gzip_probe，不计入触发探测的方法。
+        """
+        chost, extra_headers, _ = self.get_host_info(host)
+        compress = self._should_compress(chost, handler, extra_headers, len(request_body))
+        match = _METHOD_NAME_PATTERN.search(request_body[:512])
+        method = match.group(1).decode("ascii", "replace") if match else "unknown"
+        return self._timed(
+            method,
+            len(request_body),
+            lambda: self._request(chost, handler, request_body, extra_headers, compress, verbose),
+        )
+
+    def _timed(self, method: str, size: int, call: Callable):
+        started = time.monotonic()
+        outcome = "error"
+        profiling.rpc_enter()
+        try:
+            result = call()
+            outcome = "ok"
+            return result
+        except xmlrpc.client.Fault:
+            outcome = "fault"
+            raise
+        finally:
+            profiling.rpc_exit()
+            metrics.current().observe_rpc(method, time.monotonic() - started, size, outcome)
+
+    def _request(self, chost, handler, request_body, extra_headers, compress: bool, verbose=False):
+        if not compress:
+            return self._request_once(chost, handler, request_body, extra_headers, verbose)
+        compressed_body = xmlrpc.client.gzip_encode(request_body)
+        try:
+            result = self._request_once(chost, handler, compressed_body, extra_headers, verbose, compressed=True)
+        except xmlrpc.client.ProtocolError as e:
+            if e.errcode not in GZIP_REJECTED_STATUSES:
+                raise
+            # 服务端在处理前拒绝了压缩请求：记住结果并以原始请求重发
+            self._set_gzip_support(chost, False, f"HTTP {e.errcode}")
+            return self._request_once(chost, handler, request_body, extra_headers, verbose)
+        self._count("request_bytes_saved", len(request_body) - len(compressed_body))
+        return result
+
+    def _should_compress(self, chost: str, handler: str, extra_headers, size: int) -> bool:
+        if self.gzip_mode == "off" or size < self.gzip_min_bytes:
+            return False
+        supported = self._gzip_support.get(chost)
+        if self.gzip_mode == "on":
+            return supported is not False
+        if supported is not None:
+            return supported
+        with self._probe_lock:
+            if chost not in self._gzip_support:
+                self._probe_gzip(chost, handler, extra_headers)
+        return self._gzip_support[chost]
+
+    def _probe_gzip(self, chost: str, handler: str, extra_headers) -> None:
+        """分别以原始与 gzip 编码发送同一个无副作用请求（system.listMethods）：
+
+        结果一致（同为成功，或同样的 Fault）说明服务端正确解压了请求体；否则视为不支持。
+        """
+        body = xmlrpc.client.dumps((), "system.listMethods").encode("utf-8")
+
+        def outcome(request_body, compressed):
+            try:
+                return ("ok", self._timed(
+                    "gzip_probe",
+                    len(request_body),
+                    lambda: self._request_once(chost, handler, request_body, extra_headers, compressed=compressed),
+                ))
+            except xmlrpc.client.Fault as e:
+                return ("fault", e.faultCode, e.faultString)
+
+        try:
+            plain = outcome(body, False)
+        except Exception as e:
+            self._set_gzip_support(chost, False, f"探测请求失败: {e}")
+            return
+        try:
+            encoded = outcome(xmlrpc.client.gzip_encode(body), True)
+        except Exception as e:
+            self._set_gzip_support(chost, False, str(e))
+            return
+        if encoded == plain:
+            self._set_gzip_support(chost, True)
+        else:
+            self._set_gzip_support(chost, False, "压缩请求的响应与原始请求不一致")
+
+    def _set_gzip_support(self, chost: str, supported: bool, reason: str = "") -> None:
+        with self._lock:
+            self._gzip_support[chost] = supported
+        if supported:
+            logger.info(f"🗜️ {chost} 支持 gzip 请求压缩，超过 {self.gzip_min_bytes} 字节的请求将压缩发送")
+        else:
+            logger.info(f"ℹ️ {chost} 不支持 gzip 请求压缩，改为原样发送（{reason}）")
+
+    def _request_once(self, chost, handler, request_body, extra_headers, verbose=False, compressed=False):
+        self._count("requests")
+        for attempt in (0, 1):
+            conn, reused = self._acquire(chost)
+            try:
+                resp = self._send(conn, handler, request_body, extra_headers, compressed)
+            except (ConnectionError, http.client.BadStatusLine):
+                conn.close()
+                # 空闲连接可能已被服务端关闭：换新连接重试一次
+                if reused and attempt == 0:
+                    self._count("retries")
+                    continue
+                self._count("errors")
+                raise
+            except Exception:
+                conn.close()
+                self._count("errors")
+                raise
+
+            try:
+                if resp.status != 200:
+                    if resp.getheader("content-length", ""):
+                        resp.read()
+                    raise xmlrpc.client.ProtocolError(
+                        chost + handler, resp.status, resp.reason, dict(resp.getheaders())
+                    )
+                self.verbose = verbose
+                result = self.parse_response(resp)
+            except xmlrpc.client.Fault:
+                # Fault 响应已完整读取，连接仍可复用
+                self._release(chost, conn, resp)
+                raise
+            except Exception:
+                conn.close()
+                self._count("errors")
+                raise
+            self._release(chost, conn, resp)
+            return result
+
+    def parse_response(self, response):
+        """解析响应（按 64KB 分块喂给解析器）；gzip 响应记录节省的字节数"""
+        stream = response
+        compressed_size = None
+        if response.getheader("Content-Encoding", "") == "gzip":
+            compressed = response.read()
+            compressed_size = len(compressed)
+            stream = gzip.GzipFile(mode="rb", fileobj=io.BytesIO(compressed))
+        parser, unmarshaller = self.getparser()
+        decoded_size = 0
+        while True:
+            data = stream.read(RESPONSE_READ_CHUNK)
+            if not data:
+                break
+            decoded_size += len(data)
+            parser.feed(data)
+        parser.close()
+        if compressed_size is not None:
+            stream.close()
+            self._count("response_bytes_saved", decoded_size - compressed_size)
+        return unmarshaller.close()
+
+    def close(self):
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle.clear()
+        for idle in pools:
+            for conn in idle:
+                conn.close()
+
+
+_shared_transports: dict[str, KeepAliveTransport] = {}
+_rpc_clients: dict[str, xmlrpc.client.ServerProxy] = {}
+_rpc_clients_lock = threading.Lock()
+
+
+def get_rpc_client(rpc_url: str) -> xmlrpc.client.ServerProxy:
+    """获取共享的 XML-RPC 客户端：同一 URL 复用同一代理，同一协议共享连接池（按主机分池）"""
+    with _rpc_clients_lock:
+        client = _rpc_clients.get(rpc_url)
+        if client is None:
+            scheme = urlparse(rpc_url).scheme.lower()
+            transport = _shared_transports.get(scheme)
+            if transport is None:
+                transport = KeepAliveTransport(use_https=(scheme == "https"))
+                _shared_transports[scheme] = transport
+            client = xmlrpc.client.ServerProxy(rpc_url, transport=transport)
+            _rpc_clients[rpc_url] = client
+        return client
+
+
+def rpc_transport_stats() -> dict[str, int]:
+    """汇总所有共享 Transport 的连接统计"""
+    totals = {
+        "requests": 0,
+        "connections_opened": 0,
+        "connections_reused": 0,
+        "retries": 0,
+        "errors": 0,
+        "request_bytes_saved": 0,
+        "response_bytes_saved": 0,
+    }
+    with _rpc_clients_lock:
+        transports = list(_shared_transports.values())
+    for transport in transports:
+        with transport._lock:
+            for key, value in transport.stats.items():
+                totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def log_rpc_stats() -> None:
+    stats = rpc_transport_stats()
+    if not stats["requests"]:
+        return
+    logger.info(
+        f"🔌 RPC 连接统计：请求 {stats['requests']} 次，新建连接 {stats['connections_opened']}，"
+        f"复用 {stats['connections_reused']}，重试 {stats['retries']}，错误 {stats['errors']}"
+    )
+    # 节省的字节数按本次运行统计（常驻进程中 Transport 的累计值跨越多次运行）
+    counters = metrics.current().counters
+    request_saved = counters.get("transport_request_bytes_saved", 0)
+    response_saved = counters.get("transport_response_bytes_saved", 0)
+    if request_saved or response_saved:
+        logger.info(
+            f"🗜️ gzip 本次节省：请求 {request_saved / 1024:.1f} KB，响应 {response_saved / 1024:.1f} KB"
+        )
+
+
+# --- system.multicall 批量调用 ---
+# 每个 multicall 请求包含的调用数上限
+MULTICALL_MAX_CALLS = 100
+# 端点不支持 multicall 时逐个调用的并发数
+MULTICALL_FALLBACK_WORKERS = 4
+
+# RPC 地址 -> 端点是否支持 system.multicall（探测结果）
+_multicall_support: dict[str, bool] = {}
+_multicall_lock = threading.Lock()
+
+
+def _multicall_results(raw_results) -> list:
+    results = []
+    for entry in raw_results:
+        if isinstance(entry, dict):
+            results.append(xmlrpc.client.Fault(entry.get("faultCode"), entry.get("faultString")))
+        elif isinstance(entry, list) and len(entry) == 1:
+            results.append(entry[0])
+        else:
+            raise ValueError(f"无法识别的 multicall 结果: {entry!r}")
+    return results
+
+
+def call_batch(rpc_url: str, calls: list[tuple[str, tuple]], max_calls: int = MULTICALL_MAX_CALLS) -> list:
+    """批量执行互不依赖的调用：calls 为 [(方法名, 参数元组)]，返回一一对应的结果，出错的调用对应 xmlrpc.client.Fault
+
+    端点支持 system.multicall 时每 max_calls 个调用只需一次往返；首次使用时探测并按 RPC 地址记住结果，
+    不支持时透明回退为逐个（并发）调用。连接错误等非 Fault 异常照常抛出。
+    只用于读取等幂等调用：multicall 整体被拒绝时会逐个重发。
+    """
+    server = get_rpc_client(rpc_url)
+    results: list = []
+    for start in range(0, len(calls), max(1, max_calls)):
+        chunk = calls[start:start + max(1, max_calls)]
+        batched = None
+        if _multicall_support.get(rpc_url, True) and len(chunk) > 1:
+            batched = _call_multicall(rpc_url, server, chunk)
+        if batched is None:
+            batched = _call_individually(server, chunk)
+        results.extend(batched)
+    return results
+
+
+def _call_multicall(rpc_url: str, server, calls: list[tuple[str, tuple]]) -> list | None:
+    """以一次 system.multicall 执行；端点不支持时记住结果并返回 None"""
+    multicall = xmlrpc.client.MultiCall(server)
+    for method, args in calls:
+        getattr(multicall, method)(*args)
+    try:
+        raw_results = multicall().results
+    except (xmlrpc.client.Fault, xmlrpc.client.ProtocolError) as e:
+        with _multicall_lock:
+            _multicall_support[rpc_url] = False
+        logger.info(f"ℹ️ RPC 端点不支持 system.multicall，改为逐个调用（{e}）")
+        return None
+    with _multicall_lock:
+        first_success = rpc_url not in _multicall_support
+        _multicall_support[rpc_url] = True
+    if first_success:
+        logger.info("📦 RPC 端点支持 system.multicall，只读调用将合并发送")
+    metrics.current().inc("multicall_batched_calls", len(calls))
+    return _multicall_results(raw_results)
+
+
+def _call_individually(server, calls: list[tuple[str, tuple]]) -> list:
+    def call_one(call):
+        method, args = call
+        try:
+            return getattr(server, method)(*args)
+        except xmlrpc.client.Fault as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MULTICALL_FALLBACK_WORKERS, len(calls)))) as executor:
+        return list(executor.map(call_one, calls))
@@ -0,0 +1,242 @@
+# dedup.py
+# 按轮规划去重：每轮基于一次文章快照计算完整的删除计划，有界并发执行删除并批量确认；
+# 删除后重新拉取（更早的重复文章会滑入 300 篇窗口），直到某轮没有删除任何文章或列表未达到 300 篇上限
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from .common import SERVER_TZ, logger, normalize_title
+
+# 并发删除的线程数
+DELETE_WORKERS = 4
+# 完整去重的最大轮数，以及两轮之间等待服务端生效的秒数
+DEDUP_MAX_ROUNDS = 50
+DEDUP_ROUND_DELAY = 2
+
+
+def get_dedup_plan_path(repo_root: Path | None = None) -> Path:
+    """获取去重计划（DRY_RUN 输出）文件路径"""
+    if repo_root is None:
+        repo_root = Path.cwd().resolve()
+    return (repo_root / ".cnblogs_sync" / "dedup_plan.json").resolve()
+
+
+def try_parse_date(date_value) -> datetime | None:
+    """解析日期值为服务端时区（北京时间）下不带时区的 datetime；缺失或无法解析时返回 None"""
+    if date_value is None or date_value == '':
+        return None
+    try:
+        if isinstance(date_value, datetime):
+            parsed = date_value
+        elif hasattr(date_value, "timetuple"):
+            # xmlrpc.client.DateTime
+            parsed = datetime(*date_value.timetuple()[:6])
+        else:
+            parsed = None
+            if isinstance(date_value, str):
+                for fmt in ['%Y%m%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%S%z']:
+                    try:
+                        parsed = datetime.strptime(date_value, fmt)
+                        break
+                    except ValueError:
+                        continue
+            if parsed is None:
+                parsed = datetime.fromisoformat(str(date_value))
+    except Exception:
+        return None
+    if parsed.tzinfo is not None:
+        # 带时区的值换算到服务端时区，避免与不带时区的值无法比较
+        parsed = parsed.astimezone(SERVER_TZ).replace(tzinfo=None)
+    return parsed
+
+
+def parse_date(date_value):
+    """解析日期值，返回 datetime 对象用于比较；无法解析时返回 1970-01-01"""
+    return try_parse_date(date_value) or datetime(1970, 1, 1)
+
+
+def format_date(date_value) -> str:
+    """格式化日期字符串用于显示"""
+    parsed = try_parse_date(date_value)
+    if parsed is None:
+        return str(date_value) if date_value else "未知"
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def post_created(post: dict):
+    return post.get('dateCreated', post.get('pubDate', ''))
+
+
+def _post_id_key(post: dict) -> int:
+    try:
+        return int(post.get('postid', 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def find_duplicates(posts: list[dict]) -> dict[str, list[dict]]:
+    """找出重复的文章，按标准化标题分组（同一 post_id 只计一次）"""
+    title_groups = defaultdict(list)
+    seen_ids = set()
+    for post in posts:
+        post_id = post.get('postid')
+        if post_id is not None:
+            if str(post_id) in seen_ids:
+                continue
+            seen_ids.add(str(post_id))
+        title = normalize_title(post.get('title', ''))
+        if title:
+            title_groups[title].append(post)
+    return {title: group for title, group in title_groups.items() if len(group) > 1}
+
+
+class DedupPlan:
+    """去重计划：每个重复标题保留一篇，其余全部删除"""
+
+    def __init__(self, keep_latest: bool = True):
+        self.keep_latest = keep_latest
+        self.total_posts = 0
+        # 标题 -> 保留的文章
+        self.keep: dict[str, dict] = {}
+        # [(标题, 要删除的文章)]，按标题分组、组内由旧到新
+        self.delete: list[tuple[str, dict]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.delete)
+
+    def to_dict(self) -> dict:
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "keep_latest": self.keep_latest,
+            "total_posts": self.total_posts,
+            "duplicate_titles": len(self.keep),
+            "delete_count": len(self.delete),
+            "groups": [
+                {
+                    "title": title,
+                    "keep": {"postid": str(post.get('postid')), "dateCreated": format_date(post_created(post))},
+                    "delete": [
+                        {"postid": str(p.get('postid')), "dateCreated": format_date(post_created(p))}
+                        for t, p in self.delete
+                        if t == title
+                    ],
+                }
+                for title, post in self.keep.items()
+            ],
+        }
+
+    def write_json(self, path: Path) -> bool:
+        """原子写入计划 JSON"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logger.warning(f"写入去重计划失败: {path} ({e})")
+            return False
+
+
+def build_dedup_plan(posts: list[dict], keep_latest: bool = True) -> DedupPlan:
+    """根据一次快照计算完整的删除计划
+
+    每组按创建时间排序（时间相同再按 post_id），保留最新（或最早）的一篇；
+    创建时间缺失或无法解析的文章无论保留方向都排在最后，优先被删除。
+    """
+    plan = DedupPlan(keep_latest)
+    plan.total_posts = len(posts)
+    duplicates = find_duplicates(posts)
+    for title in sorted(duplicates, key=lambda t: len(duplicates[t]), reverse=True):
+        dated = [(try_parse_date(post_created(p)), p) for p in duplicates[title]]
+        group = [p for _, p in sorted(
+            ((created, p) for created, p in dated if created is not None),
+            key=lambda item: (item[0], _post_id_key(item[1])),
+            reverse=keep_latest,
+        )]
+        group.extend(sorted((p for created, p in dated if created is None), key=_post_id_key, reverse=keep_latest))
+        plan.keep[title] = group[0]
+        plan.delete.extend((title, post) for post in reversed(group[1:]))
+    return plan
+
+
+def delete_post(server, post_id, username: str, password: str) -> bool:
+    """删除指定文章（使用 blogger.deletePost）"""
+    try:
+        logger.debug(f"调用删除接口: blogger.deletePost, postid='{post_id}'")
+        result = server.blogger.deletePost('', post_id, username, password, True)
+        if result is True:
+            return True
+        logger.error(f"      ❌ Post ID {post_id}: 接口返回 False，删除失败")
+        return False
+    except Exception as e:
+        logger.error(f"      ❌ Post ID {post_id}: 接口调用失败: {type(e).__name__}: {e}")
+        return False
+
+
+def execute_dedup_plan(
+    server,
+    plan: DedupPlan,
+    username: str,
+    password: str,
+    workers: int = DELETE_WORKERS,
+    delay: float = 0,
+) -> tuple[list[str], list[str]]:
+    """有界并发执行删除计划，返回 (已删除的 post_id, 删除失败的 post_id)"""
+    deleted: list[str] = []
+    failed: list[str] = []
+    lock = threading.Lock()
+
+    def delete_one(item: tuple[str, dict]) -> None:
+        title, post = item
+        post_id = str(post.get('postid'))
+        ok = delete_post(server, post_id, username, password)
+        with lock:
+            (deleted if ok else failed).append(post_id)
+            done = len(deleted) + len(failed)
+        if ok:
+            logger.info(f"   🗑️  [{done}/{len(plan.delete)}] 已删除: Post ID {post_id} ({title})")
+        if delay > 0:
+            time.sleep(delay)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        list(executor.map(delete_one, plan.delete))
+    return deleted, failed
+
+
+def log_dedup_plan(plan: DedupPlan, show_details: bool = False) -> None:
+    """输出去重计划统计"""
+    duplicate_posts = len(plan.delete) + len(plan.keep)
+    logger.info("=" * 80)
+    logger.info("📊 文章统计信息")
+    logger.info("=" * 80)
+    logger.info(f"总文章数: {plan.total_posts} 篇")
+    logger.info(f"不重复文章: {plan.total_posts - len(plan.delete)} 篇")
+    logger.info(f"重复标题数: {len(plan.keep)} 个")
+    logger.info(f"重复文章总数: {duplicate_posts} 篇")
+    logger.info(f"将删除文章数: {len(plan.delete)} 篇")
+    if not plan:
+        return
+
+    logger.info("=" * 80)
+    logger.info("📋 重复标题详细列表（按重复数量排序）")
+    logger.info("=" * 80)
+    delete_by_title = defaultdict(list)
+    for title, post in plan.delete:
+        delete_by_title[title].append(post)
+    for idx, (title, keep_post) in enumerate(plan.keep.items(), 1):
+        to_delete = delete_by_title[title]
+        logger.info(f"{idx:3d}. [{len(to_delete) + 1} 篇重复] {title}")
+        logger.info(
+            f"     ✓ 保留: Post ID {keep_post.get('postid')} "
+            f"(创建时间: {format_date(post_created(keep_post))})"
+        )
+        shown = to_delete if show_details else to_delete[:5]
+        logger.info(f"     🗑️  删除: {', '.join(str(p.get('postid', 'N/A')) for p in shown)}"
+                    + (" ..." if len(shown) < len(to_delete) else ""))
@@ -0,0 +1,409 @@
+# engine.py
+# 进程内编排 API：SyncEngine / DedupEngine 共享同一个 RPC 客户端、博客 ID 与远端文章快照，
+# 编排脚本在同一进程内依次调用，无需为每个阶段重新启动解释器、加载 .env 与握手
+
+import os
+import time
+import xmlrpc.client
+from contextlib import contextmanager
+from pathlib import Path
+
+from .common import (
+    logger,
+    call_batch,
+    env_int,
+    env_str,
+    get_blog_id,
+    get_rpc_client,
+    get_sync_record_path,
+    is_missing_post_fault,
+    TitleIndex,
+)
+from .dedup import (
+    DEDUP_MAX_ROUNDS,
+    DEDUP_ROUND_DELAY,
+    DELETE_WORKERS,
+    DedupPlan,
+    build_dedup_plan,
+    execute_dedup_plan,
+    get_dedup_plan_path,
+    log_dedup_plan,
+)
+from .inventory import INVENTORY_TTL_SECONDS, RECENT_POSTS_LIMIT, RemoteInventory, get_inventory_path
+from . import metrics
+
+
+@contextmanager
+def working_directory(path: Path):
+    """临时切换工作目录（同步脚本按工作目录解析相对路径）"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+class EngineContext:
+    """各阶段共享的运行上下文：仓库目录、凭据、RPC 客户端、博客 ID 与远端文章快照
+
+    常驻进程可跨多次运行复用同一个上下文；仓库目录或凭据变化时（见 key）应改建新的上下文。
+    """
+
+    def __init__(self, repo_root: Path | str, rpc_url: str | None = None, username: str | None = None,
+                 password: str | None = None):
+        self.repo_root = Path(repo_root).expanduser().resolve()
+        self.rpc_url = rpc_url or env_str("CNBLOGS_RPC_URL")
+        self.username = username or env_str("CNBLOGS_USERNAME")
+        self.password = password or env_str("CNBLOGS_TOKEN")
+        self.blog_id: str | None = None
+        self.inventory: RemoteInventory | None = None
+        self.inventory_ttl = env_int("CNBLOGS_INVENTORY_TTL", INVENTORY_TTL_SECONDS)
+
+    @property
+    def key(self) -> tuple:
+        return self.repo_root, self.rpc_url, self.username, self.password
+
+    def missing_vars(self) -> list[str]:
+        missing = []
+        if not self.rpc_url:
+            missing.append("CNBLOGS_RPC_URL")
+        if not self.username:
+            missing.append("CNBLOGS_USERNAME")
+        if not self.password:
+            missing.append("CNBLOGS_TOKEN")
+        return missing
+
+    @property
+    def server(self):
+        return get_rpc_client(self.rpc_url)
+
+    def ensure_blog_id(self) -> str | None:
+        if not self.blog_id:
+            self.blog_id = get_blog_id(self.server, self.username, self.password)
+        return self.blog_id
+
+    def load_inventory(self) -> RemoteInventory:
+        """优先使用内存中的快照，否则从磁盘读取"""
+        if self.inventory is None:
+            self.inventory = RemoteInventory.load(get_inventory_path(self.repo_root))
+        return self.inventory
+
+
+class SyncEngine:
+    """同步阶段：在进程内执行 sync_to_cnblogs.main，并把博客 ID 与远端文章快照写回上下文"""
+
+    def __init__(self, context: EngineContext):
+        self.context = context
+        self.exit_code: int | None = None
+        self.elapsed = 0.0
+
+    def run(self, argv: list[str] | None = None) -> int:
+        from . import sync_to_cnblogs as sync
+
+        ctx = self.context
+        sync.RPC_URL = ctx.rpc_url
+        sync.USERNAME = ctx.username
+        sync.PASSWORD = ctx.password
+        sync.REPO_ROOT = ctx.repo_root
+        # 上下文失效（凭据或工作区变化）后重新获取博客 ID，不沿用模块里上一次的值
+        sync.BLOG_ID = ctx.blog_id
+
+        started = time.monotonic()
+        with working_directory(ctx.repo_root):
+            self.exit_code = sync.main(list(argv or []))
+        self.elapsed = time.monotonic() - started
+
+        ctx.blog_id = sync.BLOG_ID or ctx.blog_id
+        if sync.REMOTE_INVENTORY.path is not None:
+            ctx.inventory = sync.REMOTE_INVENTORY
+        return self.exit_code
+
+
+class DedupResult:
+    """去重结果"""
+
+    def __init__(self):
+        self.skipped = False
+        self.plan: DedupPlan | None = None
+        self.deleted: list[str] = []
+        self.failed: list[str] = []
+        # 实际执行删除的轮数
+        self.rounds = 0
+        self.elapsed = 0.0
+
+    def summary(self) -> str:
+        if self.skipped:
+            return "本次同步未新建文章，跳过"
+        if self.plan is None or not self.plan:
+            return "无重复文章"
+        text = f"删除 {len(self.deleted)} 篇重复文章"
+        if self.rounds > 1:
+            text += f"（{self.rounds} 轮）"
+        if self.failed:
+            text += f"，失败 {len(self.failed)} 篇"
+        return text
+
+
+class DedupEngine:
+    """去重阶段：一次快照 → 完整删除计划 → 并发删除 → 批量确认；删除后重新拉取，直到没有重复文章
+
+    删除较新的重复文章后，更早的重复文章会滑入 getRecentPosts 的 300 篇窗口，因此完整拉取按轮重复，
+    直到没有重复、本轮没有删除任何文章，或远端文章不足 300 篇（窗口外已没有更早的文章）。
+
+    上下文中的远端文章快照未过期时直接复用（不调用 getUsersBlogs/getRecentPosts），
+    只检查本次同步新建的标题，删除前批量确认计划中的文章仍然存在；本次同步未新建文章时直接跳过，
+    有文章被删除时转为上述完整拉取。
+    确认均为 getPost，经 system.multicall 合并为一次往返（端点不支持时回退为逐个调用）。
+    """
+
+    def __init__(
+        self,
+        context: EngineContext,
+        keep_latest: bool = True,
+        dry_run: bool = False,
+        show_details: bool = False,
+        workers: int = DELETE_WORKERS,
+        delay: float = 0,
+        max_rounds: int = DEDUP_MAX_ROUNDS,
+        round_delay: float = DEDUP_ROUND_DELAY,
+    ):
+        self.context = context
+        self.keep_latest = keep_latest
+        self.dry_run = dry_run
+        self.show_details = show_details
+        self.workers = workers
+        self.delay = delay
+        self.max_rounds = max(1, max_rounds)
+        self.round_delay = round_delay
+
+    def fetch_posts(self) -> list[dict]:
+        """获取最近文章（getRecentPosts API 极限是 300 篇，不支持分页）"""
+        ctx = self.context
+        logger.info(f"📥 开始获取文章列表（请求 {RECENT_POSTS_LIMIT} 篇，API 极限是 300 篇）...")
+        try:
+            posts = ctx.server.metaWeblog.getRecentPosts(ctx.blog_id, ctx.username, ctx.password, RECENT_POSTS_LIMIT)
+        except Exception as e:
+            logger.error(f"获取文章时出错: {e}")
+            return []
+
+        all_posts = []
+        seen_ids = set()
+        for post in posts or []:
+            post_id = post.get('postid')
+            if post_id and post_id not in seen_ids:
+                all_posts.append(post)
+                seen_ids.add(post_id)
+        if posts:
+            logger.info(f"  ✓ API 返回 {len(posts)} 篇文章，去重后 {len(all_posts)} 篇")
+            if len(posts) >= RECENT_POSTS_LIMIT:
+                logger.warning("  ⚠️ 注意：返回了 300 篇文章（API 极限），可能还有更早的文章未获取")
+        else:
+            logger.info("  ℹ️ 未获取到任何文章")
+        return all_posts
+
+    def update_title_index(self, plan: DedupPlan) -> None:
+        """把每组保留的文章写回本地标题索引"""
+        title_index = TitleIndex(get_sync_record_path(self.context.repo_root))
+        try:
+            title_index.upsert_many(
+                (title, post.get('postid'), post.get('dateCreated'))
+                for title, post in plan.keep.items()
+            )
+        finally:
+            title_index.close()
+
+    def check_posts(self, post_ids: list[str]) -> dict[str, bool]:
+        """批量查询文章是否仍存在（post_id -> 是否存在）；无法确认的文章不出现在结果中"""
+        ctx = self.context
+        calls = [("metaWeblog.getPost", (post_id, ctx.username, ctx.password)) for post_id in post_ids]
+        try:
+            results = call_batch(ctx.rpc_url, calls)
+        except Exception as e:
+            logger.warning(f"批量确认文章状态失败: {e}")
+            return {}
+        status = {}
+        for post_id, result in zip(post_ids, results):
+            if not isinstance(result, xmlrpc.client.Fault):
+                status[post_id] = True
+            elif is_missing_post_fault(result):
+                status[post_id] = False
+            else:
+                logger.warning(f"  ⚠️ 无法确认 Post ID {post_id} 的状态: {result}")
+        return status
+
+    def verify_snapshot(self, posts: list[dict]) -> list[dict]:
+        """删除前确认快照中的文章仍存在，返回仍存在（或无法确认）的文章
+
+        快照可能落后于远端：保留的文章若已被手动删除，按旧计划执行会把该标题的文章全部删掉。
+        """
+        post_ids = [str(post.get('postid')) for post in posts]
+        status = self.check_posts(post_ids)
+        missing = [post_id for post_id in post_ids if status.get(post_id) is False]
+        if missing:
+            logger.warning(f"⚠️ 快照中有 {len(missing)} 篇文章在远端已不存在，已从计划中排除: {', '.join(missing)}")
+            self.context.inventory.remove_posts(missing)
+        else:
+            logger.info(f"  ✓ 已确认计划中的 {len(post_ids)} 篇文章仍存在")
+        return [post for post in posts if status.get(str(post.get('postid'))) is not False]
+
+    def verify(self, deleted_ids: list[str]) -> list[str]:
+        """删除后批量确认，返回仍然存在的 post_id"""
+        logger.info("=" * 80)
+        logger.info("🔍 验证去重结果...")
+        status = self.check_posts(deleted_ids)
+        still_present = [post_id for post_id in deleted_ids if status.get(post_id)]
+        confirmed = sum(1 for post_id in deleted_ids if status.get(post_id) is False)
+        if still_present:
+            logger.warning(f"⚠️ 有 {len(still_present)} 篇已删除的文章仍可查询到（可能是服务端延迟）: {', '.join(still_present)}")
+        if confirmed == len(deleted_ids):
+            logger.info(f"✅ 已确认 {confirmed} 篇重复文章均已删除")
+        else:
+            logger.info(f"  ✓ 已确认删除 {confirmed}/{len(deleted_ids)} 篇")
+        return still_present
+
+    def run(self, full: bool = False) -> DedupResult:
+        """执行去重；full=True 时忽略快照，对最近 300 篇做完整去重。获取博客 ID 失败时抛出 RuntimeError
+
+        结束时写出运行指标（component=dedup）。
+        """
+        started = time.monotonic()
+        result = DedupResult()
+        run_metrics = metrics.start_run("dedup")
+        run_metrics.step_started(1, "去重")
+        exit_code = 1
+        try:
+            self._run(result, full)
+            exit_code = 0 if not result.failed else 3
+        finally:
+            result.elapsed = time.monotonic() - started
+            run_metrics.step_finished(1, "skipped" if result.skipped else ("ok" if exit_code == 0 else "failed"))
+            run_metrics.outcomes.update(deleted=len(result.deleted), delete_failed=len(result.failed))
+            if result.plan is not None:
+                run_metrics.set_gauge("dedup_posts_scanned", result.plan.total_posts)
+                run_metrics.set_gauge("dedup_duplicate_titles", len(result.plan.keep))
+            run_metrics.finish(exit_code)
+            self.write_metrics(run_metrics)
+        return result
+
+    def write_metrics(self, run_metrics: metrics.RunMetrics) -> None:
+        metrics_dir = metrics.get_metrics_dir(self.context.repo_root)
+        try:
+            run_metrics.write(metrics_dir)
+        except OSError as e:
+            logger.warning(f"写入运行指标失败: {metrics_dir} ({e})")
+
+    def _run(self, result: DedupResult, full: bool) -> None:
+        ctx = self.context
+        inventory = ctx.load_inventory()
+        if not full and inventory.is_fresh(ctx.inventory_ttl, ctx.blog_id):
+            ctx.blog_id = ctx.blog_id or inventory.blog_id
+            created_titles = inventory.created_titles()
+            if not created_titles:
+                logger.info(f"🗃️ 远端文章快照（{int(inventory.age())}s 前）显示本次同步未新建文章，跳过去重")
+                result.skipped = True
+                return
+            all_posts = [post for post in inventory.posts if post['title'] in created_titles]
+            logger.info(
+                f"🗃️ 复用 {int(inventory.age())}s 前的远端文章快照，"
+                f"仅检查本次同步新建的 {len(created_titles)} 个标题"
+            )
+            snapshot_plan = build_dedup_plan(all_posts, self.keep_latest)
+            if snapshot_plan:
+                planned = {str(post.get('postid')) for post in snapshot_plan.keep.values()}
+                planned.update(str(post.get('postid')) for _, post in snapshot_plan.delete)
+                verified = self.verify_snapshot([post for post in all_posts if str(post.get('postid')) in planned])
+                verified_ids = {str(post.get('postid')) for post in verified}
+                all_posts = [
+                    post for post in all_posts
+                    if str(post.get('postid')) not in planned or str(post.get('postid')) in verified_ids
+                ]
+            deleted = self._dedup_round(result, inventory, all_posts)
+            if not deleted:
+                return
+            # 删除后更早的重复文章可能进入 300 篇窗口，快照里没有它们：改为完整拉取继续
+            logger.info("🔄 已删除重复文章，改为完整拉取最近文章继续检查")
+            self._wait_next_round()
+
+        if not ctx.ensure_blog_id():
+            raise RuntimeError("无法获取博客ID")
+        inventory_path = get_inventory_path(ctx.repo_root)
+        for round_num in range(1, self.max_rounds + 1):
+            if round_num > 1:
+                logger.info(f"🔄 第 {round_num} 轮去重")
+            all_posts = self.fetch_posts()
+            inventory = RemoteInventory.from_posts(inventory_path, ctx.blog_id, all_posts)
+            if not all_posts:
+                logger.info("ℹ️ 没有找到任何文章。")
+                return
+            if not self.dry_run:
+                inventory.save()
+                ctx.inventory = inventory
+            deleted = self._dedup_round(result, inventory, all_posts)
+            if not deleted:
+                return
+            if not inventory.truncated:
+                # 远端文章不足 300 篇，已全部在窗口内，再拉取也不会出现更早的重复文章
+                return
+            if round_num < self.max_rounds:
+                self._wait_next_round()
+        logger.warning(f"⚠️ 已达到最大轮数限制（{self.max_rounds} 轮），停止迭代，下次运行时继续处理")
+
+    def _wait_next_round(self) -> None:
+        if self.round_delay > 0:
+            logger.info(f"⏳ 等待 {self.round_delay:g} 秒后开始下一轮...")
+            time.sleep(self.round_delay)
+
+    def _dedup_round(self, result: DedupResult, inventory: RemoteInventory, all_posts: list[dict]) -> list[str]:
+        """对一份文章列表执行一轮去重（计划 → 删除 → 批量确认），返回本轮删除的 post_id"""
+        ctx = self.context
+        keep_label = '最新' if self.keep_latest else '最早'
+        plan = build_dedup_plan(all_posts, self.keep_latest)
+        if result.plan is None or not result.plan:
+            result.plan = plan
+        log_dedup_plan(plan, self.show_details)
+        if not plan:
+            logger.info("✅ 没有发现重复文章！")
+            if not self.dry_run:
+                inventory.clear_created()
+                inventory.save()
+            return []
+
+        logger.info("=" * 60)
+        if self.dry_run:
+            plan_path = get_dedup_plan_path(ctx.repo_root)
+            if plan.write_json(plan_path):
+                logger.info(f"📝 [模拟模式] 删除计划已写入: {plan_path}")
+            logger.info("📊 [模拟模式] 统计:")
+            logger.info(f"   - 将保留: {len(plan.keep)} 篇文章（每组保留1篇{keep_label}的）")
+            logger.info(f"   - 将删除: {len(plan.delete)} 篇重复文章")
+            logger.info("💡 提示: 将 DRY_RUN 设置为 False 后重新运行以实际执行删除")
+            logger.info(f"ℹ️ DRY_RUN=true：未更新本地标题索引: {get_sync_record_path(ctx.repo_root)}")
+            logger.info("=" * 60)
+            return []
+
+        logger.info(f"🔍 开始删除 {len(plan.delete)} 篇重复文章（并发 {self.workers}）...")
+        self.update_title_index(plan)
+        delete_started = time.monotonic()
+        deleted, failed = execute_dedup_plan(
+            ctx.server, plan, ctx.username, ctx.password, workers=self.workers, delay=self.delay
+        )
+        result.deleted.extend(deleted)
+        result.failed.extend(failed)
+        result.rounds += 1
+
+        logger.info("=" * 60)
+        logger.info("📊 统计:")
+        logger.info(f"   - 已保留: {len(plan.keep)} 篇文章（每组保留1篇{keep_label}的）")
+        logger.info(f"   - 已删除: {len(deleted)} 篇重复文章")
+        if failed:
+            logger.warning(f"   - 删除失败: {len(failed)} 篇: {', '.join(failed)}")
+        logger.info(f"   - 耗时: {time.monotonic() - delete_started:.1f}s")
+        logger.info("=" * 60)
+
+        still_present = set(self.verify(deleted))
+        inventory.remove_posts(post_id for post_id in deleted if post_id not in still_present)
+        inventory.clear_created()
+        ctx.inventory = inventory
+        ctx.inventory.save()
+        return deleted
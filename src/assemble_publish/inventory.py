@@ -0,0 +1,186 @@
+# inventory.py
+# 远端文章清单快照：同步阶段写入（博客 ID、标题、post_id、创建时间、正文中的渲染指纹与本次新建的文章），
+# 去重阶段直接复用，快照过期（超过 TTL）时才重新调用 getRecentPosts
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from .common import logger, normalize_title
+from .manifest import extract_fingerprint_marker
+
+# 快照有效期（秒）
+INVENTORY_TTL_SECONDS = 900
+# getRecentPosts 的 API 极限
+RECENT_POSTS_LIMIT = 300
+
+
+def get_inventory_path(repo_root: Path | None = None) -> Path:
+    """获取远端文章快照文件路径"""
+    if repo_root is None:
+        repo_root = Path.cwd().resolve()
+    return (repo_root / ".cnblogs_sync" / ".cnblogs_inventory.json").resolve()
+
+
+def _post_entry(title, post_id, date_created, fingerprint=None) -> dict:
+    entry = {
+        "postid": str(post_id),
+        "title": normalize_title(title),
+        "dateCreated": str(date_created) if date_created is not None else None,
+    }
+    if fingerprint:
+        entry["fingerprint"] = fingerprint
+    return entry
+
+
+class RemoteInventory:
+    """远端文章快照（不含正文）；可被多个发布线程共享"""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self.blog_id: str | None = None
+        self.fetched_at = 0.0
+        # 快照是否已达到 getRecentPosts 的 300 篇上限（更早的文章不在快照内）
+        self.truncated = False
+        # 同步运行进行中（中途崩溃时快照不可信）
+        self.in_progress = False
+        self.posts: list[dict] = []
+        # 最近一次同步运行新建的文章
+        self.created: list[dict] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path) -> "RemoteInventory":
+        inventory = cls(path)
+        if not path.exists():
+            return inventory
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"加载远端文章快照失败: {path} ({e})")
+            return inventory
+        inventory.blog_id = data.get("blog_id")
+        inventory.fetched_at = float(data.get("fetched_at") or 0)
+        inventory.truncated = bool(data.get("truncated"))
+        inventory.in_progress = bool(data.get("in_progress"))
+        inventory.posts = [p for p in data.get("posts") or [] if isinstance(p, dict)]
+        inventory.created = [p for p in data.get("created") or [] if isinstance(p, dict)]
+        return inventory
+
+    @classmethod
+    def from_posts(cls, path: Path | None, blog_id, posts) -> "RemoteInventory":
+        """由 getRecentPosts 的返回构建快照（丢弃正文，只保留其中的渲染指纹标记）"""
+        inventory = cls(path)
+        inventory.blog_id = str(blog_id) if blog_id is not None else None
+        inventory.fetched_at = time.time()
+        inventory.truncated = len(posts or []) >= RECENT_POSTS_LIMIT
+        seen = set()
+        for post in posts or []:
+            post_id = post.get("postid")
+            title = post.get("title", "")
+            if not post_id or not normalize_title(title) or str(post_id) in seen:
+                continue
+            seen.add(str(post_id))
+            inventory.posts.append(_post_entry(
+                title,
+                post_id,
+                post.get("dateCreated", post.get("pubDate")),
+                extract_fingerprint_marker(post.get("description")),
+            ))
+        return inventory
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def is_fresh(self, ttl: float = INVENTORY_TTL_SECONDS, blog_id: str | None = None) -> bool:
+        """快照存在、未过期、不是崩溃遗留，且属于同一博客"""
+        if not self.fetched_at or self.in_progress or not self.blog_id:
+            return False
+        if blog_id is not None and str(blog_id) != self.blog_id:
+            return False
+        return 0 <= self.age() <= ttl
+
+    def posts_map(self) -> dict[str, str]:
+        """标题 -> post_id（同名时以列表中靠前的、即较新的为准）"""
+        with self._lock:
+            mapping: dict[str, str] = {}
+            for post in reversed(self.posts):
+                mapping[post["title"]] = post["postid"]
+            return mapping
+
+    def fingerprints_map(self) -> dict[str, str]:
+        """标题 -> 远端正文中的渲染指纹（与 posts_map 取同一篇；该篇没有标记时不出现）"""
+        with self._lock:
+            mapping: dict[str, str | None] = {}
+            for post in reversed(self.posts):
+                mapping[post["title"]] = post.get("fingerprint")
+            return {title: fingerprint for title, fingerprint in mapping.items() if fingerprint}
+
+    def set_fingerprint(self, post_id, fingerprint: str | None) -> None:
+        """更新远端文章的渲染指纹；None 表示远端内容未知（例如 editPost 结果不确定）"""
+        post_id = str(post_id)
+        with self._lock:
+            for post in self.posts:
+                if post["postid"] == post_id:
+                    if fingerprint:
+                        post["fingerprint"] = fingerprint
+                    else:
+                        post.pop("fingerprint", None)
+
+    def begin_run(self) -> None:
+        """同步运行开始：清空上次的新建记录并标记进行中"""
+        with self._lock:
+            self.created = []
+            self.in_progress = True
+
+    def finish_run(self) -> None:
+        with self._lock:
+            self.in_progress = False
+
+    def record_created(self, title, post_id, date_created=None, fingerprint=None) -> None:
+        """记录本次运行新建的文章（同时加入快照）"""
+        entry = _post_entry(title, post_id, date_created, fingerprint)
+        with self._lock:
+            if all(p["postid"] != entry["postid"] for p in self.posts):
+                self.posts.insert(0, entry)
+            self.created.append(entry)
+
+    def remove_posts(self, post_ids) -> None:
+        ids = {str(p) for p in post_ids}
+        if not ids:
+            return
+        with self._lock:
+            self.posts = [p for p in self.posts if p["postid"] not in ids]
+            self.created = [p for p in self.created if p["postid"] not in ids]
+
+    def clear_created(self) -> None:
+        with self._lock:
+            self.created = []
+
+    def created_titles(self) -> set[str]:
+        with self._lock:
+            return {p["title"] for p in self.created}
+
+    def save(self) -> bool:
+        if self.path is None:
+            return True
+        with self._lock:
+            payload = {
+                "blog_id": self.blog_id,
+                "fetched_at": self.fetched_at,
+                "truncated": self.truncated,
+                "in_progress": self.in_progress,
+                "posts": list(self.posts),
+                "created": list(self.created),
+            }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            logger.warning(f"写入远端文章快照失败: {self.path} ({e})")
+            return False
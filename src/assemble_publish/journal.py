@@ -0,0 +1,113 @@
+# journal.py
+# 发布日志（只追加 + fsync）：每次 RPC 前写入意图、完成后写入结果，
+# 进程中途被重启时据此恢复已创建文章的 post_id，避免重复创建
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from .common import logger
+
+
+def get_journal_path(repo_root: Path | None = None) -> Path:
+    """获取发布日志文件路径"""
+    if repo_root is None:
+        repo_root = Path.cwd().resolve()
+    return (repo_root / ".cnblogs_sync" / ".cnblogs_publish_journal.jsonl").resolve()
+
+
+class JournalReplay:
+    """日志回放结果"""
+
+    def __init__(self):
+        # 标题 -> {"result", "post_id", "fingerprint", "ts"}（最后一次成功的结果；ts 为写入结果时的 Unix 时间）
+        self.completed: dict[str, dict] = {}
+        # 写入了意图但没有结果的标题 -> {"action", "post_id"}
+        self.pending: dict[str, dict] = {}
+        # 上次运行是否未正常结束（正常结束时日志会被清空）
+        self.interrupted = False
+
+
+class PublishJournal:
+    """只追加的发布日志；每条记录写入后立即 fsync"""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def replay(self) -> JournalReplay:
+        """读取现有日志；损坏的行（例如写入一半时断电）直接忽略"""
+        state = JournalReplay()
+        if self.path is None or not self.path.exists():
+            return state
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    op = record.get("op")
+                    title = record.get("title")
+                    if op == "begin":
+                        state.interrupted = True
+                    elif op == "intent" and title:
+                        state.pending[title] = {"action": record.get("action"), "post_id": record.get("post_id")}
+                    elif op == "outcome" and title:
+                        state.pending.pop(title, None)
+                        if record.get("result") in {"created", "updated"} and record.get("post_id"):
+                            state.completed[title] = {
+                                "result": record["result"],
+                                "post_id": str(record["post_id"]),
+                                "fingerprint": record.get("fingerprint"),
+                                "ts": record.get("ts"),
+                            }
+        except OSError as e:
+            logger.warning(f"读取发布日志失败: {self.path} ({e})")
+        return state
+
+    def _append(self, record: dict) -> None:
+        if self.path is None:
+            return
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "ab")
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def begin(self) -> None:
+        self._append({"op": "begin", "ts": int(time.time())})
+
+    def intent(self, title: str, action: str, post_id=None) -> None:
+        """RPC 之前写入：将要对 title 执行 create/edit"""
+        self._append({"op": "intent", "title": title, "action": action, "post_id": post_id})
+
+    def outcome(self, title: str, result: str, post_id=None, fingerprint: str | None = None) -> None:
+        """RPC 之后写入：结果与 post_id"""
+        self._append({
+            "op": "outcome",
+            "title": title,
+            "result": result,
+            "post_id": str(post_id) if post_id is not None else None,
+            "fingerprint": fingerprint,
+            "ts": int(time.time()),
+        })
+
+    def complete(self) -> None:
+        """运行正常结束：其余状态已落盘到清单/台账，压缩（清空）日志"""
+        if self.path is None:
+            return
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            try:
+                self.path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"清理发布日志失败: {self.path} ({e})")
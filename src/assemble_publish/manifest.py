@@ -0,0 +1,159 @@
+# manifest.py
+# 发布清单：按标题记录最终渲染内容的指纹与 post_id，内容未变化时跳过 editPost
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable
+
+from .common import logger
+
+# 清单格式版本；渲染逻辑变化时递增，使旧清单整体失效
+MANIFEST_VERSION = 1
+# 并行计算指纹的线程数上限（发布流水线读取阶段的默认线程数）
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+# 嵌入在发布内容末尾的渲染指纹标记（HTML 注释，页面上不可见），远端正文即可说明其内容版本
+FINGERPRINT_MARKER_PATTERN = re.compile(r"<!-- cnblogs-sync:fingerprint=([0-9a-f]{64}) -->\s*$")
+# 只在正文末尾查找标记
+FINGERPRINT_MARKER_WINDOW = 256
+
+
+def get_manifest_path(repo_root: Path | None = None) -> Path:
+    """获取发布清单文件路径"""
+    if repo_root is None:
+        repo_root = Path.cwd().resolve()
+    return (repo_root / ".cnblogs_sync" / ".cnblogs_publish_manifest.json").resolve()
+
+
+def template_signature(*templates: str) -> str:
+    """根据渲染模板（知识库 URL、站内搜索 URL 等）生成签名，模板变化即清单失效"""
+    digest = hashlib.sha256(f"v{MANIFEST_VERSION}".encode("utf-8"))
+    for template in templates:
+        digest.update(b"\0")
+        digest.update(template.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def fingerprint_text(text: str) -> str:
+    """计算最终渲染内容的指纹"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def fingerprint_marker(fingerprint: str) -> str:
+    """生成追加在发布内容末尾的指纹标记"""
+    return f"\r\n\r\n<!-- cnblogs-sync:fingerprint={fingerprint} -->"
+
+
+def extract_fingerprint_marker(text) -> str | None:
+    """从发布内容（本地渲染结果或远端 description）末尾取出指纹标记；没有标记时返回 None"""
+    if not isinstance(text, str):
+        return None
+    match = FINGERPRINT_MARKER_PATTERN.search(text[-FINGERPRINT_MARKER_WINDOW:])
+    return match.group(1) if match else None
+
+
+def fingerprint_file(filepath: str, prefix: str, transform: Callable[[str], str]) -> str:
+    """逐行流式计算 prefix + transform(文件内容) 的指纹，内存占用与文件大小无关
+
+    transform 必须是逐行无关的变换（例如不跨行的正则替换），
+    这样逐行处理的结果与整篇处理完全一致。
+    """
+    digest = hashlib.sha256(prefix.encode("utf-8"))
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            digest.update(transform(line).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PublishManifest:
+    """持久化发布清单：标题 -> {fingerprint, post_id}"""
+
+    def __init__(self, path: Path | None = None, signature: str = ""):
+        self.path = path
+        self.signature = signature
+        self._entries: dict[str, dict[str, str]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path, signature: str) -> "PublishManifest":
+        """加载清单；文件不存在、损坏或模板签名不一致时返回空清单"""
+        manifest = cls(path, signature)
+        if not path.exists():
+            return manifest
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"加载发布清单失败: {path} ({e})")
+            return manifest
+        if data.get("signature") != signature:
+            logger.info("ℹ️ 渲染模板已变化，发布清单失效，本次将重新比对全部文章")
+            manifest._dirty = True
+            return manifest
+        for title, entry in (data.get("entries") or {}).items():
+            if isinstance(entry, dict) and entry.get("fingerprint") and entry.get("post_id"):
+                manifest._entries[title] = {
+                    "fingerprint": str(entry["fingerprint"]),
+                    "post_id": str(entry["post_id"]),
+                }
+        return manifest
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, title: str) -> bool:
+        return title in self._entries
+
+    def get(self, title: str) -> dict[str, str] | None:
+        with self._lock:
+            entry = self._entries.get(title)
+            return dict(entry) if entry else None
+
+    def is_unchanged(
+        self, title: str, fingerprint: str, remote_post_id: str | None = None, missing_remotely: bool = False
+    ) -> bool:
+        """指纹一致且（若远端可见）post_id 一致时视为无需更新
+
+        missing_remotely=True 表示完整（未截断）的远端文章列表中没有该标题：文章已在远端被删除，需要重新发布。
+        """
+        entry = self.get(title)
+        if not entry or entry["fingerprint"] != fingerprint or missing_remotely:
+            return False
+        if remote_post_id is not None and str(remote_post_id) != entry["post_id"]:
+            return False
+        return True
+
+    def record(self, title: str, fingerprint: str, post_id) -> None:
+        with self._lock:
+            self._entries[title] = {"fingerprint": fingerprint, "post_id": str(post_id)}
+            self._dirty = True
+
+    def forget(self, title: str) -> None:
+        with self._lock:
+            if self._entries.pop(title, None) is not None:
+                self._dirty = True
+
+    def save(self) -> bool:
+        """原子写入清单（先写临时文件再替换）"""
+        if self.path is None or not self._dirty:
+            return True
+        with self._lock:
+            payload = {"signature": self.signature, "entries": dict(self._entries)}
+            self._dirty = False
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(
+                json.dumps(payload, ensure_ascii=False, separators=(",", ":")),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, self.path)
+            logger.info(f"已更新发布清单: {self.path}（{len(payload['entries'])} 条）")
+            return True
+        except Exception as e:
+            self._dirty = True
+            logger.warning(f"写入发布清单失败: {self.path} ({e})")
+            return False
@@ -0,0 +1,268 @@
+# metrics.py
+# 运行指标：步骤耗时、各 RPC 方法的延迟与请求字节直方图、发布结果与重试/限流计数；
+# 每次运行结束写出 Prometheus textfile（供 node_exporter textfile collector 采集）与 JSON 摘要。
+# 仅依赖标准库，编排脚本在安装依赖之前也能导入。
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+METRIC_PREFIX = "cnblogs_sync"
+# RPC 延迟直方图分桶（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 请求字节直方图分桶
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def get_metrics_dir(repo_root: Path | None = None) -> Path:
+    """指标输出目录：CNBLOGS_METRICS_DIR（例如 node_exporter 的 textfile 目录），默认 .cnblogs_sync/metrics"""
+    configured = os.getenv("CNBLOGS_METRICS_DIR", "").strip()
+    if configured:
+        return Path(configured).expanduser().resolve()
+    if repo_root is None:
+        repo_root = Path.cwd().resolve()
+    return (repo_root / ".cnblogs_sync" / "metrics").resolve()
+
+
+class Histogram:
+    """累积分桶直方图（Prometheus 语义）"""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q: float) -> float | None:
+        """按分桶上界估算分位数（超出最大分桶时返回观测到的最大值）"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, cumulative in zip(self.buckets, self.counts):
+            if cumulative >= rank:
+                return bound
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "max": round(self.max, 6),
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class RunMetrics:
+    """一次运行的指标；可被多个线程共享"""
+
+    def __init__(self, component: str = "sync"):
+        self.component = component
+        self.started_at = time.time()
+        self._started = time.monotonic()
+        self.duration: float | None = None
+        self.exit_code: int | None = None
+        # 步骤序号 -> {"name", "status", "seconds"}
+        self.steps: dict[int, dict] = {}
+        self._step_started: dict[int, float] = {}
+        # RPC 方法 -> 延迟 / 请求字节直方图与失败计数
+        self.rpc_latency: dict[str, Histogram] = {}
+        self.rpc_bytes: dict[str, Histogram] = {}
+        self.rpc_failures: Counter = Counter()
+        # 发布结果：created / updated / skipped / failed / missing
+        self.outcomes: Counter = Counter()
+        # 事件计数：publish_retries / throttles / timeouts / transport_* 等
+        self.counters: Counter = Counter()
+        self.gauges: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def step_started(self, index: int, name: str) -> None:
+        with self._lock:
+            self._step_started[index] = time.monotonic()
+            self.steps[index] = {"name": name, "status": "running", "seconds": None}
+
+    def step_finished(self, index: int, status: str) -> None:
+        """记录步骤结束（status: ok / skipped / failed）"""
+        with self._lock:
+            started = self._step_started.pop(index, None)
+            step = self.steps.setdefault(index, {"name": str(index), "status": status, "seconds": None})
+            step["status"] = status
+            if started is not None:
+                step["seconds"] = time.monotonic() - started
+
+    def observe_rpc(self, method: str, seconds: float, request_bytes: int, outcome: str = "ok") -> None:
+        """记录一次 RPC：耗时、请求体字节数与结果（ok / fault / error）"""
+        with self._lock:
+            self.rpc_latency.setdefault(method, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.rpc_bytes.setdefault(method, Histogram(BYTES_BUCKETS)).observe(request_bytes)
+            if outcome != "ok":
+                self.rpc_failures[(method, outcome)] += 1
+
+    def record_outcome(self, outcome: str) -> None:
+        with self._lock:
+            self.outcomes[outcome] += 1
+
+    def inc(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    def finish(self, exit_code: int) -> None:
+        with self._lock:
+            self.exit_code = exit_code
+            self.duration = time.monotonic() - self._started
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "component": self.component,
+                "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+                "duration_seconds": round(self.duration, 3) if self.duration is not None else None,
+                "exit_code": self.exit_code,
+                "steps": [
+                    {
+                        "index": index,
+                        "name": step["name"],
+                        "status": step["status"],
+                        "seconds": round(step["seconds"], 3) if step["seconds"] is not None else None,
+                    }
+                    for index, step in sorted(self.steps.items())
+                ],
+                "rpc": {
+                    method: {
+                        "latency_seconds": histogram.to_dict(),
+                        "request_bytes": self.rpc_bytes[method].to_dict(),
+                        "faults": self.rpc_failures.get((method, "fault"), 0),
+                        "errors": self.rpc_failures.get((method, "error"), 0),
+                    }
+                    for method, histogram in sorted(self.rpc_latency.items())
+                },
+                "outcomes": dict(self.outcomes),
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+            }
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式（所有序列带 component 标签）"""
+        p = METRIC_PREFIX
+        base = {"component": self.component}
+        lines: list[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+
+        def sample(name: str, labels: dict, value) -> None:
+            lines.append(f"{p}_{name}{_format_labels({**base, **labels})} {_format_value(value)}")
+
+        def histogram(name: str, labels: dict, hist: Histogram) -> None:
+            for bound, cumulative in zip(hist.buckets, hist.counts):
+                sample(f"{name}_bucket", {**labels, "le": _format_value(bound)}, cumulative)
+            sample(f"{name}_bucket", {**labels, "le": "+Inf"}, hist.count)
+            sample(f"{name}_sum", labels, hist.sum)
+            sample(f"{name}_count", labels, hist.count)
+
+        with self._lock:
+            family("run_timestamp_seconds", "gauge", "Unix time the run started")
+            sample("run_timestamp_seconds", {}, self.started_at)
+            if self.duration is not None:
+                family("run_duration_seconds", "gauge", "Wall time of the run")
+                sample("run_duration_seconds", {}, self.duration)
+            if self.exit_code is not None:
+                family("run_exit_code", "gauge", "Exit code of the run (0 ok, 3 partial, 1 failed)")
+                sample("run_exit_code", {}, self.exit_code)
+
+            if self.steps:
+                family("step_duration_seconds", "gauge", "Wall time of each step")
+                for index, step in sorted(self.steps.items()):
+                    if step["seconds"] is not None:
+                        sample(
+                            "step_duration_seconds",
+                            {"step": str(index), "name": step["name"], "status": step["status"]},
+                            step["seconds"],
+                        )
+
+            if self.rpc_latency:
+                family("rpc_duration_seconds", "histogram", "XML-RPC call latency by method")
+                for method, hist in sorted(self.rpc_latency.items()):
+                    histogram("rpc_duration_seconds", {"method": method}, hist)
+                family("rpc_request_bytes", "histogram", "XML-RPC request body size by method (bytes sent per post for newPost/editPost)")
+                for method, hist in sorted(self.rpc_bytes.items()):
+                    histogram("rpc_request_bytes", {"method": method}, hist)
+            if self.rpc_failures:
+                family("rpc_failures_total", "counter", "Failed XML-RPC calls by method and kind (fault / error)")
+                for (method, kind), count in sorted(self.rpc_failures.items()):
+                    sample("rpc_failures_total", {"method": method, "kind": kind}, count)
+
+            family("posts_total", "counter", "Publish outcomes of the run")
+            for outcome in sorted(set(self.outcomes) | {"created", "updated", "skipped", "failed", "missing"}):
+                sample("posts_total", {"outcome": outcome}, self.outcomes.get(outcome, 0))
+            if self.counters:
+                family("events_total", "counter", "Retries, throttles, timeouts and transport events of the run")
+                for name, count in sorted(self.counters.items()):
+                    sample("events_total", {"event": name}, count)
+            for name, value in sorted(self.gauges.items()):
+                family(name, "gauge", name.replace("_", " "))
+                sample(name, {}, value)
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: Path) -> list[Path]:
+        """原子写入 <component>.prom 与 <component>.json，返回写出的文件；失败时抛出 OSError"""
+        directory.mkdir(parents=True, exist_ok=True)
+        written = []
+        for path, text in (
+            (directory / f"{self.component}.prom", self.to_prometheus()),
+            (directory / f"{self.component}.json", json.dumps(self.to_dict(), ensure_ascii=False, indent=2)),
+        ):
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_text(text, encoding="utf-8")
+            os.replace(tmp_path, path)
+            written.append(path)
+        return written
+
+
+def _format_labels(labels: dict) -> str:
+    escaped = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return repr(round(value, 6)) if value != int(value) else str(int(value)) + ".0"
+    return str(value)
+
+
+# 当前运行的指标（RPC Transport 等底层代码上报到这里）
+_current = RunMetrics()
+
+
+def start_run(component: str) -> RunMetrics:
+    """开始新一次运行并设为当前运行"""
+    global _current
+    _current = RunMetrics(component)
+    return _current
+
+
+def current() -> RunMetrics:
+    return _current
@@ -0,0 +1,150 @@
+# pipeline.py
+# 有界队列串联的多阶段流水线：每个阶段由若干工作线程处理，阶段之间用有界队列连接。
+#
+# 下游处理不过来时上游阻塞在 put 上（背压），在途条目数不超过各队列容量之和加工作线程数，
+# 因此内存占用与输入总量无关；各阶段并行运行，读文件、渲染与网络等待相互重叠。
+# 仅依赖标准库。
+
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+# 默认队列容量（每个阶段之间）
+DEFAULT_QUEUE_SIZE = 8
+
+# 队列结束标记
+_DONE = object()
+
+
+class Stage:
+    """流水线中的一个阶段：func 把一个条目变换为下一阶段的条目（每个输入恰好产出一个输出）
+
+    func 抛出异常时由 on_error(条目, 异常) 产出该条目的输出（例如标记为失败），保证每个输入都流到末端。
+    """
+
+    def __init__(self, name: str, func: Callable, workers: int = 1, on_error: Callable | None = None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.on_error = on_error
+        self.processed = 0
+        # 各工作线程执行 func 的累计时间与等待上游条目的累计时间（秒）
+        self.busy_seconds = 0.0
+        self.idle_seconds = 0.0
+        # 输出队列观测到的最大深度
+        self.max_queue_depth = 0
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "workers": self.workers,
+                "processed": self.processed,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "idle_seconds": round(self.idle_seconds, 3),
+                "max_queue_depth": self.max_queue_depth,
+            }
+
+
+class Pipeline:
+    """按顺序串联的阶段；run() 以生成器形式产出最后一个阶段的输出（顺序不保证与输入一致）
+
+    阶段的 func 抛出异常时交给该阶段的 on_error 产出输出；未设置 on_error（或 on_error 本身出错）时
+    该条目被丢弃，其余条目照常处理，全部结束后由 run() 重新抛出第一个异常。
+    """
+
+    def __init__(self, stages: list[Stage], queue_size: int = DEFAULT_QUEUE_SIZE):
+        if not stages:
+            raise ValueError("流水线至少需要一个阶段")
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self._error: BaseException | None = None
+        self._error_lock = threading.Lock()
+
+    def run(self, items: Iterable) -> Iterator:
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]), name="pipeline-feed", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[index], queues[index + 1], remaining),
+                    name=f"pipeline-{stage.name}-{worker}",
+                    daemon=True,
+                ))
+        for thread in threads:
+            thread.start()
+
+        output = queues[-1]
+        while True:
+            item = output.get()
+            if item is _DONE:
+                break
+            yield item
+        for thread in threads:
+            thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def stats(self) -> list[dict]:
+        return [stage.stats() for stage in self.stages]
+
+    def _record_error(self, error: BaseException) -> None:
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+
+    def _handle_error(self, stage: Stage, item, error: Exception):
+        if stage.on_error is None:
+            self._record_error(error)
+            return _DONE
+        try:
+            return stage.on_error(item, error)
+        except BaseException as e:
+            self._record_error(e)
+            return _DONE
+
+    def _feed(self, items: Iterable, output: queue.Queue) -> None:
+        try:
+            for item in items:
+                output.put(item)
+        except BaseException as e:
+            self._record_error(e)
+        finally:
+            output.put(_DONE)
+
+    def _work(self, stage: Stage, source: queue.Queue, output: queue.Queue, remaining: list[int]) -> None:
+        while True:
+            waited = time.monotonic()
+            item = source.get()
+            started = time.monotonic()
+            if item is _DONE:
+                # 结束标记放回，让同阶段的其他线程也能看到；最后一个线程通知下游
+                source.put(_DONE)
+                with stage._lock:
+                    stage.idle_seconds += started - waited
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    output.put(_DONE)
+                return
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                result = self._handle_error(stage, item, e)
+            except BaseException as e:
+                self._record_error(e)
+                result = _DONE
+            finished = time.monotonic()
+            with stage._lock:
+                stage.processed += 1
+                stage.busy_seconds += finished - started
+                stage.idle_seconds += started - waited
+            if result is not _DONE:
+                output.put(result)
+                depth = output.qsize()
+                with stage._lock:
+                    stage.max_queue_depth = max(stage.max_queue_depth, depth)
@@ -0,0 +1,347 @@
+# profiling.py
+# 按需性能剖析：CNBLOGS_PROFILE=cprofile|sample（或命令行 --profile[=模式]）开启。
+#
+# - cprofile：cProfile（含发布线程）+ tracemalloc 峰值与分配最多的代码位置，开销较大，适合排查单次慢运行
+# - sample：后台线程定时采样各线程调用栈（折叠栈格式，可直接生成火焰图），开销低，适合常驻调度进程
+#
+# 两种模式都会统计墙钟时间、CPU 时间与阻塞在 RPC 上的时间，产物写入 .cnblogs_sync/profile/<时间>-<组件>/。
+# 仅依赖标准库，编排脚本在安装依赖之前也能导入。
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_ENV = "CNBLOGS_PROFILE"
+PROFILE_MODES = ("cprofile", "sample")
+# 采样间隔（秒），可用 CNBLOGS_PROFILE_INTERVAL_MS 调整
+DEFAULT_SAMPLE_INTERVAL = 0.02
+# 每个组件保留的剖析产物份数
+KEEP_PROFILES = 10
+TRACEMALLOC_FRAMES = 5
+TOP_ENTRIES = 30
+
+# 需要单独汇总的耗时类别：(文件名, 函数名)，按 cProfile 累计时间统计
+HOTSPOTS = {
+    "scan": [("scanner.py", "iter_markdown_files"), ("scanner.py", "sort_by_mtime")],
+    "render": [("sync_to_cnblogs.py", "render_post_body"), ("sync_to_cnblogs.py", "fingerprint_markdown_file")],
+    "xml_marshal": [("client.py", "dumps")],
+    "xml_parse": [("client.py", "parse_response")],
+}
+
+
+def get_profile_dir(repo_root: Path | None = None) -> Path:
+    """剖析产物根目录"""
+    if repo_root is None:
+        repo_root = Path.cwd().resolve()
+    return (repo_root / ".cnblogs_sync" / "profile").resolve()
+
+
+def normalize_mode(value: str | None) -> str | None:
+    """把开关值规范为 cprofile / sample；关闭或无法识别时返回 None"""
+    value = (value or "").strip().lower()
+    if value in {"", "0", "off", "false", "no", "none"}:
+        return None
+    if value in {"1", "on", "true", "yes"}:
+        return "cprofile"
+    return value if value in PROFILE_MODES else None
+
+
+def parse_profile_args(argv: list[str]) -> tuple[list[str], str | None]:
+    """从参数中取出 --profile / --profile=模式，返回 (其余参数, 模式)；未指定时读取 CNBLOGS_PROFILE"""
+    rest = []
+    mode = None
+    for arg in argv:
+        if arg == "--profile":
+            mode = "cprofile"
+        elif arg.startswith("--profile="):
+            mode = normalize_mode(arg.split("=", 1)[1])
+        else:
+            rest.append(arg)
+    if mode is None:
+        mode = normalize_mode(os.getenv(PROFILE_ENV))
+    return rest, mode
+
+
+class RpcWaitTracker:
+    """统计阻塞在 RPC 上的时间：blocked 为至少有一个 RPC 在途的墙钟时间，total 为各线程 RPC 耗时之和"""
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.blocked = 0.0
+        self._inflight = 0
+        self._blocked_since = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enter(self) -> None:
+        now = time.monotonic()
+        self._local.started = now
+        with self._lock:
+            if self._inflight == 0:
+                self._blocked_since = now
+            self._inflight += 1
+
+    def exit(self) -> None:
+        started = getattr(self._local, "started", None)
+        if started is None:
+            return
+        self._local.started = None
+        now = time.monotonic()
+        with self._lock:
+            self.calls += 1
+            self.total += now - started
+            self._inflight -= 1
+            if self._inflight == 0:
+                self.blocked += now - self._blocked_since
+
+
+_rpc_tracker: RpcWaitTracker | None = None
+
+
+def rpc_enter() -> None:
+    """RPC 开始（由 KeepAliveTransport 调用；未开启剖析时无开销）"""
+    tracker = _rpc_tracker
+    if tracker is not None:
+        tracker.enter()
+
+
+def rpc_exit() -> None:
+    tracker = _rpc_tracker
+    if tracker is not None:
+        tracker.exit()
+
+
+class StackSampler:
+    """低开销采样：后台线程定时读取 sys._current_frames()，按折叠栈计数"""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def top_functions(self, limit: int = TOP_ENTRIES) -> list[tuple[str, int]]:
+        """按栈顶（自身）采样数排序"""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(limit)
+
+    def write_folded(self, path: Path) -> None:
+        with path.open("w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """一次运行的剖析器；同一时间只允许一个（嵌套开启时内层不生效）"""
+
+    def __init__(self, component: str, mode: str, root_dir: Path, log=print):
+        self.component = component
+        self.mode = mode
+        self.root_dir = root_dir
+        self.log = log
+        self.directory: Path | None = None
+        self.summary: dict = {}
+        self._profiles: list[cProfile.Profile] = []
+        self._sampler: StackSampler | None = None
+        self._tracker = RpcWaitTracker()
+        self._started_tracemalloc = False
+        self._wall_started = 0.0
+        self._cpu_started = 0.0
+
+    def start(self) -> None:
+        global _rpc_tracker
+        _rpc_tracker = self._tracker
+        if self.mode == "cprofile":
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+            main_profile = cProfile.Profile()
+            self._profiles.append(main_profile)
+            if sys.version_info < (3, 12):
+                # 3.12 之前 cProfile 只剖析开启它的线程：为之后创建的线程（发布线程池）各开一个
+                threading.setprofile(self._bootstrap_thread)
+            main_profile.enable()
+        else:
+            interval_ms = os.getenv("CNBLOGS_PROFILE_INTERVAL_MS", "").strip()
+            interval = int(interval_ms) / 1000 if interval_ms.isdigit() and int(interval_ms) > 0 else DEFAULT_SAMPLE_INTERVAL
+            self._sampler = StackSampler(interval)
+            self._sampler.start()
+        self._wall_started = time.monotonic()
+        self._cpu_started = time.process_time()
+
+    def _bootstrap_thread(self, frame, event, arg) -> None:
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        self._profiles.append(profile)
+        profile.enable()
+
+    def stop(self) -> None:
+        global _rpc_tracker
+        wall = time.monotonic() - self._wall_started
+        cpu = time.process_time() - self._cpu_started
+        if self.mode == "cprofile":
+            self._profiles[0].disable()
+            threading.setprofile(None)
+        elif self._sampler is not None:
+            self._sampler.stop()
+        _rpc_tracker = None
+
+        tracker = self._tracker
+        self.summary = {
+            "component": self.component,
+            "mode": self.mode,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(cpu, 3),
+            "rpc_calls": tracker.calls,
+            "rpc_blocked_seconds": round(tracker.blocked, 3),
+            "rpc_thread_seconds": round(tracker.total, 3),
+            "not_blocked_on_rpc_seconds": round(max(0.0, wall - tracker.blocked), 3),
+        }
+        try:
+            self._write_artifacts()
+        except OSError as e:
+            self.log(f"写入剖析结果失败: {self.directory} ({e})")
+            return
+        self.log(
+            f"🔬 剖析（{self.mode}）：墙钟 {wall:.2f}s，CPU {cpu:.2f}s，阻塞在 RPC {tracker.blocked:.2f}s"
+            f"（{tracker.calls} 次调用），结果：{self.directory}"
+        )
+
+    def _write_artifacts(self) -> None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.directory = self.root_dir / f"{stamp}-{self.component}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.mode == "cprofile":
+            # 先取内存快照，避免把汇总 cProfile 结果时的分配计入
+            self._write_tracemalloc()
+            self._write_cprofile()
+        elif self._sampler is not None:
+            self._sampler.write_folded(self.directory / f"{self.component}.folded")
+            self.summary["samples"] = self._sampler.samples
+            self.summary["sample_interval_seconds"] = self._sampler.interval
+            self.summary["top_functions"] = [
+                {"function": name, "samples": count} for name, count in self._sampler.top_functions()
+            ]
+        (self.directory / "summary.json").write_text(
+            json.dumps(self.summary, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        self._prune()
+
+    def _write_cprofile(self) -> None:
+        stats = None
+        for profile in self._profiles:
+            try:
+                profile.create_stats()
+            except Exception:
+                continue
+            if not getattr(profile, "stats", None):
+                continue
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        if stats is None:
+            return
+        stats.dump_stats(str(self.directory / f"{self.component}.pstats"))
+        buffer = io.StringIO()
+        stats.stream = buffer
+        stats.sort_stats("cumulative").print_stats(TOP_ENTRIES)
+        stats.sort_stats("tottime").print_stats(TOP_ENTRIES)
+        (self.directory / f"{self.component}-cprofile.txt").write_text(buffer.getvalue(), encoding="utf-8")
+
+        hotspots = {}
+        for category, targets in HOTSPOTS.items():
+            cumulative = 0.0
+            for (filename, _, funcname), (_, _, _, ct, _) in stats.stats.items():
+                if (os.path.basename(filename), funcname) in targets:
+                    cumulative += ct
+            hotspots[category] = round(cumulative, 3)
+        hotspots["rpc_blocked"] = self.summary["rpc_blocked_seconds"]
+        self.summary["hotspots_seconds"] = hotspots
+
+    def _write_tracemalloc(self) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, cProfile.__file__),
+            ]
+        )
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        top = snapshot.statistics("lineno")[:TOP_ENTRIES]
+        self.summary["tracemalloc_current_bytes"] = current
+        self.summary["tracemalloc_peak_bytes"] = peak
+        self.summary["top_allocations"] = [
+            {"site": str(stat.traceback[0]), "bytes": stat.size, "blocks": stat.count} for stat in top[:10]
+        ]
+        lines = [f"peak={peak} bytes current={current} bytes", ""]
+        lines += [str(stat) for stat in top]
+        (self.directory / f"{self.component}-tracemalloc.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def _prune(self) -> None:
+        """每个组件只保留最近 KEEP_PROFILES 份"""
+        runs = sorted(self.root_dir.glob(f"*-{self.component}"))
+        for old in runs[:-KEEP_PROFILES]:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+_active: Profiler | None = None
+
+
+@contextmanager
+def profile_run(component: str, mode: str | None, root_dir: Path, log=print):
+    """mode 为 None 或已有剖析器在运行时不做任何事"""
+    global _active
+    if mode is None or _active is not None:
+        yield None
+        return
+    profiler = Profiler(component, mode, root_dir, log)
+    _active = profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        try:
+            profiler.stop()
+        finally:
+            _active = None
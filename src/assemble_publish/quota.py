@@ -0,0 +1,170 @@
+# quota.py
+# 跨运行的每日额度台账与积压调度：记录每天已用的新建/更新次数和未完成的文件，
+# 下次运行优先处理积压，并按剩余额度规划本次的新建数量
+
+import json
+import math
+import os
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .common import SERVER_TZ, env_str, logger
+
+# 台账保留的天数
+LEDGER_KEEP_DAYS = 14
+# 每天的计划运行次数（与 run_sync_hourly.py 的 00:00/12:00 一致），用于估算清空积压所需次数
+RUNS_PER_DAY = 2
+# 额度按服务端的自然日重置：“今天”按此时区计算，与运行机器的本地时区无关
+DEFAULT_QUOTA_TZ = "Asia/Shanghai"
+
+
+def load_quota_timezone(name: str):
+    """解析额度时区；无效或系统缺少时区数据时回退为固定的 UTC+8"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        logger.warning(f"无法加载额度时区 '{name}'，改用 UTC+8（{e}）")
+        return SERVER_TZ
+
+
+QUOTA_TZ = load_quota_timezone(env_str("CNBLOGS_QUOTA_TZ", DEFAULT_QUOTA_TZ) or DEFAULT_QUOTA_TZ)
+
+
+def quota_date() -> date:
+    """额度时区下的今天"""
+    return datetime.now(QUOTA_TZ).date()
+
+
+def get_quota_ledger_path(repo_root: Path | None = None) -> Path:
+    """获取额度台账文件路径"""
+    if repo_root is None:
+        repo_root = Path.cwd().resolve()
+    return (repo_root / ".cnblogs_sync" / ".cnblogs_quota_ledger.json").resolve()
+
+
+class QuotaLedger:
+    """每日额度台账：{日期: {created, updated, limit_hit}}、学到的每日新建上限与积压文件列表"""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self.days: dict[str, dict] = {}
+        self.create_limit: int | None = None
+        self.backlog: list[str] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path) -> "QuotaLedger":
+        ledger = cls(path)
+        if not path.exists():
+            return ledger
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"加载额度台账失败: {path} ({e})")
+            return ledger
+        ledger.days = {k: v for k, v in (data.get("days") or {}).items() if isinstance(v, dict)}
+        limit = data.get("create_limit")
+        ledger.create_limit = int(limit) if isinstance(limit, int) and limit > 0 else None
+        ledger.backlog = [str(p) for p in data.get("backlog") or []]
+        return ledger
+
+    @staticmethod
+    def today() -> str:
+        return quota_date().isoformat()
+
+    def _today_entry(self) -> dict:
+        return self.days.setdefault(self.today(), {"created": 0, "updated": 0, "limit_hit": False})
+
+    def record(self, result: str) -> None:
+        """记录一次发布结果（仅统计 created/updated）"""
+        if result not in {"created", "updated"}:
+            return
+        with self._lock:
+            self._today_entry()[result] += 1
+
+    def mark_limit_hit(self) -> None:
+        """当日额度用尽：以今天已新建的数量作为学到的每日上限"""
+        with self._lock:
+            entry = self._today_entry()
+            entry["limit_hit"] = True
+            if entry["created"] > 0:
+                self.create_limit = entry["created"]
+
+    def used_today(self) -> dict:
+        with self._lock:
+            return dict(self._today_entry())
+
+    def remaining_creates(self) -> int | None:
+        """今天剩余的新建额度；尚未学到上限时返回 None（不限制）"""
+        entry = self.used_today()
+        if entry["limit_hit"]:
+            return 0
+        if self.create_limit is None:
+            return None
+        return max(0, self.create_limit - entry["created"])
+
+    def estimate_runs(self, pending_creates: int) -> tuple[int, int] | None:
+        """估算清空积压需要的天数与运行次数；上限未知时返回 None"""
+        if pending_creates <= 0:
+            return 0, 0
+        if not self.create_limit:
+            return None
+        remaining = self.remaining_creates() or 0
+        if pending_creates <= remaining:
+            return 0, 1
+        days = math.ceil((pending_creates - remaining) / self.create_limit)
+        return days, days * RUNS_PER_DAY
+
+    def set_backlog(self, files: list[str]) -> None:
+        with self._lock:
+            self.backlog = list(dict.fromkeys(files))
+
+    def save(self) -> bool:
+        if self.path is None:
+            return True
+        cutoff = (quota_date() - timedelta(days=LEDGER_KEEP_DAYS)).isoformat()
+        with self._lock:
+            payload = {
+                "days": {k: v for k, v in sorted(self.days.items()) if k >= cutoff},
+                "create_limit": self.create_limit,
+                "backlog": list(self.backlog),
+            }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            logger.warning(f"写入额度台账失败: {self.path} ({e})")
+            return False
+
+
+def plan_publish_order(
+    files: list[str],
+    backlog: list[str],
+    is_create: Callable[[str], bool],
+    remaining_creates: int | None,
+) -> tuple[list[str], list[str]]:
+    """规划本次发布顺序：先续跑积压，再处理其余候选；新建数量超出剩余额度的部分延后
+
+    返回 (本次发布列表, 延后的文件列表)。更新不受新建额度限制。
+    """
+    ordered = list(dict.fromkeys([*backlog, *files]))
+    if remaining_creates is None:
+        return ordered, []
+
+    planned: list[str] = []
+    deferred: list[str] = []
+    creates = 0
+    for path in ordered:
+        if is_create(path):
+            if creates >= remaining_creates:
+                deferred.append(path)
+                continue
+            creates += 1
+        planned.append(path)
+    return planned, deferred
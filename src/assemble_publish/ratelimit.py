@@ -0,0 +1,201 @@
+# ratelimit.py
+# 发布限速：所有发布线程共享的令牌桶，以及根据服务端反馈自动调速的 AIMD 限速器
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from .common import logger
+
+
+class TokenBucket:
+    """线程安全的令牌桶：按 rate（次/秒）补充令牌，最多累积 capacity 个
+
+    rate <= 0 表示不限速。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float) -> None:
+        """调整速率（先按旧速率结算已累积的令牌）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def acquire(self, stop_event: threading.Event | None = None) -> bool:
+        """阻塞直到取得一个令牌；等待期间 stop_event 被设置则返回 False"""
+        while True:
+            with self._lock:
+                if self.rate <= 0:
+                    return True
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
+
+
+def get_pacer_state_path(repo_root: Path | None = None) -> Path:
+    """获取自适应限速状态文件路径"""
+    if repo_root is None:
+        repo_root = Path.cwd().resolve()
+    return (repo_root / ".cnblogs_sync" / ".cnblogs_publish_pacer.json").resolve()
+
+
+class AdaptivePacer:
+    """AIMD 自适应限速器：成功时线性加速，节流/超时/慢响应时成倍减速
+
+    内部使用 TokenBucket 控制实际发放速率；减速带冷却期，
+    避免并发中的多个请求对同一次拥塞重复减速。
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        min_rate: float = 0.05,
+        max_rate: float = 5.0,
+        increase_step: float = 0.05,
+        decrease_factor: float = 0.5,
+        slow_seconds: float = 5.0,
+        enabled: bool = True,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max(min_rate, max_rate)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.slow_seconds = slow_seconds
+        self.enabled = enabled and rate > 0
+        # 配置的起始速率：与保存状态时的配置不同时不再沿用上次学到的速率
+        self.configured_rate = float(rate)
+        self.bucket = TokenBucket(self._clamp(rate) if self.enabled else rate, capacity)
+        self._lock = threading.Lock()
+        self._last_decrease = 0.0
+        self._first_acquire: float | None = None
+        self._last_success: float | None = None
+        self.successes = 0
+        self.throttles = 0
+        self.timeouts = 0
+        self.slow_responses = 0
+
+    def reset_run_stats(self) -> None:
+        """开始新一次运行：清零计数与吞吐计时，保留学到的速率（常驻进程跨运行复用同一个限速器）"""
+        with self._lock:
+            self._last_decrease = 0.0
+            self._first_acquire = None
+            self._last_success = None
+            self.successes = 0
+            self.throttles = 0
+            self.timeouts = 0
+            self.slow_responses = 0
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def _clamp(self, rate: float) -> float:
+        return min(self.max_rate, max(self.min_rate, rate))
+
+    def acquire(self, stop_event: threading.Event | None = None) -> bool:
+        with self._lock:
+            if self._first_acquire is None:
+                self._first_acquire = time.monotonic()
+        return self.bucket.acquire(stop_event)
+
+    def _decrease(self, reason: str) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            # 冷却期：至少间隔一个“当前速率下的请求间隔”，且不少于 1 秒
+            if now - self._last_decrease < max(1.0, 1.0 / self.bucket.rate):
+                return
+            self._last_decrease = now
+            old_rate = self.bucket.rate
+            new_rate = self._clamp(old_rate * self.decrease_factor)
+            self.bucket.set_rate(new_rate)
+        logger.warning(f"🐢 {reason}，发布速率 {old_rate:.2f} → {new_rate:.2f} 篇/秒")
+
+    def on_success(self, latency: float) -> None:
+        with self._lock:
+            self.successes += 1
+            self._last_success = time.monotonic()
+        if latency > self.slow_seconds:
+            with self._lock:
+                self.slow_responses += 1
+            self._decrease(f"响应过慢（{latency:.1f}s）")
+            return
+        if self.enabled:
+            # 读取与写回在同一把锁内，避免覆盖并发的减速
+            with self._lock:
+                self.bucket.set_rate(self._clamp(self.bucket.rate + self.increase_step))
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.throttles += 1
+        self._decrease("服务端限流")
+
+    def on_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+        self._decrease("请求超时")
+
+    def effective_posts_per_minute(self) -> float:
+        """从首次申请许可到最近一次成功之间的实际吞吐（篇/分钟）"""
+        with self._lock:
+            if not self.successes or self._first_acquire is None or self._last_success is None:
+                return 0.0
+            elapsed = max(self._last_success - self._first_acquire, 1e-6)
+            return self.successes * 60.0 / elapsed
+
+    def load_state(self, path: Path) -> None:
+        """从上次运行学到的速率热启动；配置的起始速率变化后忽略旧状态，沿用的速率不超过配置的上限"""
+        if not self.enabled or not path.exists():
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            rate = float(data["rate"])
+            configured_rate = data.get("configured_rate")
+        except Exception as e:
+            logger.warning(f"加载限速状态失败: {path} ({e})")
+            return
+        if configured_rate is None or float(configured_rate) != self.configured_rate:
+            logger.info(f"  - 自适应限速：配置的起始速率已变化，忽略上次学到的速率 {rate:.2f} 篇/秒")
+            return
+        with self._lock:
+            self.bucket.set_rate(self._clamp(rate))
+        logger.info(f"  - 自适应限速：沿用上次学到的速率 {self.rate:.2f} 篇/秒")
+
+    def save_state(self, path: Path) -> None:
+        if not self.enabled:
+            return
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(
+                json.dumps({
+                    "rate": round(self.rate, 4),
+                    "configured_rate": self.configured_rate,
+                    "updated_at": int(time.time()),
+                }),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"写入限速状态失败: {path} ({e})")
@@ -0,0 +1,118 @@
+# render_cache.py
+# 渲染结果缓存：按 源文件内容哈希 + 渲染器版本 + 模板 内容寻址，磁盘存储，按总大小 LRU 淘汰
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from .common import logger
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def get_render_cache_dir(repo_root: Path | None = None) -> Path:
+    """获取渲染缓存目录"""
+    if repo_root is None:
+        repo_root = Path.cwd().resolve()
+    return (repo_root / ".cnblogs_sync" / "render_cache").resolve()
+
+
+def render_cache_key(source: str, *parts: str) -> str:
+    """由源文件内容与渲染参数（标题、渲染器版本、模板签名等）计算缓存键"""
+    digest = hashlib.sha256(source.encode("utf-8"))
+    for part in parts:
+        digest.update(b"\0")
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """磁盘渲染缓存；directory 为 None 时不缓存。可被多个线程共享。
+
+    命中时更新文件 mtime，淘汰时按 mtime 从旧到新删除，直到总大小低于上限。
+    """
+
+    def __init__(self, directory: Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.md"
+
+    def get(self, key: str) -> str | None:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            # 按字节读取：put 原样写入字节，文本模式读取会把 \r\n 转换为 \n，导致命中结果与重新渲染不一致
+            body = path.read_bytes().decode("utf-8")
+            os.utime(path)
+        except (OSError, UnicodeDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return body
+
+    def put(self, key: str, body: str) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        data = body.encode("utf-8")
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入渲染缓存失败: {path} ({e})")
+            return
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_total()
+            else:
+                self._total_bytes += len(data)
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob("*/*.md"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _scan_total(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """按最近使用时间淘汰，直到总大小不超过上限的 90%"""
+        if self.directory is None:
+            return
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._total_bytes = total
+        if removed:
+            logger.info(f"🧹 渲染缓存淘汰 {removed} 项，当前约 {total / 1024 / 1024:.1f} MB")
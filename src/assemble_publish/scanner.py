@@ -0,0 +1,234 @@
+# scanner.py
+# Markdown 扫描：基于 os.scandir 的流式遍历，进入目录前即按排除目录与 .gitignore 规则剪枝
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
+
+# 并行 stat 的线程数
+STAT_WORKERS = 16
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """把 gitignore 风格的通配符转换为正则（支持 **、*、?、[...]）"""
+    i = 0
+    out = []
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("(?:/.*)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+class IgnoreRule:
+    """单条 gitignore 规则；base 为规则所在目录（相对扫描根目录，根目录为空串）"""
+
+    def __init__(self, pattern: str, base: str = ""):
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # 含有 “/”（末尾除外）的规则相对所在目录锚定；否则匹配任意层级的文件名
+        self.anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        self.base = base
+        self.regex = re.compile(_glob_to_regex(pattern))
+
+    def matches(self, rel_path: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return False
+            rel_path = rel_path[len(self.base) + 1 :]
+        if self.anchored:
+            return self.regex.fullmatch(rel_path) is not None
+        return self.regex.fullmatch(rel_path.rsplit("/", 1)[-1]) is not None
+
+
+def parse_ignore_file(path: str, base: str = "") -> list[IgnoreRule]:
+    """解析 .gitignore 文件（无法读取时返回空列表）"""
+    rules = []
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for raw_line in f:
+                line = raw_line.rstrip("\n").rstrip()
+                if not line or line.startswith("#"):
+                    continue
+                if line.startswith("\\"):
+                    line = line[1:]
+                rules.append(IgnoreRule(line, base))
+    except OSError:
+        return []
+    return rules
+
+
+def is_ignored(rules: list[IgnoreRule], rel_path: str, is_dir: bool) -> bool:
+    """按 gitignore 语义判断：最后一条匹配的规则生效"""
+    ignored = False
+    for rule in rules:
+        if rule.matches(rel_path, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+
+class ScanCache:
+    """常驻进程在多次扫描之间保留的目录列表缓存
+
+    按目录路径缓存 (目录 mtime, 目录项, .gitignore 规则)；目录 mtime 未变化（没有增删改名）
+    且 .gitignore 未变化时直接复用，不再 scandir。
+    """
+
+    def __init__(self):
+        self._dirs: dict[str, tuple[int, list[tuple[str, str, bool]], tuple | None, list[IgnoreRule]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        self._dirs.clear()
+
+    def __len__(self) -> int:
+        return len(self._dirs)
+
+    def listdir(self, dir_path: str, rel_dir: str, respect_gitignore: bool):
+        """返回 ([(名称, 路径, 是否目录)], 本目录 .gitignore 规则)；目录无法读取时返回 None"""
+        try:
+            mtime = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            self._dirs.pop(dir_path, None)
+            return None
+        ignore_key = None
+        cached = self._dirs.get(dir_path)
+        if cached is not None and respect_gitignore and cached[2] is not None:
+            ignore_key = _file_key(os.path.join(dir_path, ".gitignore"))
+        if cached is not None and cached[0] == mtime and cached[2] == ignore_key:
+            self.hits += 1
+            return cached[1], cached[3]
+
+        self.misses += 1
+        listing = _scan_dir(dir_path)
+        if listing is None:
+            self._dirs.pop(dir_path, None)
+            return None
+        rules: list[IgnoreRule] = []
+        if respect_gitignore and any(name == ".gitignore" for name, _, _ in listing):
+            ignore_path = os.path.join(dir_path, ".gitignore")
+            ignore_key = _file_key(ignore_path)
+            rules = parse_ignore_file(ignore_path, rel_dir)
+        else:
+            ignore_key = None
+        self._dirs[dir_path] = (mtime, listing, ignore_key, rules)
+        return listing, rules
+
+
+def _file_key(path: str) -> tuple | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _scan_dir(dir_path: str) -> list[tuple[str, str, bool]] | None:
+    listing = []
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                listing.append((entry.name, entry.path, is_dir))
+    except OSError:
+        return None
+    listing.sort()
+    return listing
+
+
+def iter_markdown_files(
+    root_dir: str,
+    exclude_dirs: Iterable[str] = (),
+    suffix: str = ".md",
+    respect_gitignore: bool = True,
+    cache: ScanCache | None = None,
+) -> Iterator[str]:
+    """流式遍历 root_dir 下的 Markdown 文件
+
+    排除目录与被 .gitignore 忽略的目录在进入前剪枝，不会遍历其内容；
+    各级目录中的 .gitignore 对其子树生效。传入 cache 时复用未变化目录的列表。
+    """
+    exclude = set(exclude_dirs)
+    root_dir = os.path.abspath(root_dir)
+    stack: list[tuple[str, str, list[IgnoreRule]]] = [(root_dir, "", [])]
+    while stack:
+        dir_path, rel_dir, rules = stack.pop()
+        if cache is not None:
+            result = cache.listdir(dir_path, rel_dir, respect_gitignore)
+            if result is None:
+                continue
+            entries, own_rules = result
+            if own_rules:
+                rules = rules + own_rules
+        else:
+            entries = _scan_dir(dir_path)
+            if entries is None:
+                continue
+            if respect_gitignore and any(name == ".gitignore" for name, _, _ in entries):
+                rules = rules + parse_ignore_file(os.path.join(dir_path, ".gitignore"), rel_dir)
+
+        subdirs = []
+        for name, path, is_dir in entries:
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if is_dir:
+                if name in exclude or (rules and is_ignored(rules, rel_path, True)):
+                    continue
+                subdirs.append((path, rel_path, rules))
+            elif name.endswith(suffix):
+                if rules and is_ignored(rules, rel_path, False):
+                    continue
+                yield path
+        # 逆序压栈，保证按名称顺序深度优先遍历
+        stack.extend(reversed(subdirs))
+
+
+def sort_by_mtime(paths: Iterable[str], workers: int = STAT_WORKERS) -> list[str]:
+    """并行获取修改时间，按 (mtime, 路径) 倒序排序（最新优先）"""
+
+    def mtime_key(path: str) -> tuple[float, str]:
+        try:
+            return os.stat(path).st_mtime, path
+        except OSError:
+            return 0.0, path
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        keyed = list(executor.map(mtime_key, paths))
+    keyed.sort(reverse=True)
+    return [path for _, path in keyed]
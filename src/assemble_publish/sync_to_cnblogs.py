@@ -11,13 +11,16 @@
 #   - CNBLOGS_USERNAME: 用户名（必需）
 #   - CNBLOGS_TOKEN: Token（必需）
 #
-# 【无状态说明】
-# - 不写入任何本地记录/状态文件
-# - 每次运行仅基于 API 最近 300 篇判断是否更新或新建
+# 【状态说明】
+# - 是否更新或新建基于 API 最近 300 篇与本地标题索引（.cnblogs_sync/ 下的 SQLite）判断
+# - 每篇发布内容末尾嵌入渲染指纹（HTML 注释，页面上不可见）；最近 300 篇的指纹随 getRecentPosts 一并取回，
+#   与本地渲染结果一致时跳过 editPost，无需任何本地状态
+# - 另在 .cnblogs_sync/ 下写入发布清单（标题 -> 渲染指纹 + post_id），覆盖 300 篇窗口之外的文章
 
 import os
 import sys
 import re
+import threading
 import time
 import xmlrpc.client
 from pathlib import Path
@@ -26,16 +29,135 @@ from dotenv import load_dotenv
 
 # 支持直接执行和作为模块导入
 try:
-    from .common import logger
+    from .common import (
+        TitleIndex,
+        env_bool,
+        env_float,
+        env_int,
+        get_rpc_client,
+        get_sync_record_path,
+        is_missing_post_fault,
+        log_rpc_stats,
+        logger,
+        server_time_str,
+    )
+    from .ratelimit import AdaptivePacer, get_pacer_state_path
+    from .manifest import (
+        HASH_WORKERS,
+        PublishManifest,
+        extract_fingerprint_marker,
+        fingerprint_file,
+        fingerprint_marker,
+        fingerprint_text,
+        get_manifest_path,
+        template_signature,
+    )
+    from .quota import QuotaLedger, get_quota_ledger_path, plan_publish_order
+    from .journal import PublishJournal, get_journal_path
+    from .pipeline import Pipeline, Stage
+    from .scanner import ScanCache, iter_markdown_files, sort_by_mtime
+    from .render_cache import RenderCache, get_render_cache_dir, render_cache_key
+    from .inventory import INVENTORY_TTL_SECONDS, RemoteInventory, get_inventory_path
+    from . import metrics, profiling
 except ImportError:
     # 直接执行时，添加 src 目录到路径
     sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
-    from assemble_publish.common import logger
+    from assemble_publish.common import (
+        TitleIndex,
+        env_bool,
+        env_float,
+        env_int,
+        get_rpc_client,
+        get_sync_record_path,
+        is_missing_post_fault,
+        log_rpc_stats,
+        logger,
+        server_time_str,
+    )
+    from assemble_publish.ratelimit import AdaptivePacer, get_pacer_state_path
+    from assemble_publish.manifest import (
+        HASH_WORKERS,
+        PublishManifest,
+        extract_fingerprint_marker,
+        fingerprint_file,
+        fingerprint_marker,
+        fingerprint_text,
+        get_manifest_path,
+        template_signature,
+    )
+    from assemble_publish.quota import QuotaLedger, get_quota_ledger_path, plan_publish_order
+    from assemble_publish.journal import PublishJournal, get_journal_path
+    from assemble_publish.pipeline import Pipeline, Stage
+    from assemble_publish.scanner import ScanCache, iter_markdown_files, sort_by_mtime
+    from assemble_publish.render_cache import RenderCache, get_render_cache_dir, render_cache_key
+    from assemble_publish.inventory import INVENTORY_TTL_SECONDS, RemoteInventory, get_inventory_path
+    from assemble_publish import metrics, profiling
 
 
 class DailyLimitReached(Exception):
     """博客园当日发布数量达到上限"""
 
+
+class RecentPostsMap:
+    """线程安全的标题 -> post_id 映射（附带远端正文中的渲染指纹），并为每个标题提供独立的锁
+
+    同名文件（不同目录下的同名 .md）并发处理时，按标题串行，避免重复创建。
+    """
+
+    def __init__(self):
+        self._posts: dict[str, str] = {}
+        self._fingerprints: dict[str, str] = {}
+        self._title_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, title, default=None):
+        with self._lock:
+            return self._posts.get(title, default)
+
+    def __setitem__(self, title, post_id):
+        with self._lock:
+            if self._posts.get(title) != post_id:
+                # 换成另一篇文章后，原来的远端指纹不再适用
+                self._fingerprints.pop(title, None)
+            self._posts[title] = post_id
+
+    def fingerprint(self, title) -> str | None:
+        """远端文章正文中的渲染指纹；未知时返回 None"""
+        with self._lock:
+            return self._fingerprints.get(title)
+
+    def set_fingerprint(self, title, fingerprint) -> None:
+        with self._lock:
+            if fingerprint:
+                self._fingerprints[title] = fingerprint
+            else:
+                self._fingerprints.pop(title, None)
+
+    def update_fingerprints(self, mapping):
+        with self._lock:
+            self._fingerprints.update(mapping)
+
+    def __contains__(self, title):
+        with self._lock:
+            return title in self._posts
+
+    def __len__(self):
+        with self._lock:
+            return len(self._posts)
+
+    def update(self, mapping):
+        with self._lock:
+            self._posts.update(mapping)
+
+    def clear(self):
+        with self._lock:
+            self._posts.clear()
+            self._fingerprints.clear()
+
+    def title_lock(self, title) -> threading.Lock:
+        with self._lock:
+            return self._title_locks.setdefault(title, threading.Lock())
+
 # 加载 .env 文件中的环境变量
 load_dotenv()
 
@@ -49,7 +171,9 @@ PASSWORD = os.getenv("CNBLOGS_TOKEN")
 BLOG_ID = None  # 自动获取
 KNOWLEDGE_BASE_URL = "https://assemble.gitbook.io/assemble"
 CNBLOGS_SEARCH_URL = "https://zzk.cnblogs.com/my/s/blogpost-p"
-RECENT_POSTS_MAP: dict[str, str] = {}
+RECENT_POSTS_MAP = RecentPostsMap()
+# 本地标题索引（SQLite）：覆盖 getRecentPosts 300 篇窗口之外的历史文章，新建前先查询
+TITLE_INDEX = TitleIndex()
 
 # --- Git / 运行环境小优化 ---
 # 避免在无交互环境（Zeabur/Cron）里 git push 触发凭据交互卡死
@@ -57,6 +181,53 @@ os.environ.setdefault("GIT_TERMINAL_PROMPT", "0")
 
 # --- 行为开关 ---
 FORCE_OVERWRITE_EXISTING = True
+# 发布清单：渲染指纹未变化时跳过 editPost
+USE_PUBLISH_MANIFEST = True
+PUBLISH_MANIFEST = PublishManifest()
+
+# 渲染缓存：按源文件内容寻址，命中时直接返回最终 description，不再执行正则替换
+# 修改渲染逻辑（build_prepend_content / replace_internal_md_links）时递增版本号
+RENDERER_VERSION = "2"
+RENDER_CACHE_MAX_MB = env_int("CNBLOGS_RENDER_CACHE_MB", 64)
+RENDER_CACHE = RenderCache()
+# 目录列表缓存：同一进程内多次运行（常驻模式）时复用未变化目录的扫描结果
+SCAN_CACHE = ScanCache()
+
+# --- 并发发布与限速（可通过环境变量调整） ---
+# 并发发布线程数；1 即串行
+PUBLISH_WORKERS = max(1, env_int("CNBLOGS_PUBLISH_WORKERS", 4))
+# 所有线程共享的限速器：初始每秒最多发起的 newPost/editPost 次数与突发上限
+PUBLISH_RATE = env_float("CNBLOGS_PUBLISH_RATE", 1.0)
+PUBLISH_BURST = env_int("CNBLOGS_PUBLISH_BURST", 5)
+# 自适应限速（AIMD）：成功时逐步加速，限流/超时/慢响应时减半，学到的速率跨运行保存
+ADAPTIVE_PACING = env_bool("CNBLOGS_ADAPTIVE_PACING", True)
+PUBLISH_MAX_RATE = env_float("CNBLOGS_PUBLISH_MAX_RATE", 5.0)
+PUBLISH_RATE_LIMITER = AdaptivePacer(
+    PUBLISH_RATE,
+    PUBLISH_BURST,
+    max_rate=PUBLISH_MAX_RATE,
+    enabled=ADAPTIVE_PACING,
+)
+# 发布流水线（读取 → 渲染 → 发布）：读取线程数与阶段间队列容量；
+# 在途的文章正文不超过 队列容量 × 阶段数 + 线程数 篇，内存占用与仓库大小无关
+PIPELINE_READ_WORKERS = max(1, env_int("CNBLOGS_PIPELINE_READERS", HASH_WORKERS))
+PIPELINE_QUEUE_SIZE = max(1, env_int("CNBLOGS_PIPELINE_QUEUE", 2 * PUBLISH_WORKERS))
+# 触发服务端限流时的最大重试次数（限流说明请求被拒绝，重试不会重复创建）
+PUBLISH_MAX_RETRIES = 2
+# 服务端限流错误的特征文本
+THROTTLE_FAULT_MARKERS = ("频繁", "太快", "稍后再试", "too many", "rate limit", "throttl")
+# 检测到当日额度用尽后置位，通知所有线程停止
+PUBLISH_STOP_EVENT = threading.Event()
+
+# 跨运行的每日额度台账：积压文件优先续跑，新建数量按剩余额度规划
+QUOTA_LEDGER = QuotaLedger()
+
+# 崩溃安全的发布日志：RPC 前后各写一条并 fsync，重启后据此恢复
+PUBLISH_JOURNAL = PublishJournal()
+
+# 远端文章快照：与去重阶段共享，未过期时不再重新下载 300 篇全文
+INVENTORY_TTL = env_int("CNBLOGS_INVENTORY_TTL", INVENTORY_TTL_SECONDS)
+REMOTE_INVENTORY = RemoteInventory()
 
 # --- 仓库根目录（支持外部传入） ---
 REPO_ROOT = Path.cwd().resolve()
@@ -76,10 +247,12 @@ def log_plan():
 
 
 def log_step_start(step_index: int) -> None:
+    metrics.current().step_started(step_index, SYNC_STEPS[step_index - 1])
     logger.info(f"[{step_index}/{len(SYNC_STEPS)}] {SYNC_STEPS[step_index - 1]}")
 
 
 def log_step_ok(step_index: int, detail: str | None = None) -> None:
+    metrics.current().step_finished(step_index, "ok")
     title = SYNC_STEPS[step_index - 1]
     if detail:
         logger.info(f"✅ {title}：{detail}")
@@ -88,6 +261,7 @@ def log_step_ok(step_index: int, detail: str | None = None) -> None:
 
 
 def log_step_skip(step_index: int, detail: str | None = None) -> None:
+    metrics.current().step_finished(step_index, "skipped")
     title = SYNC_STEPS[step_index - 1]
     if detail:
         logger.info(f"⏭️ {title}：{detail}")
@@ -96,51 +270,71 @@ def log_step_skip(step_index: int, detail: str | None = None) -> None:
 
 
 def log_step_fail(step_index: int, detail: str) -> None:
+    metrics.current().step_finished(step_index, "failed")
     title = SYNC_STEPS[step_index - 1]
     logger.error(f"❌ {title} 失败：{detail}")
 
-# --- 需要排除的目录（不扫描这些目录下的文件） ---
+# --- 需要排除的目录（不进入这些目录扫描；仓库 .gitignore 忽略的目录同样跳过） ---
 EXCLUDE_DIRS = {'.git', '.github', 'node_modules', '__pycache__', '.vscode', '.idea', 'cnblogs_sync', '.cnblogs_sync'}
 
+# --- 退出码 ---
+# 部分失败（含当日额度用尽）时返回，编排脚本据此不推进“已同步提交”
+EXIT_PARTIAL = 3
+
 # --- 函数定义 ---
 
+def is_excluded_path(relative_path):
+    """相对路径是否位于排除目录中"""
+    return any(part in EXCLUDE_DIRS for part in Path(relative_path).parts)
+
+def iter_files_from(source):
+    """流式读取以 NUL 分隔的文件列表（source 为文件路径，'-' 表示标准输入）"""
+    stream = sys.stdin.buffer if source == '-' else open(source, 'rb')
+    try:
+        pending = b''
+        while True:
+            chunk = stream.read(64 * 1024)
+            if not chunk:
+                break
+            pending += chunk
+            *items, pending = pending.split(b'\0')
+            for item in items:
+                if item:
+                    yield os.fsdecode(item)
+        if pending:
+            yield os.fsdecode(pending)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
 def find_all_markdown_files(root_dir=None):
-    """递归查找仓库中所有的 Markdown 文件"""
+    """递归查找仓库中所有的 Markdown 文件（按修改时间倒序）"""
     if root_dir is None:
         root_dir = REPO_ROOT
 
     root_path = Path(root_dir).resolve()
-    md_files: list[Path] = []
-
     logger.info(f"🔍 开始扫描 Markdown 文件（从 {root_path} 开始）...")
 
-    for file_path in root_path.rglob('*.md'):
-        relative_path = file_path.relative_to(root_path)
-        path_parts = relative_path.parts
-
-        if any(part in EXCLUDE_DIRS for part in path_parts):
-            continue
-
-        md_files.append(file_path)
-
-    def file_mtime(path: Path) -> float:
-        try:
-            return path.stat().st_mtime
-        except OSError:
-            return 0.0
-
-    md_files.sort(key=lambda path: (file_mtime(path), str(path)), reverse=True)
-    logger.info(f"✅ 找到 {len(md_files)} 个 Markdown 文件（按修改时间倒序）")
-    return [str(path) for path in md_files]
+    scan_started = time.monotonic()
+    hits_before = SCAN_CACHE.hits
+    md_files = sort_by_mtime(iter_markdown_files(str(root_path), EXCLUDE_DIRS, cache=SCAN_CACHE))
+    logger.info(
+        f"✅ 找到 {len(md_files)} 个 Markdown 文件（按修改时间倒序，耗时 {time.monotonic() - scan_started:.2f}s）"
+    )
+    if SCAN_CACHE.hits > hits_before:
+        logger.info(f"  - 目录缓存命中 {SCAN_CACHE.hits - hits_before} 个目录")
+    return md_files
 
 def get_file_content(filepath):
     """读取文件内容"""
     with open(filepath, 'r', encoding='utf-8') as f:
         return f.read()
 
+# 不跨行匹配（. 不匹配换行），因此逐行替换与整篇替换结果一致
+MD_LINK_PATTERN = re.compile(r'(\[.*?\])\((.*?\.md)\)')
+
 def replace_internal_md_links(content):
     """查找内容中所有指向本地 .md 文件的链接，并将其替换为博客园站内搜索链接。"""
-    md_link_pattern = re.compile(r'(\[.*?\])\((.*?\.md)\)')
     def replacer(match):
         link_text = match.group(1)
         md_path = match.group(2)
@@ -152,7 +346,43 @@ def replace_internal_md_links(content):
         # 直接使用原始关键词构建 URL
         new_url = f"{CNBLOGS_SEARCH_URL}?Keywords={keyword}"
         return f"{link_text}({new_url} )"
-    return md_link_pattern.sub(replacer, content)
+    return MD_LINK_PATTERN.sub(replacer, content)
+
+def build_prepend_content(title):
+    """生成文章开头的关联知识库引用"""
+    knowledge_base_url = f"{KNOWLEDGE_BASE_URL}?q={title}"
+    return f"> 关联知识库：<a href=\"{knowledge_base_url}\">{title}</a>\r\n\r\n"
+
+def render_post_body(title, content):
+    """生成最终发布内容（关联知识库 + 替换站内链接后的正文 + 渲染指纹标记）"""
+    body = build_prepend_content(title) + replace_internal_md_links(content)
+    return body + fingerprint_marker(fingerprint_text(body))
+
+def rendered_fingerprint(final_content):
+    """取出最终发布内容中嵌入的渲染指纹"""
+    return extract_fingerprint_marker(final_content) or fingerprint_text(final_content)
+
+def render_post_body_cached(title, content):
+    """同 render_post_body，结果经由渲染缓存"""
+    key = render_cache_key(content, title, current_template_signature())
+    body = RENDER_CACHE.get(key)
+    if body is None:
+        body = render_post_body(title, content)
+        RENDER_CACHE.put(key, body)
+    return body
+
+def title_from_path(filepath):
+    """由文件路径得到文章标题"""
+    return os.path.basename(filepath).replace('.md', '')
+
+def fingerprint_markdown_file(filepath):
+    """流式计算文件渲染内容的指纹，与 render_post_body 嵌入的指纹标记一致"""
+    title = title_from_path(filepath)
+    return fingerprint_file(filepath, build_prepend_content(title), replace_internal_md_links)
+
+def current_template_signature():
+    """渲染器版本与模板的签名：任一变化即令发布清单与渲染缓存失效"""
+    return template_signature(RENDERER_VERSION, KNOWLEDGE_BASE_URL, CNBLOGS_SEARCH_URL)
 
 def get_blog_id(server):
     """自动获取 BLOG_ID"""
@@ -166,28 +396,107 @@ def get_blog_id(server):
         logger.warning(f"自动获取 BLOG_ID 失败: {e}")
     return None
 
-def fetch_recent_posts_map(server, limit=300):
-    """获取最近文章映射（标题 -> post_id），仅用于本次运行。失败时抛出异常。"""
+def fetch_remote_inventory(server, limit=300):
+    """调用 getRecentPosts 生成远端文章快照。失败时抛出异常。"""
     recent_posts = server.metaWeblog.getRecentPosts(BLOG_ID, USERNAME, PASSWORD, limit)
+    return RemoteInventory.from_posts(get_inventory_path(REPO_ROOT), BLOG_ID, recent_posts)
+
 
-    mapping = {}
-    for post in (recent_posts or []):
-        title = post.get('title', '').strip()
-        post_id = post.get('postid')
-        if title and post_id:
-            mapping[title] = post_id
-    return mapping
+def lookup_existing_post_id(title):
+    """查询已存在文章的 post_id：先查最近文章映射，再查本地标题索引
+
+    返回 (post_id, 是否来自本地索引)。
+    """
+    post_id = RECENT_POSTS_MAP.get(title)
+    if post_id is not None:
+        return post_id, False
+    post_id = TITLE_INDEX.get(title)
+    return post_id, post_id is not None
 
 PostResult = Literal["created", "updated", "skipped", "failed"]
 
 
-def post_to_cnblogs(title, content, categories=None) -> PostResult:
-    """发布文章到博客园，基于最近文章映射判断是否已存在"""
-    knowledge_base_url = f"{KNOWLEDGE_BASE_URL}?q={title}"
-    prepend_content = f"> 关联知识库：<a href=\"{knowledge_base_url}\">{title}</a>\r\n\r\n"
+def wait_for_publish_slot():
+    """从共享限速器取得一次发布许可；同步已停止时抛出 DailyLimitReached"""
+    if not PUBLISH_RATE_LIMITER.acquire(PUBLISH_STOP_EVENT):
+        raise DailyLimitReached("同步已停止（当日发布额度已用尽）")
 
-    processed_body = replace_internal_md_links(content)
-    final_content = prepend_content + processed_body
+
+def is_throttle_fault(fault):
+    msg = str(fault).lower()
+    return any(marker in msg for marker in THROTTLE_FAULT_MARKERS)
+
+
+def call_publish_rpc(method, *args):
+    """在限速许可下调用发布 RPC，并把耗时、限流、超时反馈给自适应限速器"""
+    for attempt in range(PUBLISH_MAX_RETRIES + 1):
+        wait_for_publish_slot()
+        started = time.monotonic()
+        try:
+            result = method(*args)
+        except xmlrpc.client.Fault as e:
+            if not is_throttle_fault(e):
+                raise
+            PUBLISH_RATE_LIMITER.on_throttle()
+            metrics.current().inc("throttles")
+            if attempt >= PUBLISH_MAX_RETRIES:
+                raise
+            metrics.current().inc("publish_retries")
+            logger.warning(f"⚠️ 触发服务端限流，降速后重试（{attempt + 1}/{PUBLISH_MAX_RETRIES}）：{e}")
+            continue
+        except TimeoutError:
+            # 超时的请求可能已在服务端生效，不重试，只降速
+            PUBLISH_RATE_LIMITER.on_timeout()
+            metrics.current().inc("timeouts")
+            raise
+        PUBLISH_RATE_LIMITER.on_success(time.monotonic() - started)
+        return result
+
+
+def has_known_fingerprint(title):
+    """发布清单或远端正文中记有该标题的渲染指纹（值得预先计算本地指纹）"""
+    return (USE_PUBLISH_MANIFEST and title in PUBLISH_MANIFEST) or RECENT_POSTS_MAP.fingerprint(title) is not None
+
+
+def is_unchanged_post(title, fingerprint):
+    """渲染指纹与发布清单一致（且远端 post_id 未变），或与远端正文中的指纹标记一致时无需发布"""
+    existing_post_id, _ = lookup_existing_post_id(title)
+    # 远端列表未达到 300 篇上限时包含全部文章：不在其中说明已在远端被删除，清单记录不再可信
+    missing_remotely = RECENT_POSTS_MAP.get(title) is None and not REMOTE_INVENTORY.truncated
+    if USE_PUBLISH_MANIFEST and PUBLISH_MANIFEST.is_unchanged(title, fingerprint, existing_post_id, missing_remotely):
+        logger.info(f"⏭️ '{title}' 内容未变化（渲染指纹一致），跳过发布")
+        return True
+    if existing_post_id is not None and RECENT_POSTS_MAP.fingerprint(title) == fingerprint:
+        logger.info(f"⏭️ '{title}' 与远端内容一致（远端指纹标记），跳过发布")
+        if USE_PUBLISH_MANIFEST:
+            PUBLISH_MANIFEST.record(title, fingerprint, existing_post_id)
+        return True
+    return False
+
+
+def post_to_cnblogs(title, content, categories=None, fingerprint=None, rendered=None) -> PostResult:
+    """发布文章到博客园，基于最近文章映射判断是否已存在
+
+    fingerprint 为预先计算好的渲染指纹；与发布清单一致时直接跳过，不发起任何 RPC。
+    rendered 为已渲染好的最终内容（此时 content 可为 None）。
+    可被多个线程并发调用；同一标题的发布按标题串行。
+    """
+    with RECENT_POSTS_MAP.title_lock(title):
+        return _post_to_cnblogs(title, content, categories, fingerprint, rendered)
+
+
+def _post_to_cnblogs(title, content, categories, fingerprint, final_content=None) -> PostResult:
+    existing_post_id, from_index = lookup_existing_post_id(title)
+    if fingerprint is None:
+        if final_content is None:
+            final_content = render_post_body_cached(title, content)
+        fingerprint = rendered_fingerprint(final_content)
+
+    if is_unchanged_post(title, fingerprint):
+        return "skipped"
+
+    if final_content is None:
+        final_content = render_post_body_cached(title, content)
 
     final_categories = ['[Markdown]']
     if categories and isinstance(categories, list):
@@ -203,32 +512,59 @@ def post_to_cnblogs(title, content, categories=None) -> PostResult:
     }
 
     try:
-        server = xmlrpc.client.ServerProxy(RPC_URL)
-        existing_post_id = RECENT_POSTS_MAP.get(title)
+        server = get_rpc_client(RPC_URL)
 
         if existing_post_id:
             if FORCE_OVERWRITE_EXISTING:
-                logger.info(f"ℹ️ 最近文章中已存在 '{title}'（Post ID: {existing_post_id}），强制覆盖...")
-                success = server.metaWeblog.editPost(existing_post_id, USERNAME, PASSWORD, post_data, post_data['publish'])
+                source = "本地标题索引" if from_index else "最近文章"
+                logger.info(f"ℹ️ {source}中已存在 '{title}'（Post ID: {existing_post_id}），强制覆盖...")
+                PUBLISH_JOURNAL.intent(title, "edit", existing_post_id)
+                # 请求结果确定之前，远端内容视为未知
+                RECENT_POSTS_MAP.set_fingerprint(title, None)
+                REMOTE_INVENTORY.set_fingerprint(existing_post_id, None)
+                success = call_publish_rpc(server.metaWeblog.editPost, existing_post_id, USERNAME, PASSWORD, post_data, post_data['publish'])
                 if success:
                     logger.info(f"✅ 成功更新文章 '{title}'，Post ID: {existing_post_id}")
                     RECENT_POSTS_MAP[title] = existing_post_id
+                    RECENT_POSTS_MAP.set_fingerprint(title, fingerprint)
+                    REMOTE_INVENTORY.set_fingerprint(existing_post_id, fingerprint)
+                    PUBLISH_MANIFEST.record(title, fingerprint, existing_post_id)
+                    PUBLISH_JOURNAL.outcome(title, "updated", existing_post_id, fingerprint)
                     return "updated"
                 else:
                     logger.error(f"❌ 更新文章 '{title}' 失败")
+                    PUBLISH_JOURNAL.outcome(title, "failed", existing_post_id)
                     return "failed"
             else:
                 logger.info(f"ℹ️ 最近文章中已存在 '{title}'（Post ID: {existing_post_id}），跳过发布")
                 return "skipped"
         else:
             logger.info(f"📄 文章 '{title}' 不在最近文章中，将创建新文章")
-            new_post_id = server.metaWeblog.newPost(BLOG_ID, USERNAME, PASSWORD, post_data, post_data['publish'])
+            PUBLISH_JOURNAL.intent(title, "create")
+            new_post_id = call_publish_rpc(server.metaWeblog.newPost, BLOG_ID, USERNAME, PASSWORD, post_data, post_data['publish'])
+            # 先落盘结果再更新内存状态，崩溃后可从日志恢复 post_id
+            PUBLISH_JOURNAL.outcome(title, "created", new_post_id, fingerprint)
             logger.info(f"✅ 成功发布新文章 '{title}'，文章ID: {new_post_id}")
             RECENT_POSTS_MAP[title] = new_post_id
+            RECENT_POSTS_MAP.set_fingerprint(title, fingerprint)
+            created_at = server_time_str()
+            TITLE_INDEX.upsert(title, new_post_id, created_at)
+            REMOTE_INVENTORY.record_created(title, new_post_id, created_at, fingerprint)
+            PUBLISH_MANIFEST.record(title, fingerprint, new_post_id)
             return "created"
 
+    except DailyLimitReached:
+        raise
     except xmlrpc.client.Fault as e:
+        # 服务端明确拒绝：本次请求未生效
+        PUBLISH_JOURNAL.outcome(title, "failed", existing_post_id)
         msg = str(e)
+        if from_index and is_missing_post_fault(e):
+            # 索引中的文章已在远端删除：移除索引项，下次运行重新创建
+            TITLE_INDEX.remove(title)
+            PUBLISH_MANIFEST.forget(title)
+            REMOTE_INVENTORY.remove_posts([existing_post_id])
+            logger.warning(f"⚠️ 本地索引中的文章 '{title}'（Post ID: {existing_post_id}）在远端不存在，已移除索引")
         if "当日博文发布数量" in msg or "超出当日博文发布数量" in msg:
             raise DailyLimitReached(msg)
         logger.error(f"❌ 发布或更新文章 '{title}' 时发生错误: {e}")
@@ -237,9 +573,45 @@ def post_to_cnblogs(title, content, categories=None) -> PostResult:
         logger.error(f"❌ 发布或更新文章 '{title}' 时发生错误: {e}")
         return "failed"
 
+
 # --- 主流程 ---
-if __name__ == "__main__":
-    run_started_ts = time.time()
+def main(argv=None) -> int:
+    """执行一次同步，返回退出码（0 成功，EXIT_PARTIAL 部分完成，1 失败）
+
+    argv 为空时全量扫描；["--files-from", 列表文件] 为增量模式；其余视为手动指定的文件。
+    可在同一进程内多次调用（见 engine.SyncEngine）。结束时写出运行指标（见 metrics）；
+    --profile[=cprofile|sample] 或 CNBLOGS_PROFILE 开启剖析（见 profiling）。
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    argv, profile_mode = profiling.parse_profile_args(list(argv))
+    run_metrics = metrics.start_run("sync")
+    exit_code = 1
+    with profiling.profile_run("sync", profile_mode, profiling.get_profile_dir(REPO_ROOT), log=logger.info):
+        try:
+            exit_code = run_sync(argv)
+            return exit_code
+        finally:
+            run_metrics.finish(exit_code)
+            write_run_metrics(run_metrics)
+
+
+def write_run_metrics(run_metrics) -> None:
+    metrics_dir = metrics.get_metrics_dir(REPO_ROOT)
+    try:
+        run_metrics.write(metrics_dir)
+    except OSError as e:
+        logger.warning(f"写入运行指标失败: {metrics_dir} ({e})")
+        return
+    logger.info(f"📊 运行指标已写入 {metrics_dir}（总耗时 {run_metrics.duration:.1f}s）")
+
+
+def run_sync(argv=None) -> int:
+    global BLOG_ID, PUBLISH_MANIFEST, RENDER_CACHE, TITLE_INDEX, QUOTA_LEDGER, PUBLISH_JOURNAL, REMOTE_INVENTORY
+    if argv is None:
+        argv = sys.argv[1:]
+    PUBLISH_STOP_EVENT.clear()
+    PUBLISH_RATE_LIMITER.reset_run_stats()
     missing_vars = []
     if not RPC_URL:
         missing_vars.append("CNBLOGS_RPC_URL")
@@ -253,7 +625,7 @@ if __name__ == "__main__":
         for var in missing_vars:
             logger.error(f"  - {var}")
         logger.error("请检查 .env 或系统环境变量后再运行。")
-        sys.exit(1)
+        return 1
 
     log_plan()
     step_status = ["未开始"] * len(SYNC_STEPS)
@@ -272,7 +644,11 @@ if __name__ == "__main__":
     # Step 1: prepare
     step = 1
     log_step_start(step)
-    server = xmlrpc.client.ServerProxy(RPC_URL)
+    server = get_rpc_client(RPC_URL)
+    cached_inventory = RemoteInventory.load(get_inventory_path(REPO_ROOT))
+    if not BLOG_ID and cached_inventory.is_fresh(INVENTORY_TTL):
+        BLOG_ID = cached_inventory.blog_id
+        logger.info(f"✅ 从远端文章快照获取 BLOG_ID: {BLOG_ID}")
     if not BLOG_ID:
         try:
             BLOG_ID = get_blog_id(server)
@@ -282,12 +658,32 @@ if __name__ == "__main__":
                 log_step_fail(step, "无法自动获取 BLOG_ID")
                 set_status(step, "失败", "BLOG_ID 获取失败")
                 print_summary()
-                sys.exit(1)
+                return 1
         except Exception as e:
             log_step_fail(step, f"获取 BLOG_ID 失败: {e}")
             set_status(step, "失败", "BLOG_ID 获取异常")
             print_summary()
-            sys.exit(1)
+            return 1
+    if USE_PUBLISH_MANIFEST:
+        PUBLISH_MANIFEST = PublishManifest.load(get_manifest_path(REPO_ROOT), current_template_signature())
+        logger.info(f"  - 发布清单：已记录 {len(PUBLISH_MANIFEST)} 篇")
+    # 同一进程内再次运行时，仍指向同一目录/文件的渲染缓存与标题索引保持打开
+    render_cache_dir = get_render_cache_dir(REPO_ROOT) if RENDER_CACHE_MAX_MB > 0 else None
+    if (
+        RENDER_CACHE.directory != render_cache_dir
+        or RENDER_CACHE.max_bytes != RENDER_CACHE_MAX_MB * 1024 * 1024
+        or (render_cache_dir is not None and not render_cache_dir.exists())
+    ):
+        RENDER_CACHE = RenderCache(render_cache_dir, RENDER_CACHE_MAX_MB * 1024 * 1024)
+    RENDER_CACHE.hits = RENDER_CACHE.misses = 0
+    title_index_path = get_sync_record_path(REPO_ROOT)
+    if TITLE_INDEX.path != title_index_path or not title_index_path.exists():
+        TITLE_INDEX.close()
+        TITLE_INDEX = TitleIndex(title_index_path)
+    logger.info(f"  - 本地标题索引：已记录 {len(TITLE_INDEX)} 篇")
+    QUOTA_LEDGER = QuotaLedger.load(get_quota_ledger_path(REPO_ROOT))
+    used_today = QUOTA_LEDGER.used_today()
+    logger.info(f"  - 今日已用额度：新建 {used_today['created']}，更新 {used_today['updated']}")
     step1_detail = f"BLOG_ID={BLOG_ID}"
     log_step_ok(step, step1_detail)
     set_status(step, "成功", step1_detail)
@@ -296,15 +692,56 @@ if __name__ == "__main__":
     step = 2
     log_step_start(step)
     RECENT_POSTS_MAP.clear()
-    try:
-        RECENT_POSTS_MAP.update(fetch_recent_posts_map(server, limit=300))
-    except Exception as e:
-        log_step_fail(step, f"获取最近文章失败: {e}")
-        set_status(step, "失败", "API 调用失败")
-        print_summary()
-        sys.exit(1)
+    PUBLISH_JOURNAL = PublishJournal(get_journal_path(REPO_ROOT))
+    journal_state = PUBLISH_JOURNAL.replay()
+    # 上次运行中断时，未确认的新建是否已生效只能以远端为准，必须重新拉取
+    if cached_inventory.is_fresh(INVENTORY_TTL, BLOG_ID) and not journal_state.interrupted:
+        REMOTE_INVENTORY = cached_inventory
+        record_source = f"复用 {int(REMOTE_INVENTORY.age())}s 前的快照，"
+    else:
+        try:
+            REMOTE_INVENTORY = fetch_remote_inventory(server, limit=300)
+        except Exception as e:
+            log_step_fail(step, f"获取最近文章失败: {e}")
+            set_status(step, "失败", "API 调用失败")
+            print_summary()
+            return 1
+        record_source = "已获取"
+    # 远端快照播种本地标题索引（300 篇之外的查询依赖它），再建立最近文章映射（标题 -> post_id）
+    TITLE_INDEX.upsert_many((p['title'], p['postid'], p['dateCreated']) for p in REMOTE_INVENTORY.posts)
+    RECENT_POSTS_MAP.update(REMOTE_INVENTORY.posts_map())
+    remote_fingerprints = REMOTE_INVENTORY.fingerprints_map()
+    RECENT_POSTS_MAP.update_fingerprints(remote_fingerprints)
+    REMOTE_INVENTORY.begin_run()
+    REMOTE_INVENTORY.save()
     record_count = len(RECENT_POSTS_MAP)
-    record_detail = f"已获取最近 {record_count} 篇文章"
+    record_detail = f"{record_source}最近 {record_count} 篇文章"
+    if remote_fingerprints:
+        record_detail += f"（{len(remote_fingerprints)} 篇带渲染指纹）"
+
+    # 回放上次中断运行的发布日志：恢复已创建文章的 post_id，避免重复创建
+    if journal_state.interrupted:
+        for title, entry in journal_state.completed.items():
+            if RECENT_POSTS_MAP.get(title) is None:
+                RECENT_POSTS_MAP[title] = entry["post_id"]
+            if entry["result"] == "created":
+                created_at = server_time_str(entry["ts"]) if entry.get("ts") else None
+                TITLE_INDEX.upsert(title, entry["post_id"], created_at)
+                REMOTE_INVENTORY.record_created(title, entry["post_id"], created_at)
+            if entry.get("fingerprint"):
+                PUBLISH_MANIFEST.record(title, entry["fingerprint"], entry["post_id"])
+        for title, entry in journal_state.pending.items():
+            if entry.get("action") != "create":
+                continue
+            if RECENT_POSTS_MAP.get(title) is not None:
+                logger.info(f"  - 中断前的新建 '{title}' 已在远端生效（Post ID: {RECENT_POSTS_MAP.get(title)}）")
+            else:
+                logger.info(f"  - 中断前的新建 '{title}' 未在最近文章中出现，视为未生效")
+        logger.info(
+            f"  - 检测到上次运行中断：从发布日志恢复 {len(journal_state.completed)} 条已完成结果，"
+            f"{len(journal_state.pending)} 条未确认请求"
+        )
+        record_detail += f"，恢复中断运行 {len(journal_state.completed)} 条"
     log_step_ok(step, record_detail)
     set_status(step, "成功", record_detail)
 
@@ -312,76 +749,230 @@ if __name__ == "__main__":
     step = 3
     log_step_start(step)
     run_mode = "full"
-    if len(sys.argv) > 1:
-        files_to_publish = sys.argv[1:]
+    if len(argv) > 1 and argv[0] == "--files-from":
+        # 增量模式：由编排脚本传入变更文件列表（NUL 分隔，避免命令行长度限制）
+        files_to_publish = [
+            path for path in iter_files_from(argv[1])
+            if path.endswith('.md') and not is_excluded_path(path)
+        ]
+        logger.info(f"  - 增量模式：变更 {len(files_to_publish)} 个 Markdown 文件")
+        run_mode = "incremental"
+    elif argv:
+        files_to_publish = list(argv)
         logger.info(f"  - 手动模式：指定 {len(files_to_publish)} 个文件")
         run_mode = "manual"
     else:
         files_to_publish = find_all_markdown_files()
-        if not files_to_publish:
-            log_step_ok(step, "未找到 Markdown 文件")
-            set_status(step, "跳过", "未找到 Markdown 文件")
-            print_summary()
-            sys.exit(0)
         logger.info(f"  - 全量扫描：共 {len(files_to_publish)} 个 Markdown 文件")
 
+    # 续跑积压并按剩余新建额度规划（手动模式按指定列表原样执行）
+    deferred_files: list[str] = []
+    if run_mode != "manual":
+        files_to_publish = [str(REPO_ROOT / path) for path in files_to_publish]
+        backlog = [
+            str(REPO_ROOT / path) for path in QUOTA_LEDGER.backlog
+            if os.path.exists(REPO_ROOT / path)
+        ]
+        if backlog:
+            logger.info(f"  - 上次未完成的积压：{len(backlog)} 个文件，优先处理")
+        remaining_creates = QUOTA_LEDGER.remaining_creates()
+
+        def is_create(path):
+            return lookup_existing_post_id(title_from_path(path))[0] is None
+
+        files_to_publish, deferred_files = plan_publish_order(
+            files_to_publish, backlog, is_create, remaining_creates
+        )
+        if remaining_creates is not None:
+            logger.info(f"  - 今日剩余新建额度：{remaining_creates}（学到的每日上限 {QUOTA_LEDGER.create_limit}）")
+        if deferred_files:
+            logger.info(f"  - 新建额度不足，{len(deferred_files)} 篇新文章延后到后续运行")
+
+    if not files_to_publish:
+        empty_detail = "无变更的 Markdown 文件" if run_mode == "incremental" else "未找到 Markdown 文件"
+        if deferred_files:
+            empty_detail = f"额度不足，全部 {len(deferred_files)} 篇延后"
+            QUOTA_LEDGER.set_backlog([os.path.relpath(path, REPO_ROOT) for path in deferred_files])
+            QUOTA_LEDGER.save()
+        REMOTE_INVENTORY.finish_run()
+        REMOTE_INVENTORY.save()
+        # 回放恢复的结果已随清单与快照落盘，清理上次中断遗留的发布日志，避免以后每次运行都重新回放
+        PUBLISH_MANIFEST.save()
+        PUBLISH_JOURNAL.complete()
+        log_step_ok(step, empty_detail)
+        set_status(step, "跳过", empty_detail)
+        print_summary()
+        return EXIT_PARTIAL if deferred_files else 0
+
     list_detail = f"模式={run_mode}，候选={len(files_to_publish)}"
+    if deferred_files:
+        list_detail += f"，延后={len(deferred_files)}"
     log_step_ok(step, list_detail)
     set_status(step, "成功", list_detail)
 
     # Step 4: publish
     step = 4
     log_step_start(step)
-    SUCCESS_BATCH_SIZE_SMALL = 5
-    SUCCESS_REST_SECONDS_SMALL = 3
-    SUCCESS_BATCH_SIZE_LARGE = 20
-    SUCCESS_REST_SECONDS_LARGE = 10
-
-    success_count = 0
-    skipped_count = 0
-    failed_count = 0
-    missing_count = 0
+    total = len(files_to_publish)
+    pacer_state_path = get_pacer_state_path(REPO_ROOT)
+    PUBLISH_RATE_LIMITER.load_state(pacer_state_path)
+    if PUBLISH_RATE_LIMITER.rate > 0:
+        pacing_label = "自适应" if PUBLISH_RATE_LIMITER.enabled else "固定"
+        logger.info(
+            f"  - 并发线程={PUBLISH_WORKERS}，{pacing_label}限速 起始 {PUBLISH_RATE_LIMITER.rate:.2f} 篇/秒（突发 {PUBLISH_BURST}）"
+        )
+    else:
+        logger.info(f"  - 并发线程={PUBLISH_WORKERS}，不限速")
 
-    daily_limit_reached = False
-    processed = 0
+    PUBLISH_JOURNAL.begin()
 
-    for idx, md_file in enumerate(files_to_publish, 1):
+    # 读取 → 渲染 → 发布 三个阶段由有界队列串联：发布线程等待网络时，读取与渲染线程继续准备后续文章；
+    # 下游跟不上时上游阻塞，在途正文数量有上限。每个条目都会流到末端，因停止而未处理的 result 为 None
+    def read_one(item):
+        """读取阶段：检查文件；清单或远端记有指纹的文章先流式计算指纹，未变化时不读取正文"""
+        if item["result"] is not None or PUBLISH_STOP_EVENT.is_set():
+            return item
+        md_file = item["path"]
         if not os.path.exists(md_file):
             logger.warning(f"⚠️ 文件不存在，跳过: '{md_file}'")
-            failed_count += 1
-            missing_count += 1
-            continue
-
-        logger.info(f"[{idx}/{len(files_to_publish)}] 处理文件: {md_file}")
-        post_title = os.path.basename(md_file).replace('.md', '')
-        post_content = get_file_content(md_file)
+            item["result"] = "missing"
+            return item
 
+        logger.info(f"[{item['index']}/{total}] 处理文件: {md_file}")
         try:
-            result = post_to_cnblogs(post_title, post_content)
+            if has_known_fingerprint(item["title"]):
+                item["fingerprint"] = fingerprint_markdown_file(md_file)
+                if is_unchanged_post(item["title"], item["fingerprint"]):
+                    item["result"] = "skipped"
+                    return item
+            item["content"] = get_file_content(md_file)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f"❌ 读取文件失败: '{md_file}' ({e})")
+            item["result"] = "failed"
+        return item
+
+    def render_one(item):
+        """渲染阶段：生成最终内容后立即释放原文"""
+        if item["result"] is not None or PUBLISH_STOP_EVENT.is_set():
+            item["content"] = None
+            return item
+        item["body"] = render_post_body_cached(item["title"], item.pop("content"))
+        return item
+
+    def publish_one(item):
+        """发布阶段；因停止而未处理时 result 保持 None"""
+        body = item.pop("body", None)
+        if item["result"] is not None or PUBLISH_STOP_EVENT.is_set():
+            return item
+        try:
+            result = post_to_cnblogs(item["title"], None, fingerprint=item["fingerprint"], rendered=body)
+            QUOTA_LEDGER.record(result)
+            item["result"] = result
         except DailyLimitReached as e:
-            logger.error(f"❌ 检测到博客园当日发布额度已用尽，停止本次同步：{e}")
-            processed = idx - 1
-            daily_limit_reached = True
-            break
+            if not PUBLISH_STOP_EVENT.is_set():
+                PUBLISH_STOP_EVENT.set()
+                logger.error(f"❌ 检测到博客园当日发布额度已用尽，停止本次同步：{e}")
+        return item
+
+    def stage_failed(item, error):
+        """任一阶段意外出错：该文件记为失败（进入积压），不影响其余文件与收尾落盘"""
+        logger.error(f"❌ 处理文件 '{item['path']}' 时发生错误: {type(error).__name__}: {error}")
+        item.pop("content", None)
+        item.pop("body", None)
+        item["result"] = "failed"
+        return item
+
+    publish_pipeline = Pipeline(
+        [
+            Stage("read", read_one, PIPELINE_READ_WORKERS, on_error=stage_failed),
+            Stage("render", render_one, on_error=stage_failed),
+            Stage("publish", publish_one, PUBLISH_WORKERS, on_error=stage_failed),
+        ],
+        queue_size=PIPELINE_QUEUE_SIZE,
+    )
+    pipeline_items = (
+        {"index": idx, "path": md_file, "title": title_from_path(md_file), "fingerprint": None, "result": None}
+        for idx, md_file in enumerate(files_to_publish, 1)
+    )
 
+    success_count = 0
+    skipped_count = 0
+    failed_count = 0
+    missing_count = 0
+    processed = 0
+    unfinished: list[tuple[int, str]] = []
+
+    publish_started = time.monotonic()
+    for item in publish_pipeline.run(pipeline_items):
+        result = item["result"]
+        if result is None or result == "failed":
+            unfinished.append((item["index"], item["path"]))
+        if result is None:
+            continue
+        processed += 1
+        metrics.current().record_outcome(result)
         if result in {"created", "updated"}:
             success_count += 1
-            if success_count % SUCCESS_BATCH_SIZE_SMALL == 0:
-                logger.info(f"⏳ 已处理 {success_count} 篇，休息 {SUCCESS_REST_SECONDS_SMALL}s...")
-                time.sleep(SUCCESS_REST_SECONDS_SMALL)
-                logger.info("✅ 继续同步...")
-
-            if success_count % SUCCESS_BATCH_SIZE_LARGE == 0:
-                logger.info(f"⏳ 已处理 {success_count} 篇，休息 {SUCCESS_REST_SECONDS_LARGE}s...")
-                time.sleep(SUCCESS_REST_SECONDS_LARGE)
-                logger.info("✅ 继续同步...")
+            if success_count % 20 == 0:
+                logger.info(
+                    f"📈 已成功 {success_count} 篇，实际吞吐 {PUBLISH_RATE_LIMITER.effective_posts_per_minute():.1f} 篇/分钟，"
+                    f"当前限速 {PUBLISH_RATE_LIMITER.rate:.2f} 篇/秒"
+                )
         elif result == "skipped":
             skipped_count += 1
         else:
             failed_count += 1
-        processed = idx
+            if result == "missing":
+                missing_count += 1
+    # 流水线乱序完成，积压按原顺序保存
+    unfinished_files = [path for _, path in sorted(unfinished)]
+
+    publish_seconds = time.monotonic() - publish_started
+    run_metrics = metrics.current()
+    run_metrics.set_gauge("publish_posts_per_second", success_count / publish_seconds if publish_seconds > 0 else 0.0)
+    run_metrics.set_gauge("publish_candidates", total)
+    run_metrics.set_gauge("publish_deferred", len(deferred_files))
+    run_metrics.set_gauge("publish_unfinished", len(unfinished_files))
+    daily_limit_reached = PUBLISH_STOP_EVENT.is_set()
+    run_metrics.set_gauge("daily_limit_reached", int(daily_limit_reached))
+    for stage_stats in publish_pipeline.stats():
+        run_metrics.set_gauge(f"pipeline_{stage_stats['name']}_busy_seconds", stage_stats["busy_seconds"])
+        run_metrics.set_gauge(f"pipeline_{stage_stats['name']}_max_queue_depth", stage_stats["max_queue_depth"])
+    if daily_limit_reached:
+        # 所有线程结束后再记录，确保今天的新建数已全部计入
+        QUOTA_LEDGER.mark_limit_hit()
+    PUBLISH_MANIFEST.save()
+    PUBLISH_RATE_LIMITER.save_state(pacer_state_path)
+
+    # 未处理、失败与延后的文件记入积压，下次运行优先续跑
+    if run_mode != "manual":
+        backlog_files = [*unfinished_files, *deferred_files]
+        QUOTA_LEDGER.set_backlog([os.path.relpath(path, REPO_ROOT) for path in backlog_files])
+        if backlog_files:
+            pending_creates = sum(1 for path in backlog_files if lookup_existing_post_id(title_from_path(path))[0] is None)
+            estimate = QUOTA_LEDGER.estimate_runs(pending_creates)
+            if estimate is None:
+                logger.info(f"📋 积压 {len(backlog_files)} 个文件（其中新建 {pending_creates} 篇），尚未学到每日上限，无法估算")
+            else:
+                days, runs = estimate
+                logger.info(
+                    f"📋 积压 {len(backlog_files)} 个文件（其中新建 {pending_creates} 篇），"
+                    f"按每日上限 {QUOTA_LEDGER.create_limit} 估算还需约 {days} 天 / {runs} 次运行"
+                )
+    QUOTA_LEDGER.save()
+    REMOTE_INVENTORY.finish_run()
+    REMOTE_INVENTORY.save()
+    # 清单、台账与快照已落盘，本次运行的日志可以压缩
+    PUBLISH_JOURNAL.complete()
+    if REMOTE_INVENTORY.created:
+        logger.info(f"🗃️ 本次新建 {len(REMOTE_INVENTORY.created)} 篇，已记入远端文章快照供去重使用")
+    if success_count:
+        logger.info(
+            f"📈 实际吞吐 {PUBLISH_RATE_LIMITER.effective_posts_per_minute():.1f} 篇/分钟，"
+            f"结束时限速 {PUBLISH_RATE_LIMITER.rate:.2f} 篇/秒（限流 {PUBLISH_RATE_LIMITER.throttles} 次，"
+            f"超时 {PUBLISH_RATE_LIMITER.timeouts} 次，慢响应 {PUBLISH_RATE_LIMITER.slow_responses} 次）"
+        )
 
-    total = len(files_to_publish)
     if daily_limit_reached:
         step4_detail = (
             f"因当日发布额度用尽已停止；成功={success_count}，跳过={skipped_count}，失败={failed_count}，已处理={processed}/{total}"
@@ -392,8 +983,26 @@ if __name__ == "__main__":
         )
     if missing_count:
         step4_detail += f"，缺失={missing_count}"
+    if deferred_files:
+        step4_detail += f"，延后={len(deferred_files)}"
     log_step_ok(step, step4_detail)
-    step4_status = "成功" if (failed_count == 0 and not daily_limit_reached) else "部分失败"
+    step4_status = "成功" if (failed_count == 0 and not daily_limit_reached and not deferred_files) else "部分失败"
     set_status(step, step4_status, step4_detail)
 
+    logger.info(
+        "🧵 发布流水线："
+        + "，".join(
+            f"{stage_stats['name']} 忙碌 {stage_stats['busy_seconds']:.1f}s / 等待 {stage_stats['idle_seconds']:.1f}s"
+            f"（{stage_stats['workers']} 线程，队列峰值 {stage_stats['max_queue_depth']}）"
+            for stage_stats in publish_pipeline.stats()
+        )
+    )
+    if RENDER_CACHE.hits or RENDER_CACHE.misses:
+        logger.info(f"🗂️ 渲染缓存：命中 {RENDER_CACHE.hits}，未命中 {RENDER_CACHE.misses}")
+    log_rpc_stats()
     print_summary()
+    return 0 if step4_status == "成功" else EXIT_PARTIAL
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+from assemble_publish.common import server_time_str
+from assemble_publish.dedup import build_dedup_plan, format_date, try_parse_date
+
+
+def post(post_id, title, created):
+    return {"postid": str(post_id), "title": title, "dateCreated": created}
+
+
+def test_keep_latest_keeps_newest_and_deletes_undated_first():
+    posts = [
+        post(1, "a", "20240101T08:00:00"),
+        post(2, "a", None),
+        post(3, "a", "20240102T08:00:00"),
+    ]
+    plan = build_dedup_plan(posts, keep_latest=True)
+    assert plan.keep["a"]["postid"] == "3"
+    assert {p["postid"] for _, p in plan.delete} == {"1", "2"}
+
+
+def test_keep_earliest_does_not_keep_undated_post():
+    posts = [
+        post(1, "a", None),
+        post(2, "a", "20240101T08:00:00"),
+        post(3, "a", "20240102T08:00:00"),
+    ]
+    plan = build_dedup_plan(posts, keep_latest=False)
+    assert plan.keep["a"]["postid"] == "2"
+
+
+def test_same_time_falls_back_to_post_id():
+    posts = [post(9, "a", "20240101T08:00:00"), post(10, "a", "20240101T08:00:00")]
+    assert build_dedup_plan(posts, keep_latest=True).keep["a"]["postid"] == "10"
+
+
+def test_aware_dates_are_converted_to_server_time():
+    assert try_parse_date("2024-01-01T00:00:00+0000") == datetime(2024, 1, 1, 8, 0, 0)
+    assert try_parse_date("garbage") is None
+    assert try_parse_date(None) is None
+    assert format_date(None) == "未知"
+
+
+def test_server_time_str_uses_utc_plus_8():
+    timestamp = datetime(2024, 1, 1, 20, 30, tzinfo=timezone.utc).timestamp()
+    assert server_time_str(timestamp) == "20240102T04:30:00"
+    now = datetime.now(timezone(timedelta(hours=8))).replace(tzinfo=None)
+    assert abs(try_parse_date(server_time_str()) - now) < timedelta(seconds=5)
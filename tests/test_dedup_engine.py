@@ -0,0 +1,118 @@
+import xmlrpc.client
+
+import pytest
+
+from assemble_publish.engine import DedupEngine, EngineContext
+from assemble_publish.inventory import RemoteInventory, get_inventory_path
+from fake_cnblogs import BLOG_ID, FakeCnblogs, start_server
+
+
+@pytest.fixture
+def fake_server():
+    fake = FakeCnblogs()
+    server, url = start_server(fake)
+    try:
+        yield fake, url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def add_posts(fake: FakeCnblogs, titles):
+    for title in titles:
+        post_id = fake._new_id()
+        fake.posts[post_id] = {
+            "title": title,
+            "description": "",
+            "categories": [],
+            "dateCreated": xmlrpc.client.DateTime(f"20240101T00:{len(fake.posts) // 60:02d}:{len(fake.posts) % 60:02d}"),
+        }
+
+
+def make_engine(tmp_path, url, **options) -> DedupEngine:
+    context = EngineContext(tmp_path, url, "user", "token")
+    return DedupEngine(context, round_delay=0, **options)
+
+
+def test_full_run_refetches_until_older_duplicates_are_gone(tmp_path, fake_server):
+    fake, url = fake_server
+    # 最早的 20 篇在 300 篇窗口外，其中 old-* 的重复副本只有删掉窗口内的 dup-* 副本后才会进入窗口
+    add_posts(fake, [f"first-{i}" for i in range(10)])
+    add_posts(fake, [f"old-{i}" for i in range(10)])
+    add_posts(fake, [f"unique-{i}" for i in range(270)])
+    add_posts(fake, [f"old-{i}" for i in range(10)])
+    add_posts(fake, [f"dup-{i}" for i in range(10)])
+    add_posts(fake, [f"dup-{i}" for i in range(10)])
+
+    result = make_engine(tmp_path, url).run(full=True)
+
+    assert len(result.deleted) == 20
+    assert result.rounds == 2
+    assert not result.failed
+    titles = [post["title"] for post in fake.posts.values()]
+    assert len(titles) == len(set(titles)) == 300
+
+
+def test_full_run_stops_when_window_is_not_truncated(tmp_path, fake_server):
+    fake, url = fake_server
+    add_posts(fake, ["a", "b", "a", "c", "b", "a"])
+
+    result = make_engine(tmp_path, url).run(full=True)
+
+    assert len(result.deleted) == 3
+    assert result.rounds == 1
+    assert sorted(post["title"] for post in fake.posts.values()) == ["a", "b", "c"]
+    assert fake.calls["metaWeblog.getRecentPosts"] == 1
+
+
+def test_max_rounds_limits_refetching(tmp_path, fake_server):
+    fake, url = fake_server
+    add_posts(fake, [f"first-{i}" for i in range(10)])
+    add_posts(fake, [f"old-{i}" for i in range(10)])
+    add_posts(fake, [f"unique-{i}" for i in range(270)])
+    add_posts(fake, [f"old-{i}" for i in range(10)])
+    add_posts(fake, [f"dup-{i}" for i in range(10)] * 2)
+
+    result = make_engine(tmp_path, url, max_rounds=1).run(full=True)
+
+    assert len(result.deleted) == 10
+    assert result.rounds == 1
+
+
+def test_snapshot_run_falls_back_to_full_fetch_after_deleting(tmp_path, fake_server):
+    fake, url = fake_server
+    add_posts(fake, [f"first-{i}" for i in range(10)])
+    add_posts(fake, ["old"])
+    add_posts(fake, [f"unique-{i}" for i in range(297)])
+    add_posts(fake, ["old", "new", "new"])
+    engine = make_engine(tmp_path, url)
+    inventory = RemoteInventory.from_posts(
+        get_inventory_path(tmp_path), BLOG_ID, fake.get_recent_posts(BLOG_ID, "user", "token", 300)
+    )
+    for post_id, post in fake.posts.items():
+        if post["title"] == "new":
+            inventory.record_created("new", post_id, post["dateCreated"])
+    engine.context.inventory = inventory
+    engine.context.blog_id = BLOG_ID
+    fake.reset()
+
+    result = engine.run()
+
+    # 快照轮删除 new 的副本后，窗口外较早的 old 副本滑入窗口，由完整拉取轮删除
+    assert len(result.deleted) == 2
+    assert result.rounds == 2
+    # 完整拉取两次：第一次删除 old 的副本，第二次确认已无重复
+    assert fake.calls["metaWeblog.getRecentPosts"] == 2
+    titles = [post["title"] for post in fake.posts.values()]
+    assert len(titles) == len(set(titles))
+
+
+def test_dry_run_deletes_nothing(tmp_path, fake_server):
+    fake, url = fake_server
+    add_posts(fake, ["a", "a", "b"])
+
+    result = make_engine(tmp_path, url, dry_run=True).run(full=True)
+
+    assert result.deleted == []
+    assert len(result.plan.delete) == 1
+    assert len(fake.posts) == 3
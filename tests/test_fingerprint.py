@@ -0,0 +1,123 @@
+import pytest
+
+from assemble_publish import sync_to_cnblogs as sync
+from assemble_publish.common import TitleIndex
+from assemble_publish.inventory import RemoteInventory
+from assemble_publish.manifest import (
+    PublishManifest,
+    extract_fingerprint_marker,
+    fingerprint_file,
+    fingerprint_marker,
+    fingerprint_text,
+)
+
+
+@pytest.fixture
+def state(monkeypatch):
+    """每个测试使用独立的内存状态（最近文章映射、标题索引、发布清单与远端快照）"""
+    monkeypatch.setattr(sync, "RECENT_POSTS_MAP", sync.RecentPostsMap())
+    monkeypatch.setattr(sync, "TITLE_INDEX", TitleIndex())
+    monkeypatch.setattr(sync, "PUBLISH_MANIFEST", PublishManifest())
+    monkeypatch.setattr(sync, "REMOTE_INVENTORY", RemoteInventory())
+    monkeypatch.setattr(sync, "USE_PUBLISH_MANIFEST", True)
+    return sync
+
+
+SOURCES = {
+    "lf": "# 标题\n\n见 [另一篇](docs/other.md) 与 [外链](https://example.com)。\n",
+    "crlf": "# 标题\r\n\r\n[a](x.md) [b](y.md)\r\nend\r\n",
+    "no-trailing-newline": "一行 [链接](z.md)",
+    "empty": "",
+    "long": "".join(f"第 {i} 行 [链接{i}](p{i}.md)\n" for i in range(5000)),
+}
+
+
+@pytest.mark.parametrize("name", sorted(SOURCES))
+def test_streaming_fingerprint_matches_whole_file_render(tmp_path, name):
+    path = tmp_path / f"{name}.md"
+    path.write_bytes(SOURCES[name].encode("utf-8"))
+    title = sync.title_from_path(str(path))
+
+    whole = sync.render_post_body(title, sync.get_file_content(str(path)))
+
+    assert sync.fingerprint_markdown_file(str(path)) == sync.rendered_fingerprint(whole)
+
+
+def test_fingerprint_file_applies_prefix_and_transform(tmp_path):
+    path = tmp_path / "a.md"
+    path.write_text("a\nb\n", encoding="utf-8")
+    assert fingerprint_file(str(path), "P:", str.upper) == fingerprint_text("P:A\nB\n")
+
+
+def test_manifest_match_skips_publishing(state):
+    state.PUBLISH_MANIFEST.record("a", "fp", "1")
+    state.RECENT_POSTS_MAP["a"] = "1"
+    assert state.is_unchanged_post("a", "fp")
+    assert not state.is_unchanged_post("a", "changed")
+
+
+def test_manifest_match_with_different_remote_post_is_published(state):
+    state.PUBLISH_MANIFEST.record("a", "fp", "1")
+    state.RECENT_POSTS_MAP["a"] = "2"
+    assert not state.is_unchanged_post("a", "fp")
+
+
+def test_manifest_match_missing_from_complete_remote_list_is_published(state):
+    state.PUBLISH_MANIFEST.record("a", "fp", "1")
+    assert not state.is_unchanged_post("a", "fp")
+    # 远端列表被截断（300 篇上限）时看不到的文章不能判定为已删除
+    state.REMOTE_INVENTORY.truncated = True
+    assert state.is_unchanged_post("a", "fp")
+
+
+def test_manifest_disabled_falls_back_to_publishing(state, monkeypatch):
+    state.PUBLISH_MANIFEST.record("a", "fp", "1")
+    state.RECENT_POSTS_MAP["a"] = "1"
+    monkeypatch.setattr(sync, "USE_PUBLISH_MANIFEST", False)
+    assert not state.is_unchanged_post("a", "fp")
+
+
+def test_marker_round_trip():
+    fingerprint = fingerprint_text("正文")
+    assert extract_fingerprint_marker("正文" + fingerprint_marker(fingerprint)) == fingerprint
+    # 远端可能在末尾补充空白
+    assert extract_fingerprint_marker("正文" + fingerprint_marker(fingerprint) + "\r\n  ") == fingerprint
+
+
+def test_rendered_fingerprint_reads_embedded_marker():
+    final = sync.render_post_body("标题", "正文 [a](a.md)\n")
+    body = final[: final.rindex("\r\n\r\n<!--")]
+    assert sync.rendered_fingerprint(final) == fingerprint_text(body)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "没有标记的正文",
+        "正文" + fingerprint_marker("a" * 64) + "<p>追加的内容</p>",
+        "正文<!-- cnblogs-sync:fingerprint=not-a-sha256 -->",
+        fingerprint_marker("a" * 64) + "x" * 300,
+        None,
+        123,
+    ],
+)
+def test_missing_or_invalid_marker_is_ignored(text):
+    assert extract_fingerprint_marker(text) is None
+
+
+def test_content_without_marker_falls_back_to_whole_text_fingerprint():
+    assert sync.rendered_fingerprint("旧版本发布的正文") == fingerprint_text("旧版本发布的正文")
+
+
+def test_matching_remote_marker_skips_edit_and_fills_manifest(state):
+    state.RECENT_POSTS_MAP["a"] = "1"
+    state.RECENT_POSTS_MAP.set_fingerprint("a", "fp")
+    assert state.is_unchanged_post("a", "fp")
+    assert state.PUBLISH_MANIFEST.get("a") == {"fingerprint": "fp", "post_id": "1"}
+
+
+def test_different_remote_marker_requires_edit(state):
+    state.RECENT_POSTS_MAP["a"] = "1"
+    state.RECENT_POSTS_MAP.set_fingerprint("a", "old")
+    assert not state.is_unchanged_post("a", "new")
+    assert state.PUBLISH_MANIFEST.get("a") is None
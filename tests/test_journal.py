@@ -0,0 +1,46 @@
+import json
+
+from assemble_publish.journal import PublishJournal
+
+
+def test_replay_of_missing_journal_is_empty(tmp_path):
+    state = PublishJournal(tmp_path / "journal.jsonl").replay()
+    assert not state.interrupted
+    assert state.completed == {}
+    assert state.pending == {}
+
+
+def test_replay_recovers_outcomes_and_ignores_truncated_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = PublishJournal(path)
+    journal.begin()
+    journal.intent("a", "create")
+    journal.outcome("a", "created", 101, "fp-a")
+    journal.intent("b", "edit", "202")
+    journal.outcome("b", "updated", "202")
+    journal.intent("c", "create")
+    journal.intent("d", "create")
+    journal.outcome("d", "failed")
+    # 模拟写入一半时断电：最后一行只写了一部分
+    with path.open("ab") as f:
+        f.write(json.dumps({"op": "outcome", "title": "c", "result": "created", "post_id": "303"}).encode()[:25])
+
+    state = PublishJournal(path).replay()
+
+    assert state.interrupted
+    assert set(state.completed) == {"a", "b"}
+    assert state.completed["a"]["post_id"] == "101"
+    assert state.completed["a"]["fingerprint"] == "fp-a"
+    assert isinstance(state.completed["a"]["ts"], int)
+    assert state.completed["b"]["result"] == "updated"
+    assert state.pending == {"c": {"action": "create", "post_id": None}}
+
+
+def test_complete_removes_the_journal(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = PublishJournal(path)
+    journal.begin()
+    journal.outcome("a", "created", 1)
+    journal.complete()
+    assert not path.exists()
+    assert not PublishJournal(path).replay().interrupted
@@ -0,0 +1,17 @@
+from assemble_publish.manifest import PublishManifest
+
+
+def test_is_unchanged_requires_matching_fingerprint_and_post_id():
+    manifest = PublishManifest()
+    manifest.record("a", "fp", 1)
+    assert manifest.is_unchanged("a", "fp")
+    assert manifest.is_unchanged("a", "fp", "1")
+    assert not manifest.is_unchanged("a", "other")
+    assert not manifest.is_unchanged("a", "fp", "2")
+    assert not manifest.is_unchanged("b", "fp")
+
+
+def test_title_missing_from_complete_remote_list_is_changed():
+    manifest = PublishManifest()
+    manifest.record("a", "fp", 1)
+    assert not manifest.is_unchanged("a", "fp", None, missing_remotely=True)
@@ -0,0 +1,70 @@
+import json
+
+from assemble_publish.metrics import RunMetrics, get_metrics_dir
+
+
+def _samples(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = value
+    return samples
+
+
+def test_write_produces_prometheus_textfile_and_json(tmp_path):
+    run = RunMetrics("sync")
+    run.observe_rpc("metaWeblog.newPost", 0.02, 2000)
+    run.observe_rpc("metaWeblog.newPost", 0.3, 5000, outcome="fault")
+    run.record_outcome("created")
+    run.inc("publish_retries", 2)
+    run.set_gauge("pending_posts", 4)
+    run.step_started(1, "sync")
+    run.step_finished(1, "ok")
+    run.finish(3)
+
+    written = run.write(tmp_path / "metrics")
+
+    prom_path = tmp_path / "metrics" / "sync.prom"
+    json_path = tmp_path / "metrics" / "sync.json"
+    assert written == [prom_path, json_path]
+    assert not list((tmp_path / "metrics").glob("*.tmp"))
+
+    text = prom_path.read_text(encoding="utf-8")
+    assert "# TYPE cnblogs_sync_rpc_duration_seconds histogram" in text
+    assert "# TYPE cnblogs_sync_posts_total counter" in text
+    samples = _samples(text)
+    method = 'component="sync",method="metaWeblog.newPost"'
+    # 分桶计数是累积的，+Inf 等于总次数
+    assert samples["cnblogs_sync_rpc_duration_seconds_bucket{" + method + ',le="0.01"}'] == "0"
+    assert samples["cnblogs_sync_rpc_duration_seconds_bucket{" + method + ',le="0.025"}'] == "1"
+    assert samples["cnblogs_sync_rpc_duration_seconds_bucket{" + method + ',le="0.5"}'] == "2"
+    assert samples["cnblogs_sync_rpc_duration_seconds_bucket{" + method + ',le="+Inf"}'] == "2"
+    assert samples["cnblogs_sync_rpc_duration_seconds_count{" + method + "}"] == "2"
+    assert float(samples["cnblogs_sync_rpc_duration_seconds_sum{" + method + "}"]) == 0.32
+    assert samples["cnblogs_sync_rpc_request_bytes_sum{" + method + "}"] == "7000.0"
+    assert samples["cnblogs_sync_rpc_failures_total{" + method + ',kind="fault"}'] == "1"
+    assert samples['cnblogs_sync_posts_total{component="sync",outcome="created"}'] == "1"
+    assert samples['cnblogs_sync_posts_total{component="sync",outcome="failed"}'] == "0"
+    assert samples['cnblogs_sync_events_total{component="sync",event="publish_retries"}'] == "2"
+    assert samples['cnblogs_sync_pending_posts{component="sync"}'] == "4"
+    assert samples['cnblogs_sync_run_exit_code{component="sync"}'] == "3"
+    assert 'cnblogs_sync_step_duration_seconds{component="sync",step="1",name="sync",status="ok"}' in samples
+
+    summary = json.loads(json_path.read_text(encoding="utf-8"))
+    assert summary["exit_code"] == 3
+    assert summary["rpc"]["metaWeblog.newPost"]["faults"] == 1
+
+
+def test_label_values_are_escaped():
+    run = RunMetrics('a"b')
+    run.inc("x\\y")
+    text = run.to_prometheus()
+    assert 'cnblogs_sync_events_total{component="a\\"b",event="x\\\\y"} 1' in text
+
+
+def test_metrics_dir_env_override(tmp_path, monkeypatch):
+    monkeypatch.delenv("CNBLOGS_METRICS_DIR", raising=False)
+    assert get_metrics_dir(tmp_path) == (tmp_path / ".cnblogs_sync" / "metrics").resolve()
+    monkeypatch.setenv("CNBLOGS_METRICS_DIR", str(tmp_path / "textfile"))
+    assert get_metrics_dir(tmp_path) == (tmp_path / "textfile").resolve()
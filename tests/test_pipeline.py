@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from assemble_publish.pipeline import Pipeline, Stage
+
+
+def test_every_input_reaches_the_end():
+    pipeline = Pipeline([Stage("double", lambda x: x * 2, workers=3), Stage("inc", lambda x: x + 1, workers=2)])
+    assert sorted(pipeline.run(range(100))) == [x * 2 + 1 for x in range(100)]
+
+
+def test_single_worker_stages_keep_input_order():
+    pipeline = Pipeline([Stage("a", lambda x: x), Stage("b", lambda x: x)], queue_size=2)
+    assert list(pipeline.run(range(50))) == list(range(50))
+
+
+def test_raising_stage_with_on_error_still_yields_a_result_for_every_input():
+    def flaky(x):
+        if x % 3 == 0:
+            raise ValueError(x)
+        return ("ok", x)
+
+    pipeline = Pipeline([
+        Stage("flaky", flaky, workers=2, on_error=lambda x, e: ("failed", x)),
+        Stage("pass", lambda item: item),
+    ])
+    results = dict((x, status) for status, x in pipeline.run(range(30)))
+    assert sorted(results) == list(range(30))
+    assert all((status == "failed") == (x % 3 == 0) for x, status in results.items())
+
+
+def test_raising_stage_without_on_error_drops_item_and_raises_after_draining():
+    def flaky(x):
+        if x == 5:
+            raise ValueError("boom")
+        return x
+
+    pipeline = Pipeline([Stage("flaky", flaky, workers=2)])
+    seen = []
+    with pytest.raises(ValueError, match="boom"):
+        for x in pipeline.run(range(10)):
+            seen.append(x)
+    assert sorted(seen) == [x for x in range(10) if x != 5]
+
+
+def test_on_error_failure_is_propagated():
+    def broken_handler(item, error):
+        raise RuntimeError("handler")
+
+    pipeline = Pipeline([Stage("s", lambda x: 1 / 0, on_error=broken_handler)])
+    with pytest.raises(RuntimeError, match="handler"):
+        list(pipeline.run(range(3)))
+
+
+def test_stop_short_circuits_remaining_items_without_losing_them():
+    stop = threading.Event()
+
+    def work(x):
+        if stop.is_set():
+            return (x, None)
+        if x == 3:
+            stop.set()
+        return (x, "done")
+
+    results = dict(Pipeline([Stage("work", work)]).run(range(10)))
+    assert sorted(results) == list(range(10))
+    assert [x for x, r in results.items() if r == "done"] == [0, 1, 2, 3]
+
+
+def test_backpressure_bounds_items_in_flight():
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def source():
+        nonlocal in_flight, peak
+        for x in range(200):
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            yield x
+
+    def slow(x):
+        time.sleep(0.001)
+        return x
+
+    pipeline = Pipeline([Stage("slow", slow), Stage("pass", lambda x: x)], queue_size=2)
+    for _ in pipeline.run(source()):
+        with lock:
+            in_flight -= 1
+    # 3 个队列各 2 个 + 2 个工作线程手中各 1 个 + 消费者与喂料线程各 1 个
+    assert peak <= 3 * 2 + 2 + 2
+
+
+def test_stage_stats_count_processed_items():
+    pipeline = Pipeline([Stage("a", lambda x: x, workers=2)])
+    list(pipeline.run(range(7)))
+    (stats,) = pipeline.stats()
+    assert stats["name"] == "a" and stats["processed"] == 7 and stats["workers"] == 2
+
+
+def test_pipeline_requires_a_stage():
+    with pytest.raises(ValueError):
+        Pipeline([])
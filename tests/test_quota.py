@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+from assemble_publish import quota
+from assemble_publish.quota import QuotaLedger, plan_publish_order
+
+
+def test_plan_without_known_limit_keeps_everything_backlog_first():
+    planned, deferred = plan_publish_order(["a", "b", "c"], ["c", "x"], lambda p: True, None)
+    assert planned == ["c", "x", "a", "b"]
+    assert deferred == []
+
+
+def test_plan_defers_creates_beyond_remaining_quota_but_not_updates():
+    creates = {"new1", "new2", "new3"}
+    planned, deferred = plan_publish_order(
+        ["new1", "upd1", "new2", "upd2", "new3"], [], lambda p: p in creates, 1
+    )
+    assert planned == ["new1", "upd1", "upd2"]
+    assert deferred == ["new2", "new3"]
+
+
+def test_plan_with_zero_remaining_only_updates():
+    planned, deferred = plan_publish_order(["new", "upd"], [], lambda p: p == "new", 0)
+    assert planned == ["upd"]
+    assert deferred == ["new"]
+
+
+def test_estimate_runs():
+    ledger = QuotaLedger()
+    assert ledger.estimate_runs(0) == (0, 0)
+    assert ledger.estimate_runs(5) is None
+    ledger.create_limit = 10
+    ledger.record("created")
+    ledger.record("created")
+    # 今天还剩 8 篇
+    assert ledger.estimate_runs(8) == (0, 1)
+    assert ledger.estimate_runs(9) == (1, quota.RUNS_PER_DAY)
+    assert ledger.estimate_runs(29) == (3, 3 * quota.RUNS_PER_DAY)
+
+
+def test_limit_hit_learns_limit_and_leaves_no_remaining():
+    ledger = QuotaLedger()
+    assert ledger.remaining_creates() is None
+    for _ in range(3):
+        ledger.record("created")
+    ledger.record("skipped")
+    ledger.mark_limit_hit()
+    assert ledger.create_limit == 3
+    assert ledger.remaining_creates() == 0
+    assert ledger.used_today() == {"created": 3, "updated": 0, "limit_hit": True}
+
+
+def test_today_uses_quota_timezone(monkeypatch):
+    monkeypatch.setattr(quota, "QUOTA_TZ", timezone(timedelta(hours=14)))
+    ahead = datetime.now(timezone(timedelta(hours=14))).date()
+    assert QuotaLedger.today() == ahead.isoformat()
+    monkeypatch.setattr(quota, "QUOTA_TZ", timezone(timedelta(hours=-12)))
+    assert QuotaLedger.today() == datetime.now(timezone(timedelta(hours=-12))).date().isoformat()
+
+
+def test_invalid_quota_timezone_falls_back_to_utc_plus_8():
+    assert quota.load_quota_timezone("Not/AZone").utcoffset(None) == timedelta(hours=8)
+    assert quota.load_quota_timezone("Asia/Shanghai").utcoffset(datetime(2024, 1, 1)) == timedelta(hours=8)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "ledger.json"
+    ledger = QuotaLedger(path)
+    ledger.record("updated")
+    ledger.create_limit = 7
+    ledger.set_backlog(["a", "b", "a"])
+    stale = (quota.quota_date() - timedelta(days=quota.LEDGER_KEEP_DAYS + 1)).isoformat()
+    ledger.days[stale] = {"created": 1, "updated": 0, "limit_hit": False}
+    assert ledger.save()
+
+    loaded = QuotaLedger.load(path)
+    assert loaded.create_limit == 7
+    assert loaded.backlog == ["a", "b"]
+    assert stale not in loaded.days
+    assert loaded.used_today()["updated"] == 1
@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+
+from assemble_publish.ratelimit import AdaptivePacer, TokenBucket
+
+
+def test_token_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=20, capacity=3)
+    started = time.monotonic()
+    for _ in range(3):
+        assert bucket.acquire()
+    assert time.monotonic() - started < 0.05
+    for _ in range(4):
+        assert bucket.acquire()
+    # 突发用完后按 20 次/秒补充：再取 4 个至少约 0.2 秒
+    assert time.monotonic() - started >= 0.15
+
+
+def test_token_bucket_zero_rate_is_unlimited():
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.acquire() for _ in range(100))
+
+
+def test_token_bucket_acquire_returns_false_when_stopped():
+    bucket = TokenBucket(rate=0.1)
+    assert bucket.acquire()
+    stop = threading.Event()
+    threading.Timer(0.05, stop.set).start()
+    assert bucket.acquire(stop) is False
+
+
+def test_pacer_increases_additively_and_decreases_multiplicatively():
+    pacer = AdaptivePacer(1.0, max_rate=2.0, increase_step=0.25)
+    pacer.on_success(0.1)
+    pacer.on_success(0.1)
+    assert pacer.rate == 1.5
+    pacer.on_throttle()
+    assert pacer.rate == 0.75
+    # 冷却期内的第二次限流不再减速
+    pacer.on_throttle()
+    assert pacer.rate == 0.75
+    assert pacer.throttles == 2
+    for _ in range(20):
+        pacer.on_success(0.1)
+    assert pacer.rate == 2.0
+
+
+def test_pacer_slow_response_decreases_rate():
+    pacer = AdaptivePacer(1.0, slow_seconds=1.0)
+    pacer.on_success(2.0)
+    assert pacer.rate == 0.5
+    assert pacer.slow_responses == 1
+
+
+def test_pacer_disabled_keeps_fixed_rate():
+    pacer = AdaptivePacer(1.0, enabled=False)
+    pacer.on_success(0.1)
+    pacer.on_throttle()
+    assert pacer.rate == 1.0
+
+
+def test_concurrent_successes_are_not_lost():
+    pacer = AdaptivePacer(0.1, max_rate=1000, increase_step=0.001)
+    threads = [threading.Thread(target=lambda: [pacer.on_success(0) for _ in range(200)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert abs(pacer.rate - (0.1 + 1600 * 0.001)) < 1e-6
+
+
+def test_state_round_trip_and_configured_rate_change(tmp_path):
+    path = tmp_path / "pacer.json"
+    pacer = AdaptivePacer(1.0, max_rate=5.0)
+    pacer.bucket.set_rate(3.0)
+    pacer.save_state(path)
+
+    resumed = AdaptivePacer(1.0, max_rate=5.0)
+    resumed.load_state(path)
+    assert resumed.rate == 3.0
+
+    lowered_max = AdaptivePacer(1.0, max_rate=2.0)
+    lowered_max.load_state(path)
+    assert lowered_max.rate == 2.0
+
+    reconfigured = AdaptivePacer(0.5, max_rate=5.0)
+    reconfigured.load_state(path)
+    assert reconfigured.rate == 0.5
+
+    path.write_text(json.dumps({"rate": 4.0}), encoding="utf-8")
+    legacy = AdaptivePacer(1.0, max_rate=5.0)
+    legacy.load_state(path)
+    assert legacy.rate == 1.0
+
+
+def test_reset_run_stats_keeps_learned_rate():
+    pacer = AdaptivePacer(1.0, increase_step=0.5)
+    pacer.acquire()
+    pacer.on_success(0.1)
+    pacer.on_throttle()
+    pacer.on_timeout()
+    learned = pacer.rate
+    assert pacer.effective_posts_per_minute() > 0
+
+    pacer.reset_run_stats()
+
+    assert pacer.rate == learned
+    assert (pacer.successes, pacer.throttles, pacer.timeouts, pacer.slow_responses) == (0, 0, 0, 0)
+    assert pacer.effective_posts_per_minute() == 0.0
+    # 冷却期随之清零：新运行中的第一次限流立即减速
+    pacer.on_throttle()
+    assert pacer.rate == learned * 0.5
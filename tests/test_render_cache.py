@@ -0,0 +1,59 @@
+import os
+
+from assemble_publish.render_cache import RenderCache, render_cache_key
+
+
+def test_key_depends_on_source_and_parts():
+    key = render_cache_key("body", "title", "v1")
+    assert key == render_cache_key("body", "title", "v1")
+    assert key != render_cache_key("body", "title", "v2")
+    assert key != render_cache_key("body", "titlev1")
+
+
+def test_disabled_cache_stores_nothing():
+    cache = RenderCache(None)
+    cache.put("k", "body")
+    assert cache.get("k") is None
+
+
+def test_get_and_put_round_trip(tmp_path):
+    cache = RenderCache(tmp_path)
+    key = render_cache_key("source")
+    assert cache.get(key) is None
+    cache.put(key, "渲染结果")
+    assert cache.get(key) == "渲染结果"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_crlf_line_endings_survive_a_round_trip(tmp_path):
+    body = "> 关联知识库\r\n\r\n正文\n第二行\r\n\r\n<!-- cnblogs-sync:fingerprint=abc -->"
+    key = render_cache_key("source")
+    RenderCache(tmp_path).put(key, body)
+    assert RenderCache(tmp_path).get(key) == body
+
+
+def test_eviction_removes_least_recently_used_first(tmp_path):
+    cache = RenderCache(tmp_path, max_bytes=350)
+    keys = [render_cache_key(str(i)) for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, "x" * 100)
+        # 显式设置递增的 mtime，避免文件系统时间精度影响顺序
+        os.utime(cache._path(key), (1000 + age, 1000 + age))
+    # 命中 keys[0] 后它变为最近使用，淘汰应先删 keys[1]
+    assert cache.get(keys[0]) is not None
+
+    cache.put(render_cache_key("3"), "x" * 100)
+
+    # 400 字节超过上限，淘汰到上限的 90%（315 字节）以下：只删最久未用的一项
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+    assert cache.get(render_cache_key("3")) is not None
+
+
+def test_total_size_is_tracked_across_instances(tmp_path):
+    RenderCache(tmp_path).put(render_cache_key("a"), "x" * 200)
+    cache = RenderCache(tmp_path, max_bytes=300)
+    cache.put(render_cache_key("b"), "x" * 200)
+    # 新实例首次写入时扫描已有条目，总大小 400 超过上限，淘汰较旧的一项
+    assert len(list(tmp_path.glob("*/*.md"))) == 1
@@ -0,0 +1,167 @@
+import json
+import os
+import subprocess
+
+import pytest
+
+from run_sync import (
+    DEPS_STAMP_FILE,
+    check_deps,
+    collect_changed_markdown,
+    file_sha256,
+    parse_requirements,
+    write_deps_stamp,
+)
+
+GIT_ENV = {
+    **os.environ,
+    "GIT_AUTHOR_NAME": "test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+    "GIT_CONFIG_NOSYSTEM": "1",
+    "HOME": os.devnull,
+}
+
+
+def git(repo, *args) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=repo, env=GIT_ENV, check=True, text=True, capture_output=True
+    ).stdout.strip()
+
+
+def commit(repo, message="c") -> str:
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "--allow-empty", "-m", message)
+    return git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q")
+    for name in ("keep.md", "old name.md", "gone.md", "notes.txt"):
+        (tmp_path / name).write_text(name, encoding="utf-8")
+    return tmp_path
+
+
+def changed(repo, base, head):
+    return collect_changed_markdown(repo, GIT_ENV, base, head)
+
+
+def test_added_modified_and_renamed_markdown_is_reported(repo):
+    base = commit(repo)
+    (repo / "keep.md").write_text("changed", encoding="utf-8")
+    (repo / "old name.md").rename(repo / "new name.md")
+    (repo / "dir with space").mkdir()
+    (repo / "dir with space" / "新文章.md").write_text("x", encoding="utf-8")
+    (repo / "line\nbreak.md").write_text("x", encoding="utf-8")
+    (repo / "notes.txt").write_text("changed", encoding="utf-8")
+    head = commit(repo)
+
+    assert sorted(changed(repo, base, head)) == sorted(
+        ["keep.md", "new name.md", "dir with space/新文章.md", "line\nbreak.md"]
+    )
+
+
+def test_deleted_markdown_is_not_reported(repo):
+    base = commit(repo)
+    (repo / "gone.md").unlink()
+    head = commit(repo)
+    assert changed(repo, base, head) == []
+
+
+def test_rename_with_identical_content_is_reported_as_new_path(repo):
+    base = commit(repo)
+    (repo / "gone.md").rename(repo / "moved.md")
+    head = commit(repo)
+    assert changed(repo, base, head) == ["moved.md"]
+
+
+def test_missing_history_requires_full_scan(repo):
+    head = commit(repo)
+    assert changed(repo, None, head) is None
+    assert changed(repo, "0" * 40, head) is None
+
+
+def install(site, name, version):
+    """在 site 目录伪造一个已安装的发行包（只有 importlib.metadata 需要的元数据）"""
+    for old in site.glob(f"{name}-*.dist-info"):
+        (old / "METADATA").unlink()
+        old.rmdir()
+    dist_info = site / f"{name}-{version}.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n", encoding="utf-8")
+
+
+@pytest.fixture
+def deps(tmp_path):
+    site = tmp_path / "site-packages"
+    site.mkdir()
+    req_file = tmp_path / "requirements.txt"
+    return site, req_file, tmp_path / DEPS_STAMP_FILE
+
+
+def test_parse_requirements(tmp_path):
+    def parse_requirements_text(text):
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text(text, encoding="utf-8")
+        return parse_requirements(req_file)
+
+    assert parse_requirements_text("Foo_Bar==1.2\nbaz[extra]\n# comment\n\nqux == 3 # pinned\n") == [
+        ("foo-bar", "1.2"),
+        ("baz", None),
+        ("qux", "3"),
+    ]
+    for line in ("requests>=2", "-r other.txt", "pkg; python_version<'3.12'", "pkg @ https://x/pkg.whl"):
+        assert parse_requirements_text(line) is None
+
+
+def test_pinned_requirements_pass_without_stamp(deps):
+    site, req_file, stamp = deps
+    install(site, "Markdown", "3.5")
+    install(site, "pyyaml", "6.0")
+    req_file.write_text("markdown==3.5\nPyYAML\n", encoding="utf-8")
+    assert check_deps(req_file, stamp, [str(site)]) == {"markdown": "3.5", "pyyaml": "6.0"}
+
+
+def test_missing_or_mismatched_package_requires_install(deps):
+    site, req_file, stamp = deps
+    install(site, "markdown", "3.4")
+    req_file.write_text("markdown==3.5\n", encoding="utf-8")
+    assert check_deps(req_file, stamp, [str(site)]) is None
+    req_file.write_text("markdown\nmissing-pkg\n", encoding="utf-8")
+    assert check_deps(req_file, stamp, [str(site)]) is None
+
+
+def test_stamp_allows_unverifiable_requirements_until_something_changes(deps):
+    site, req_file, stamp = deps
+    install(site, "markdown", "3.5")
+    req_file.write_text("markdown>=3\n", encoding="utf-8")
+    # 范围约束无法本地判断：没有印记时需要 pip
+    assert check_deps(req_file, stamp, [str(site)]) is None
+
+    # pip 安装成功后写入印记：记录整个环境，此后无需 pip
+    install(site, "other", "1.0")
+    write_deps_stamp(req_file, stamp, [str(site)])
+    assert json.loads(stamp.read_text(encoding="utf-8"))["requirements_sha256"] == file_sha256(req_file)
+    assert check_deps(req_file, stamp, [str(site)]) == {"markdown": "3.5", "other": "1.0"}
+
+    # 环境中任一包变化（含被卸载）都令印记失效
+    install(site, "markdown", "2.0")
+    assert check_deps(req_file, stamp, [str(site)]) is None
+
+
+def test_stamp_is_invalidated_by_version_or_requirements_change(deps):
+    site, req_file, stamp = deps
+    install(site, "markdown", "3.5")
+    req_file.write_text("markdown\n", encoding="utf-8")
+    write_deps_stamp(req_file, stamp, [str(site)])
+    assert json.loads(stamp.read_text(encoding="utf-8"))["packages"] == {"markdown": "3.5"}
+    assert check_deps(req_file, stamp, [str(site)]) == {"markdown": "3.5"}
+
+    install(site, "markdown", "3.6")
+    # 印记中的版本已变化，回退为逐个检查：无版本约束的包已安装即可
+    assert check_deps(req_file, stamp, [str(site)]) == {"markdown": "3.6"}
+
+    req_file.write_text("markdown==3.5\n", encoding="utf-8")
+    assert check_deps(req_file, stamp, [str(site)]) is None
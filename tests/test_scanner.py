@@ -0,0 +1,116 @@
+import os
+import re
+
+import pytest
+
+from assemble_publish.scanner import IgnoreRule, ScanCache, _glob_to_regex, is_ignored, iter_markdown_files
+
+
+@pytest.mark.parametrize(
+    "pattern, path, expected",
+    [
+        ("*.md", "a.md", True),
+        ("*.md", "dir/a.md", False),
+        ("a?.md", "ab.md", True),
+        ("a?.md", "a/.md", False),
+        ("[ab].md", "b.md", True),
+        ("[!ab].md", "b.md", False),
+        ("[!ab].md", "c.md", True),
+        ("**/x.md", "x.md", True),
+        ("**/x.md", "a/b/x.md", True),
+        ("a/**/b", "a/b", True),
+        ("a/**/b", "a/x/y/b", True),
+        ("a/**", "a/x/y", True),
+        ("a/**", "ab/x", False),
+        ("a.b", "axb", False),
+    ],
+)
+def test_glob_to_regex(pattern, path, expected):
+    assert (re.fullmatch(_glob_to_regex(pattern), path) is not None) is expected
+
+
+def rules(*lines, base=""):
+    return [IgnoreRule(line, base) for line in lines]
+
+
+def test_unanchored_rule_matches_name_at_any_depth():
+    assert is_ignored(rules("draft.md"), "draft.md", False)
+    assert is_ignored(rules("draft.md"), "posts/2024/draft.md", False)
+
+
+def test_anchored_rule_matches_only_relative_to_base():
+    assert is_ignored(rules("/build"), "build", True)
+    assert not is_ignored(rules("/build"), "docs/build", True)
+    assert is_ignored(rules("docs/tmp"), "docs/tmp", True)
+    assert not is_ignored(rules("docs/tmp"), "other/docs/tmp", True)
+
+
+def test_rule_from_nested_gitignore_applies_to_its_subtree_only():
+    nested = rules("/private", base="posts")
+    assert is_ignored(nested, "posts/private", True)
+    assert not is_ignored(nested, "private", True)
+    assert not is_ignored(nested, "postsx/private", True)
+
+
+def test_dir_only_rule_skips_files():
+    assert is_ignored(rules("cache/"), "cache", True)
+    assert is_ignored(rules("cache/"), "a/cache", True)
+    assert not is_ignored(rules("cache/"), "cache", False)
+
+
+def test_last_matching_rule_wins_for_negation():
+    assert not is_ignored(rules("*.md", "!keep.md"), "keep.md", False)
+    assert is_ignored(rules("*.md", "!keep.md"), "drop.md", False)
+    assert is_ignored(rules("!keep.md", "*.md"), "keep.md", False)
+
+
+def write(root, rel, text=""):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    write(tmp_path, ".gitignore", "drafts/\n*.tmp.md\n!important.tmp.md\n")
+    write(tmp_path, "a.md")
+    write(tmp_path, "notes.txt")
+    write(tmp_path, "x.tmp.md")
+    write(tmp_path, "important.tmp.md")
+    write(tmp_path, "drafts/d.md")
+    write(tmp_path, "node_modules/pkg/readme.md")
+    write(tmp_path, "posts/.gitignore", "/secret.md\n")
+    write(tmp_path, "posts/secret.md")
+    write(tmp_path, "posts/p.md")
+    write(tmp_path, "posts/sub/secret.md")
+    return tmp_path
+
+
+def relative(root, paths):
+    return sorted(os.path.relpath(p, root).replace(os.sep, "/") for p in paths)
+
+
+def test_iter_markdown_files_prunes_excluded_and_ignored(tree):
+    found = relative(tree, iter_markdown_files(str(tree), exclude_dirs={"node_modules"}))
+    assert found == ["a.md", "important.tmp.md", "posts/p.md", "posts/sub/secret.md"]
+
+
+def test_iter_markdown_files_without_gitignore(tree):
+    found = relative(tree, iter_markdown_files(str(tree), respect_gitignore=False))
+    assert "drafts/d.md" in found
+    assert "node_modules/pkg/readme.md" in found
+    assert "notes.txt" not in found
+
+
+def test_scan_cache_reuses_unchanged_directories(tree):
+    cache = ScanCache()
+    first = list(iter_markdown_files(str(tree), exclude_dirs={"node_modules"}, cache=cache))
+    misses = cache.misses
+    second = list(iter_markdown_files(str(tree), exclude_dirs={"node_modules"}, cache=cache))
+    assert first == second
+    assert cache.misses == misses
+    assert cache.hits == misses
+
+    write(tree, "posts/new.md")
+    third = relative(tree, iter_markdown_files(str(tree), exclude_dirs={"node_modules"}, cache=cache))
+    assert "posts/new.md" in third
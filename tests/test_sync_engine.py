@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from assemble_publish import sync_to_cnblogs
+from assemble_publish.engine import EngineContext, SyncEngine
+from assemble_publish.journal import PublishJournal, get_journal_path
+from assemble_publish.manifest import get_manifest_path
+from fake_cnblogs import FakeCnblogs, start_server
+
+
+@pytest.fixture
+def fake_server():
+    fake = FakeCnblogs()
+    server, url = start_server(fake)
+    try:
+        yield fake, url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    return root
+
+
+def run_sync(repo, url, argv=None) -> int:
+    return SyncEngine(EngineContext(repo, url, "user", "token")).run(argv)
+
+
+def test_run_without_changes_clears_replayed_journal(repo, fake_server):
+    fake, url = fake_server
+    journal = PublishJournal(get_journal_path(repo))
+    journal.begin()
+    journal.intent("a", "create")
+    journal.outcome("a", "created", 10001, "fp-a")
+    files_from = repo / "changed.txt"
+    files_from.write_bytes(b"")
+
+    assert run_sync(repo, url, ["--files-from", str(files_from)]) == 0
+
+    assert not get_journal_path(repo).exists()
+    manifest = json.loads(get_manifest_path(repo).read_text(encoding="utf-8"))
+    assert manifest["entries"]["a"]["post_id"] == "10001"
+
+    # 下一次运行不再视为中断恢复：复用快照，不再拉取最近文章
+    fake.reset()
+    assert run_sync(repo, url, ["--files-from", str(files_from)]) == 0
+    assert "metaWeblog.getRecentPosts" not in fake.calls
+
+
+def test_each_run_starts_with_fresh_pacer_stats(repo, fake_server):
+    _, url = fake_server
+    pacer = sync_to_cnblogs.PUBLISH_RATE_LIMITER
+    pacer.successes = pacer.throttles = 5
+    (repo / "a.md").write_text("# a\n", encoding="utf-8")
+
+    assert run_sync(repo, url) == 0
+
+    assert pacer.successes == 1
+    assert pacer.throttles == 0
+
+
+def test_post_deleted_remotely_is_published_again(repo, fake_server, monkeypatch):
+    fake, url = fake_server
+    # 每次运行都重新拉取远端列表（不复用快照）
+    monkeypatch.setattr(sync_to_cnblogs, "INVENTORY_TTL", -1)
+    (repo / "a.md").write_text("# a\n", encoding="utf-8")
+    assert run_sync(repo, url) == 0
+    assert run_sync(repo, url) == 0
+    assert fake.calls["metaWeblog.newPost"] == 1
+    assert "metaWeblog.editPost" not in fake.calls
+
+    fake.posts.clear()
+    # 清单仍记着该标题，但完整的远端列表里已没有它：不能按“未变化”跳过。
+    # 本地标题索引仍指向旧 post_id，先尝试更新，远端报告不存在后移除索引项，下一次运行重新创建
+    run_sync(repo, url)
+    assert fake.calls["metaWeblog.editPost"] == 1
+    assert run_sync(repo, url) == 0
+    assert [post["title"] for post in fake.posts.values()] == ["a"]
+
+
+def test_remote_marker_skips_edits_without_local_manifest(repo, fake_server, monkeypatch):
+    fake, url = fake_server
+    monkeypatch.setattr(sync_to_cnblogs, "INVENTORY_TTL", -1)
+    for name in ("a", "b"):
+        (repo / f"{name}.md").write_text(f"# {name}\n", encoding="utf-8")
+    assert run_sync(repo, url) == 0
+    get_manifest_path(repo).unlink()
+    (repo / "b.md").write_text("# b changed\n", encoding="utf-8")
+    fake.reset()
+
+    assert run_sync(repo, url) == 0
+
+    assert fake.calls["metaWeblog.editPost"] == 1
+    assert "metaWeblog.newPost" not in fake.calls
@@ -0,0 +1,83 @@
+import json
+import sqlite3
+import threading
+
+from assemble_publish.common import LEGACY_SYNC_RECORD_NAME, TitleIndex, get_sync_record_path
+
+
+def test_upsert_get_and_remove_use_normalized_titles():
+    index = TitleIndex()
+    index.upsert("  标题 ", 1, "20240101T08:00:00")
+    assert index.get("标题") == "1"
+    index.upsert("标题", 2)
+    assert index.get(" 标题") == "2"
+    assert len(index) == 1
+    index.remove("标题 ")
+    assert index.get("标题") is None
+
+
+def test_upsert_many_skips_empty_titles_and_ids():
+    index = TitleIndex()
+    assert index.upsert_many([("a", 1, None), ("", 2, None), ("b", None, None), ("c", "3", None)]) == 2
+    assert index.as_dict() == {"a": "1", "c": "3"}
+
+
+def test_later_upsert_without_date_keeps_known_date(tmp_path):
+    path = get_sync_record_path(tmp_path)
+    index = TitleIndex(path)
+    index.upsert("a", 1, "20240101T08:00:00")
+    index.upsert("a", 1)
+    index.close()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT date_created FROM posts WHERE title_norm = 'a'").fetchone()[0] == "20240101T08:00:00"
+
+
+def test_index_persists_and_is_not_capped(tmp_path):
+    path = get_sync_record_path(tmp_path)
+    index = TitleIndex(path)
+    assert index.upsert_many((f"t{i}", i + 1, None) for i in range(1000)) == 1000
+    index.close()
+    reopened = TitleIndex(path)
+    assert len(reopened) == 1000
+    assert reopened.get("t999") == "1000"
+
+
+def test_legacy_json_record_is_imported_once(tmp_path):
+    path = get_sync_record_path(tmp_path)
+    legacy = path.with_name(LEGACY_SYNC_RECORD_NAME)
+    legacy.parent.mkdir(parents=True)
+    legacy.write_text(json.dumps({"旧文章": "11", " 带空格 ": 12}), encoding="utf-8")
+
+    index = TitleIndex(path)
+
+    assert index.get("旧文章") == "11"
+    assert index.get("带空格") == "12"
+    assert not legacy.exists()
+    assert legacy.with_name(LEGACY_SYNC_RECORD_NAME + ".migrated").exists()
+
+
+def test_corrupt_legacy_record_is_left_in_place(tmp_path):
+    path = get_sync_record_path(tmp_path)
+    legacy = path.with_name(LEGACY_SYNC_RECORD_NAME)
+    legacy.parent.mkdir(parents=True)
+    legacy.write_text("{not json", encoding="utf-8")
+
+    index = TitleIndex(path)
+
+    assert len(index) == 0
+    assert legacy.exists()
+
+
+def test_concurrent_upserts_from_threads(tmp_path):
+    index = TitleIndex(get_sync_record_path(tmp_path))
+
+    def worker(n):
+        for i in range(50):
+            index.upsert(f"t{n}-{i}", i + 1)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(index) == 400
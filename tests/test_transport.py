@@ -0,0 +1,126 @@
+import time
+import xmlrpc.client
+
+import pytest
+
+from assemble_publish import common, metrics
+from assemble_publish.common import KeepAliveTransport
+from fake_cnblogs import BLOG_ID, FakeCnblogs, start_server
+
+
+@pytest.fixture
+def fake_server():
+    """(替身服务状态, XML-RPC 服务, 地址)"""
+    fake = FakeCnblogs()
+    server, url = start_server(fake)
+    try:
+        yield fake, server, url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_gzip_probe_is_not_charged_to_the_triggering_method(fake_server):
+    fake, _, url = fake_server
+    class SlowProbeTransport(KeepAliveTransport):
+        def _probe_gzip(self, chost, handler, extra_headers):
+            time.sleep(0.3)
+            super()._probe_gzip(chost, handler, extra_headers)
+
+    transport = SlowProbeTransport(gzip_mode="auto", gzip_min_bytes=1024)
+    proxy = xmlrpc.client.ServerProxy(url, transport=transport)
+    run = metrics.start_run("test")
+
+    post = {"title": "t", "description": "x" * 4096}
+    proxy.metaWeblog.newPost(BLOG_ID, "user", "token", post, True)
+    proxy.metaWeblog.newPost(BLOG_ID, "user", "token", post, True)
+
+    assert transport.stats["request_bytes_saved"] > 0
+    assert run.rpc_latency["gzip_probe"].count == 2
+    new_post = run.rpc_latency["metaWeblog.newPost"]
+    assert new_post.count == 2
+    # 探测（额外耗时 0.3s）不计入触发它的 newPost
+    assert new_post.max < 0.3
+
+
+def test_get_rpc_client_shares_proxies_and_transports(fake_server):
+    _, _, url = fake_server
+    client = common.get_rpc_client(url)
+    assert common.get_rpc_client(url) is client
+    other = common.get_rpc_client(url + "RPC2")
+    assert other is not client
+    # 同一协议共享同一个 Transport（连接池按主机区分），https 使用独立的 Transport
+    transport = client._ServerProxy__transport
+    assert other._ServerProxy__transport is transport
+    assert isinstance(transport, KeepAliveTransport)
+    https_transport = common.get_rpc_client("https://example.invalid/rpc")._ServerProxy__transport
+    assert https_transport is not transport and https_transport.use_https
+
+
+def test_keep_alive_transport_reuses_one_connection(fake_server):
+    fake, _, url = fake_server
+    transport = KeepAliveTransport()
+    proxy = xmlrpc.client.ServerProxy(url, transport=transport)
+    for _ in range(5):
+        proxy.blogger.getUsersBlogs("", "user", "token")
+    assert fake.calls["blogger.getUsersBlogs"] == 5
+    assert transport.stats["connections_opened"] == 1
+    assert transport.stats["connections_reused"] == 4
+    # Fault 响应同样完整读取，连接仍可复用
+    with pytest.raises(xmlrpc.client.Fault):
+        proxy.metaWeblog.getPost("404", "user", "token")
+    proxy.blogger.getUsersBlogs("", "user", "token")
+    assert transport.stats["connections_opened"] == 1
+
+
+def add_post(fake: FakeCnblogs, title: str) -> str:
+    return fake.new_post(BLOG_ID, "user", "token", {"title": title}, True)
+
+
+def get_post_calls(post_ids):
+    return [("metaWeblog.getPost", (post_id, "user", "token")) for post_id in post_ids]
+
+
+def test_call_batch_uses_one_multicall_and_maps_faults(fake_server):
+    fake, _, url = fake_server
+    post_ids = [add_post(fake, f"t{i}") for i in range(3)]
+    fake.reset()
+
+    results = common.call_batch(url, get_post_calls([post_ids[0], "404", post_ids[2]]))
+
+    assert [result["title"] for result in (results[0], results[2])] == ["t0", "t2"]
+    assert isinstance(results[1], xmlrpc.client.Fault)
+    assert "不存在" in results[1].faultString
+    assert fake.calls == {"system.multicall": 1}
+    assert fake.batched["metaWeblog.getPost"] == 3
+
+
+def test_call_batch_splits_into_chunks(fake_server):
+    fake, _, url = fake_server
+    post_ids = [add_post(fake, f"t{i}") for i in range(5)]
+    fake.reset()
+
+    results = common.call_batch(url, get_post_calls(post_ids), max_calls=2)
+
+    assert [result["title"] for result in results] == [f"t{i}" for i in range(5)]
+    # 两个满批次走 multicall，剩下的单个调用直接发送
+    assert fake.calls == {"system.multicall": 2, "metaWeblog.getPost": 1}
+
+
+def test_call_batch_falls_back_when_multicall_is_missing(fake_server):
+    fake, server, url = fake_server
+    server.funcs.pop("system.multicall")
+    post_ids = [add_post(fake, f"t{i}") for i in range(3)]
+    fake.reset()
+
+    results = common.call_batch(url, get_post_calls([*post_ids, "404"]))
+
+    assert [result["title"] for result in results[:3]] == ["t0", "t1", "t2"]
+    assert isinstance(results[3], xmlrpc.client.Fault)
+    assert fake.calls["metaWeblog.getPost"] == 4
+    assert common._multicall_support[url] is False
+
+    # 已记住端点不支持：后续批量调用直接逐个发送
+    fake.reset()
+    common.call_batch(url, get_post_calls(post_ids))
+    assert fake.calls == {"metaWeblog.getPost": 3}
@@ -0,0 +1,71 @@
+import http.client
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from run_sync_hourly import WEBHOOK_MAX_BODY, make_webhook_handler
+
+
+class FakeTrigger:
+    def __init__(self):
+        self.notified = 0
+
+    def notify(self) -> int:
+        self.notified += 1
+        return self.notified
+
+    def status(self) -> dict:
+        return {"notified": self.notified}
+
+
+@pytest.fixture
+def webhook():
+    trigger = FakeTrigger()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_webhook_handler(trigger, ""))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield trigger, server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def post(port: int, content_length: str, body: bytes = b"") -> tuple[int, dict]:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        conn.putrequest("POST", "/")
+        conn.putheader("Content-Length", content_length)
+        conn.endheaders()
+        if body:
+            conn.send(body)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("content_length", ["abc", "-1", "1.5", ""])
+def test_invalid_content_length_is_rejected(webhook, content_length):
+    trigger, port = webhook
+    status, _ = post(port, content_length)
+    assert status == (202 if content_length == "" else 400)
+    assert trigger.notified == (1 if content_length == "" else 0)
+
+
+def test_oversized_body_is_rejected_before_reading(webhook):
+    trigger, port = webhook
+    status, payload = post(port, str(WEBHOOK_MAX_BODY + 1))
+    assert status == 413
+    assert payload == {"error": "payload too large"}
+    assert trigger.notified == 0
+
+
+def test_valid_push_is_queued(webhook):
+    trigger, port = webhook
+    body = json.dumps({"ref": "refs/heads/other"}).encode()
+    assert post(port, str(len(body)), body) == (202, {"ignored": "refs/heads/other"})
+    status, payload = post(port, "2", b"{}")
+    assert status == 202 and payload["queued"]
+    assert trigger.notified == 1